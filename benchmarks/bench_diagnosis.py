@@ -0,0 +1,57 @@
+"""Micro-benchmark: get_student_diagnosis per row vs diagnose_students on a roster.
+
+Run from the repository root:
+    python benchmarks/bench_diagnosis.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from diagnosis import diagnose_students, get_student_diagnosis
+
+RISK_LEVELS = ['At-risk', 'Average', 'High-performing']
+
+
+def load_roster(copies):
+    df = pd.read_csv(os.path.join('data', 'student-por.csv'), sep=';')
+    df = pd.concat([df] * copies, ignore_index=True)
+    risk_levels = np.random.default_rng(0).choice(RISK_LEVELS, size=len(df))
+    return df, risk_levels
+
+
+def per_row_us(fn, rows, repeat=3):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(number=number, repeat=repeat))
+    return best / number / rows * 1e6
+
+
+def main():
+    df, risk_levels = load_roster(20)
+    records = df.to_dict('records')
+
+    def per_student():
+        return [get_student_diagnosis(s, r) for s, r in zip(records, risk_levels)]
+
+    assert diagnose_students(df, risk_levels) == per_student(), "Batch diagnosis diverged from get_student_diagnosis"
+
+    baseline = per_row_us(per_student, len(df))
+    results = [
+        ('DataFrame', per_row_us(lambda: diagnose_students(df, risk_levels), len(df))),
+        ('DataFrame, shared', per_row_us(lambda: diagnose_students(df, risk_levels, shared=True), len(df))),
+        ('list of dicts', per_row_us(lambda: diagnose_students(records, risk_levels), len(df))),
+    ]
+
+    print(f"{len(df)} students, per-student loop {baseline:.2f} us/row")
+    print(f"{'input':<20}{'batch us/row':>14}{'speedup':>10}")
+    for name, batch_us in results:
+        print(f"{name:<20}{batch_us:>14.2f}{baseline / batch_us:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
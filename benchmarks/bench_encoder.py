@@ -0,0 +1,55 @@
+"""Micro-benchmark: pandas preprocess_input vs the compiled FeatureEncoder.
+
+Run from the repository root:
+    python benchmarks/bench_encoder.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api import FEATURE_ENCODER, preprocess_input
+
+
+def load_students(limit):
+    df = pd.read_csv(os.path.join('data', 'student-por.csv'), sep=';').drop(columns=['G1', 'G2', 'G3'])
+    df['subject'] = 'portuguese'
+    return df.head(limit).to_dict('records')
+
+
+def per_row_us(fn, rows, repeat=3):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(number=number, repeat=repeat))
+    return best / number / len(rows) * 1e6
+
+
+def main():
+    students = load_students(1000)
+    single = students[0]
+
+    assert np.array_equal(
+        FEATURE_ENCODER.transform(students),
+        preprocess_input(pd.DataFrame(students)).to_numpy(dtype=np.float32)
+    ), "Encoder output diverged from preprocess_input"
+
+    results = [
+        ("single row",
+         per_row_us(lambda: preprocess_input(pd.DataFrame([single])), [single]),
+         per_row_us(lambda: FEATURE_ENCODER.transform_one(single), [single])),
+        (f"block of {len(students)}",
+         per_row_us(lambda: preprocess_input(pd.DataFrame(students)), students),
+         per_row_us(lambda: FEATURE_ENCODER.transform(students), students)),
+    ]
+
+    print(f"{'case':<16}{'pandas us/row':>16}{'encoder us/row':>18}{'speedup':>10}")
+    for name, pandas_us, encoder_us in results:
+        print(f"{name:<16}{pandas_us:>16.2f}{encoder_us:>18.2f}{pandas_us / encoder_us:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""Load test for /predict and /predict/batch, fully offline.
+
+Groq is replaced by a local stub with configurable latency. Requests are
+driven at a fixed concurrency through the Flask test client (in-process)
+and/or a real gunicorn server. The report gives p50/p95/p99 latency,
+throughput and the time spent in each pipeline stage, and is saved as JSON
+so runs can be compared.
+
+Run from the repository root:
+    python benchmarks/bench_predict.py
+    python benchmarks/bench_predict.py --target gunicorn --concurrency 16 --groq-latency-ms 800
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from harness import STAGES, StageRecorder, install_stub, instrument_api, merge_snapshots
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['client', 'gunicorn', 'all'], default='client')
+    parser.add_argument('--endpoint', choices=['predict', 'batch', 'all'], default='all')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10, help='unmeasured requests sent first')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=50, help='students per /predict/batch request')
+    parser.add_argument('--groq-latency-ms', type=float, default=300.0)
+    parser.add_argument('--groq-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--cache', action='store_true', help='keep the coaching cache on (off by default)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--output', default=None, help='JSON report path (default benchmarks/results/)')
+    return parser.parse_args()
+
+
+def load_payloads():
+    frames = []
+    for subject, name in [('math', 'student-mat.csv'), ('portuguese', 'student-por.csv')]:
+        df = pd.read_csv(os.path.join(ROOT_DIR, 'data', name), sep=';').drop(columns=['G1', 'G2', 'G3'])
+        df['subject'] = subject
+        frames.append(df)
+    students = pd.concat(frames, ignore_index=True).to_dict('records')
+    goals = ['Pass the final exam', 'Improve overall academic performance']
+    return [
+        {'student_data': student, 'goal': {'priority': 'high', 'target_grade': goals[i % len(goals)]}}
+        for i, student in enumerate(students)
+    ]
+
+
+def run_load(send, payloads, total, concurrency):
+    """Send ``total`` requests from ``concurrency`` threads; return latencies and errors."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        local = []
+        local_errors = 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            started = time.perf_counter()
+            try:
+                ok = send(payloads[i % len(payloads)])
+            except Exception:
+                ok = False
+            local.append(time.perf_counter() - started)
+            local_errors += 0 if ok else 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(target, endpoint, latencies, errors, wall, concurrency, rows_per_request, stages=None, requests_seen=None):
+    latency_ms = np.asarray(latencies) * 1000.0
+    result = {
+        'target': target,
+        'endpoint': endpoint,
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'rows_per_request': rows_per_request,
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'throughput_rows_per_s': round(len(latencies) * rows_per_request / wall, 2),
+        'latency_ms': {
+            'mean': round(float(latency_ms.mean()), 3),
+            'p50': round(float(np.percentile(latency_ms, 50)), 3),
+            'p95': round(float(np.percentile(latency_ms, 95)), 3),
+            'p99': round(float(np.percentile(latency_ms, 99)), 3),
+            'max': round(float(latency_ms.max()), 3),
+        },
+    }
+    if stages is not None:
+        seen = requests_seen or len(latencies)
+        request_ms = float(latency_ms.mean())
+        result['stages'] = {
+            stage: {
+                'ms_per_request': round(stages['totals'][stage] * 1000.0 / seen, 4),
+                'share': round(stages['totals'][stage] * 1000.0 / seen / request_ms, 4) if request_ms else 0.0,
+                'calls': stages['calls'][stage],
+            }
+            for stage in STAGES
+        }
+    return result
+
+
+def scenarios(args, payloads):
+    if args.endpoint in ('predict', 'all'):
+        yield 'predict', '/predict', lambda i: payloads[i % len(payloads)], 1
+    if args.endpoint in ('batch', 'all'):
+        size = args.batch_size
+        batches = [payloads[i:i + size] for i in range(0, len(payloads) - size + 1, size)]
+        yield 'batch', '/predict/batch', lambda i: batches[i % len(batches)], size
+
+
+def bench_client(args, payloads):
+    import ai_coach
+    import api
+    import diagnosis
+
+    api.load_model()
+    install_stub(ai_coach, args.groq_latency_ms, args.groq_jitter_ms)
+    recorder = StageRecorder()
+    instrument_api(api, diagnosis, recorder)
+    local = threading.local()
+
+    results = []
+    for name, path, pick, rows in scenarios(args, payloads):
+        bodies = [pick(i) for i in range(max(args.requests, args.warmup))]
+
+        def send(body):
+            if not hasattr(local, 'client'):
+                local.client = api.app.test_client()
+            return local.client.post(path, json=body).status_code == 200
+
+        run_load(send, bodies, args.warmup, args.concurrency)
+        recorder.reset()
+        latencies, errors, wall = run_load(send, bodies, args.requests, args.concurrency)
+        results.append(summarize('client', name, latencies, errors, wall, args.concurrency, rows, recorder.snapshot()))
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bench_gunicorn(args, payloads):
+    import requests
+
+    results = []
+    for name, path, pick, rows in scenarios(args, payloads):
+        port = _free_port()
+        stage_dir = tempfile.mkdtemp(prefix='bench-stages-')
+        env = dict(
+            os.environ,
+            BENCH_GROQ_LATENCY_MS=str(args.groq_latency_ms),
+            BENCH_GROQ_JITTER_MS=str(args.groq_jitter_ms),
+            BENCH_STAGE_DIR=stage_dir,
+            GROQ_API_KEY='benchmark-stub',
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BENCH_DIR, 'gunicorn_bench.conf.py'),
+             '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), '--threads', str(args.threads),
+             '--worker-class', 'gthread', '--log-level', 'warning', 'wsgi:app'],
+            cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            base = f'http://127.0.0.1:{port}'
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if requests.get(f'{base}/health', timeout=1).status_code == 200:
+                        break
+                except requests.RequestException:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+
+            bodies = [pick(i) for i in range(max(args.requests, args.warmup))]
+            local = threading.local()
+
+            def send(body):
+                if not hasattr(local, 'session'):
+                    local.session = requests.Session()
+                return local.session.post(f'{base}{path}', json=body, timeout=60).status_code == 200
+
+            run_load(send, bodies, args.warmup, args.concurrency)
+            latencies, errors, wall = run_load(send, bodies, args.requests, args.concurrency)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+        snapshots = []
+        for file_name in os.listdir(stage_dir):
+            with open(os.path.join(stage_dir, file_name)) as f:
+                snapshots.append(json.load(f))
+        stages = merge_snapshots(snapshots) if snapshots else None
+        results.append(summarize(
+            f'gunicorn[{args.workers}x{args.threads}]', name, latencies, errors, wall, args.concurrency, rows,
+            stages, requests_seen=args.requests + args.warmup
+        ))
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(results):
+    print(f"{'target':<20}{'endpoint':<10}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        lat = r['latency_ms']
+        print(f"{r['target']:<20}{r['endpoint']:<10}{r['throughput_rps']:>9.1f}"
+              f"{lat['p50']:>10.2f}{lat['p95']:>10.2f}{lat['p99']:>10.2f}{r['errors']:>8}")
+        for stage, split in (r.get('stages') or {}).items():
+            if split['calls']:
+                print(f"    {stage:<24}{split['ms_per_request']:>10.3f} ms{split['share'] * 100:>8.1f}%")
+
+
+def main():
+    args = parse_args()
+    if not args.cache:
+        os.environ['COACHING_CACHE_BACKEND'] = 'off'
+    os.environ.setdefault('COACHING_MODE', 'sync')
+    os.chdir(ROOT_DIR)
+
+    payloads = load_payloads()
+    results = []
+    if args.target in ('client', 'all'):
+        results.extend(bench_client(args, payloads))
+    if args.target in ('gunicorn', 'all'):
+        results.extend(bench_gunicorn(args, payloads))
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': vars(args),
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"predict-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_report(results)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Cold-start timings for the API.
+
+Imports the API in fresh interpreters and reports the import time, the
+warm_up() stages, and the modules that dominate `python -X importtime`.
+With --gunicorn it also starts gunicorn.conf.py and reports the time until
+/health/ready first answers 200.
+
+Run from the repository root:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --gunicorn
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, 'src')
+import api
+imported = time.perf_counter()
+api.warm_up()
+print(json.dumps({
+    'process_import_ms': (imported - started) * 1000,
+    'warm_up_ms': api.STARTUP['warm_up_ms'],
+    'stages': api.STARTUP['stages'],
+    'heavy_modules': [m for m in ('pandas', 'sklearn', 'joblib', 'scipy', 'groq') if m in sys.modules],
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time')
+    parser.add_argument('--top', type=int, default=15, help='modules to list from -X importtime')
+    parser.add_argument('--gunicorn', action='store_true', help='also time gunicorn until /health/ready')
+    parser.add_argument('--output', default=None, help='JSON report path (default benchmarks/results/)')
+    return parser.parse_args()
+
+
+def probe(env):
+    out = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+                         check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def import_profile(env, top):
+    """(cumulative ms, module) for the slowest top-level imports of the API."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', "import sys; sys.path.insert(0, 'src'); import api"],
+                         cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only modules imported directly by the API or its own modules (depth <= 2).
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative) / 1000.0, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(env):
+    import requests
+
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT_DIR, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--workers', '1', '--log-level', 'warning', 'wsgi:app'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                if requests.get(f'http://127.0.0.1:{port}/health/ready', timeout=1).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except requests.RequestException:
+                pass
+            if server.poll() is not None or time.perf_counter() - started > 120:
+                raise RuntimeError('gunicorn did not become ready')
+            time.sleep(0.01)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    args = parse_args()
+    env = dict(os.environ, COACHING_CACHE_BACKEND=os.environ.get('COACHING_CACHE_BACKEND', 'off'))
+
+    runs = [probe(env) for _ in range(args.runs)]
+    imports = np.array([r['process_import_ms'] for r in runs])
+    warm_ups = np.array([r['warm_up_ms'] for r in runs])
+    stages = {name: round(float(np.median([r['stages'][name] for r in runs])), 3) for name in runs[0]['stages']}
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'runs': args.runs,
+        'import_ms': {'median': round(float(np.median(imports)), 3), 'max': round(float(imports.max()), 3)},
+        'warm_up_ms': {'median': round(float(np.median(warm_ups)), 3), 'max': round(float(warm_ups.max()), 3)},
+        'warm_up_stages_ms': stages,
+        'heavy_modules_loaded': runs[-1]['heavy_modules'],
+        'slowest_imports': [{'module': name, 'cumulative_ms': round(ms, 3)} for ms, name in import_profile(env, args.top)],
+    }
+    if args.gunicorn:
+        report['gunicorn_time_to_ready_ms'] = round(time_to_ready(env), 3)
+
+    print(f"import api:   {report['import_ms']['median']:.1f} ms (median of {args.runs})")
+    print(f"warm_up():    {report['warm_up_ms']['median']:.1f} ms  {stages}")
+    print(f"heavy modules loaded: {', '.join(report['heavy_modules_loaded']) or 'none'}")
+    if args.gunicorn:
+        print(f"gunicorn until /health/ready: {report['gunicorn_time_to_ready_ms']:.1f} ms")
+    print('\nslowest imports (cumulative):')
+    for row in report['slowest_imports']:
+        print(f"  {row['cumulative_ms']:>9.1f} ms  {row['module']}")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"cold-start-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""gunicorn config used by bench_predict.py.
+
+Each worker swaps Groq for the offline stub and times the /predict stages.
+The stage totals are written to BENCH_STAGE_DIR when the worker exits.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import StageRecorder, install_stub, instrument_api
+
+recorder = None
+
+
+def post_worker_init(worker):
+    global recorder
+    import ai_coach
+    import diagnosis
+
+    install_stub(
+        ai_coach,
+        float(os.environ.get("BENCH_GROQ_LATENCY_MS", 300)),
+        float(os.environ.get("BENCH_GROQ_JITTER_MS", 0)),
+    )
+    recorder = StageRecorder()
+    instrument_api(sys.modules["src.api"], diagnosis, recorder)
+
+
+def worker_exit(server, worker):
+    out_dir = os.environ.get("BENCH_STAGE_DIR")
+    if recorder is None or not out_dir:
+        return
+    with open(os.path.join(out_dir, f"stages-{os.getpid()}.json"), "w") as f:
+        json.dump(recorder.snapshot(), f)
@@ -0,0 +1,130 @@
+"""Shared pieces for the API benchmarks: a Groq stand-in and per-stage timers.
+
+Nothing here touches the network, so the benchmarks run fully offline.
+"""
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+STUB_COACHING = {
+    "learning_diagnosis": "Attendance and revision habits are the main levers for this student.",
+    "weekly_goals": [
+        {"week_label": f"Week {n}", "focus": "revision", "goal": "Close one gap", "tasks": ["Revise", "Quiz"],
+         "success_criteria": "Quiz score improves", "linked_weaknesses": [], "linked_strengths": []}
+        for n in range(1, 5)
+    ],
+    "quiz_questions": [
+        {"question": f"Practice question {n}", "type": "short-answer", "difficulty": "intermediate",
+         "topic": "math", "choices": [], "answer": "42", "explanation": "Worked example."}
+        for n in range(1, 5)
+    ],
+    "study_plan": {
+        "overview": "Spaced revision",
+        "days": [{"day": day, "focus": "revision", "tasks": ["Review notes"], "duration": "45m"}
+                 for day in ["Mon", "Tue", "Wed", "Thu", "Fri"]],
+    },
+    "resources": [{"name": "Khan Academy", "url": "https://www.khanacademy.org/math", "why": "Practice"}],
+    "next_steps": ["Review notes", "Plan the week", "Practice problems", "Check answers", "Ask a teacher"],
+}
+
+
+class StubGroq:
+    """Answers chat completions like the Groq client after a fixed delay."""
+
+    def __init__(self, latency_ms=300.0, jitter_ms=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self._content = json.dumps(STUB_COACHING)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def _create(self, stream=False, **kwargs):
+        delay = self._delay()
+        if stream:
+            return self._chunks(delay)
+        time.sleep(delay)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self._content))])
+
+    def _chunks(self, delay):
+        pieces = [self._content[i:i + 64] for i in range(0, len(self._content), 64)]
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+def install_stub(ai_coach_module, latency_ms, jitter_ms=0.0):
+    """Point ai_coach at a StubGroq and report the LLM as available."""
+    os.environ["GROQ_API_KEY"] = "benchmark-stub"
+    stub = StubGroq(latency_ms, jitter_ms)
+    ai_coach_module._client = stub
+    return stub
+
+
+STAGES = ["normalize", "validate", "encode", "predict", "diagnose", "coach", "normalize_ai_coaching", "jsonify"]
+
+
+class StageRecorder:
+    """Accumulates wall time per pipeline stage across threads."""
+
+    def __init__(self):
+        self.totals = {stage: 0.0 for stage in STAGES}
+        self.calls = {stage: 0 for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.totals[stage] += elapsed
+                    self.calls[stage] += 1
+        timed.__wrapped__ = fn
+        return timed
+
+    def reset(self):
+        with self._lock:
+            for stage in STAGES:
+                self.totals[stage] = 0.0
+                self.calls[stage] = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {"totals": dict(self.totals), "calls": dict(self.calls)}
+
+
+def instrument_api(api_module, diagnosis_module, recorder):
+    """Wrap each /predict pipeline stage of an already loaded api module."""
+    api_module.normalize_input = recorder.wrap("normalize", api_module.normalize_input)
+    api_module.validate_input = recorder.wrap("validate", api_module.validate_input)
+    # transform_one goes through self.transform, so this covers both paths.
+    encoder = api_module.MODELS.current.encoder
+    encoder.transform = recorder.wrap("encode", encoder.transform)
+    api_module.predict_risk_levels = recorder.wrap("predict", api_module.predict_risk_levels)
+    diagnosis_module.get_student_diagnosis = recorder.wrap("diagnose", diagnosis_module.get_student_diagnosis)
+    diagnosis_module.diagnose_students = recorder.wrap("diagnose", diagnosis_module.diagnose_students)
+    api_module.generate_ai_coaching = recorder.wrap("coach", api_module.generate_ai_coaching)
+    api_module.normalize_ai_coaching = recorder.wrap("normalize_ai_coaching", api_module.normalize_ai_coaching)
+    api_module.jsonify = recorder.wrap("jsonify", api_module.jsonify)
+
+
+def merge_snapshots(snapshots):
+    merged = {"totals": {stage: 0.0 for stage in STAGES}, "calls": {stage: 0 for stage in STAGES}}
+    for snap in snapshots:
+        for stage in STAGES:
+            merged["totals"][stage] += snap["totals"].get(stage, 0.0)
+            merged["calls"][stage] += snap["calls"].get(stage, 0)
+    return merged
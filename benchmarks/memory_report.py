@@ -0,0 +1,199 @@
+"""Resident memory per gunicorn worker, for each way of loading the model.
+
+Builds a 300-tree random forest bundle (the size of the largest candidate in
+the default grid) in a temporary models directory. Then it starts gunicorn
+with gunicorn.conf.py once per scenario, sends a few /predict requests so
+every worker has served traffic, and reads each worker's smaps_rollup:
+
+    rss  resident pages, shared ones counted in full
+    pss  resident pages, shared ones split between the processes sharing them
+    uss  pages private to the worker (what one more worker would cost)
+
+Linux only. Run from the repository root:
+    python benchmarks/memory_report.py
+    python benchmarks/memory_report.py --workers 4 --trees 300 --models-dir models
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+# name -> environment; "before" is the old behaviour of one joblib.load per worker.
+SCENARIOS = [
+    ('pickles, loaded per worker', {'INFERENCE_BACKEND': 'sklearn', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '0'}),
+    ('kernel, loaded per worker', {'INFERENCE_BACKEND': 'kernel', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '0'}),
+    ('kernel, mmap', {'INFERENCE_BACKEND': 'kernel', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '1'}),
+    ('kernel, preload + mmap', {'INFERENCE_BACKEND': 'kernel', 'GUNICORN_PRELOAD': '1', 'MODEL_MMAP': '1'}),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=300, help='trees in the generated forest')
+    parser.add_argument('--models-dir', default=None, help='serve an existing models directory instead')
+    parser.add_argument('--requests', type=int, default=40, help='/predict requests sent before measuring')
+    parser.add_argument('--output', default=None, help='JSON report path (default benchmarks/results/)')
+    return parser.parse_args()
+
+
+def build_forest_bundle(models_dir, trees):
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    from feature_schema import build_feature_schema, save_feature_schema
+    from inference_kernel import export_inference_kernel
+    from preprocessing import scale_features, split_dataset
+
+    X_train, X_test, y_train, _, feature_names, cleaned_df = split_dataset(
+        'data/student-mat.csv', 'data/student-por.csv', task='classification'
+    )
+    X_train, _, scaler = scale_features(X_train, X_test)
+    model = RandomForestClassifier(n_estimators=trees, class_weight='balanced', random_state=42).fit(X_train, y_train)
+
+    model_path = os.path.join(models_dir, 'final_model.pkl')
+    scaler_path = os.path.join(models_dir, 'scaler.pkl')
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    schema = build_feature_schema(
+        cleaned_df.drop(columns=['risk_level']), feature_names, scaler, model, model_path, scaler_path
+    )
+    save_feature_schema(schema, os.path.join(models_dir, 'feature_schema.json'))
+    export_inference_kernel(model, scaler, schema, os.path.join(models_dir, 'inference_kernel.npz'))
+
+
+def smaps(pid):
+    """Memory of one process in KiB, from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_kib': fields['Rss'],
+        'pss_kib': fields['Pss'],
+        'uss_kib': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def children(pid):
+    found = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            found.extend(int(child) for child in f.read().split())
+    return found
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure(name, scenario_env, models_dir, args):
+    import requests
+
+    port = _free_port()
+    env = dict(os.environ, MODELS_DIR=models_dir, GROQ_API_KEY='', COACHING_CACHE_BACKEND='off', **scenario_env)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT_DIR, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), '--log-level', 'warning', 'wsgi:app'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                if requests.get(f'{base}/health', timeout=1).status_code == 200 and \
+                        len(children(server.pid)) == args.workers:
+                    break
+            except requests.RequestException:
+                pass
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f'gunicorn did not start for {name}')
+            time.sleep(0.5)
+
+        body = {'student_data': {'studytime': 2, 'failures': 1, 'absences': 6},
+                'goal': {'priority': 'high', 'target_grade': 'Pass the final exam'}}
+        for _ in range(args.requests):
+            if requests.post(f'{base}/predict', json=body, timeout=30).status_code != 200:
+                raise RuntimeError(f'/predict failed for {name}')
+        time.sleep(0.5)
+
+        workers = [smaps(pid) for pid in children(server.pid)]
+        master = smaps(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    def mean(key):
+        return round(sum(w[key] for w in workers) / len(workers))
+
+    return {
+        'scenario': name,
+        'env': scenario_env,
+        'workers': workers,
+        'master': master,
+        'per_worker_kib': {key: mean(key) for key in ('rss_kib', 'pss_kib', 'uss_kib')},
+        'total_pss_kib': sum(w['pss_kib'] for w in workers) + master['pss_kib'],
+    }
+
+
+def main():
+    args = parse_args()
+    os.chdir(ROOT_DIR)
+
+    tmp_dir = None
+    models_dir = args.models_dir
+    if models_dir is None:
+        tmp_dir = tempfile.mkdtemp(prefix='memory-report-')
+        models_dir = tmp_dir
+        print(f'Building a {args.trees}-tree forest bundle in {models_dir} ...')
+        build_forest_bundle(models_dir, args.trees)
+    model_mib = os.path.getsize(os.path.join(models_dir, 'final_model.pkl')) / 2 ** 20
+    kernel_mib = os.path.getsize(os.path.join(models_dir, 'inference_kernel.npz')) / 2 ** 20
+
+    try:
+        results = [measure(name, env, models_dir, args) for name, env in SCENARIOS]
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f'\nmodel pickle {model_mib:.1f} MiB, inference kernel {kernel_mib:.1f} MiB, {args.workers} workers')
+    print(f"{'scenario':<30}{'RSS/worker':>12}{'PSS/worker':>12}{'USS/worker':>12}{'total PSS':>12}   (MiB)")
+    for r in results:
+        per = r['per_worker_kib']
+        print(f"{r['scenario']:<30}{per['rss_kib'] / 1024:>12.1f}{per['pss_kib'] / 1024:>12.1f}"
+              f"{per['uss_kib'] / 1024:>12.1f}{r['total_pss_kib'] / 1024:>12.1f}")
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'config': vars(args),
+        'model_pickle_mib': round(model_mib, 2),
+        'kernel_mib': round(kernel_mib, 2),
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"memory-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nResults saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""gunicorn settings for the API (used by render.yaml: gunicorn -c gunicorn.conf.py wsgi:app).
+
+With preload_app the master imports wsgi.py, and so loads the model, once
+before forking. Workers then start with the model already in memory and
+share those pages copy-on-write instead of each unpickling its own copy. The
+inference kernel and coaching fallback table are memory-mapped, so their
+pages stay shared through the page cache for as long as the workers live.
+
+Set GUNICORN_PRELOAD=0 to load the app in every worker instead.
+
+gunicorn takes its worker count from WEB_CONCURRENCY; with more than one
+worker, coaching jobs default to the sqlite store so every worker sees them.
+
+Each worker finishes warming up (e.g. builds its own Groq client) before it
+accepts connections; /health/ready reports when that is done. Each worker
+then watches MODELS_DIR and swaps in a new model without a restart (see
+MODEL_RELOAD_INTERVAL).
+"""
+import gc
+import os
+import sys
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach, so a worker's
+    # GC passes do not write to (and so un-share) the preloaded objects.
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    api = sys.modules.get("src.api")
+    if api is not None:
+        api.warm_up()
+        api.start_model_watcher()
@@ -1,36 +1,19 @@
 import os
+import copy
 import json
 import hashlib
-from typing import Optional, List, Dict
-
-def _load_registry() -> Dict:
-    registry_path = os.path.join('data', 'resources.json')
-    try:
-        if os.path.exists(registry_path):
-            with open(registry_path, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"AI_COACH: Error loading registry: {e}")
-    return {"categories": {}}
-
-REGISTRY = _load_registry()
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Iterator, Optional, List, Dict, Tuple
+from coaching_cache import cache_from_env
+from coaching_fallbacks import FallbackTable
+from coaching_stream import JsonSectionParser
+from quiz_bank import get_quiz_bank
+from resource_registry import get_registry
 
 def _get_curated_resources(subject: str, weaknesses: list) -> list:
-    pool = []
-    cats = REGISTRY.get("categories", {})
-    found_any = False
-    for w in weaknesses:
-        w_l = w.lower()
-        if "absent" in w_l: pool.extend(cats.get("absences", [])); found_any = True
-        if "study" in w_l: pool.extend(cats.get("studytime", [])); found_any = True
-        if "failure" in w_l: pool.extend(cats.get("failures", [])); found_any = True
-    pool.extend(cats.get(subject.lower(), []))
-    if not found_any: pool.extend(cats.get("advanced", []))
-    unique = {}
-    for item in pool:
-        if item['url'] not in unique or item.get('priority', 0) > unique[item['url']].get('priority', 0):
-            unique[item['url']] = item
-    return sorted(unique.values(), key=lambda x: x.get('priority', 0), reverse=True)[:4]
+    return get_registry().top(subject, weaknesses)
 
 def _infer_goal_horizon(goal: str) -> str:
     goal_text = (goal or "").lower()
@@ -135,267 +118,8 @@ def _quiz_topic_for(student_data: dict, diagnosis: dict) -> str:
     return subject
 
 def _build_quiz_generation(student_data: dict, diagnosis: dict, risk_level: str) -> list:
-    topic = _quiz_topic_for(student_data, diagnosis)
-    question_count = 3 if risk_level == "At-risk" else 5 if risk_level == "High-performing" else 4
-
-    quiz_templates = {
-        "math": {
-            "At-risk": [
-                {
-                    "question": "What is 6 + 4?",
-                    "type": "multiple-choice",
-                    "choices": ["8", "9", "10", "12"],
-                    "answer": "10",
-                    "explanation": "This checks basic arithmetic accuracy before moving to harder work."
-                },
-                {
-                    "question": "Solve: 12 - 5 = ?",
-                    "type": "short-answer",
-                    "answer": "7",
-                    "explanation": "Basic subtraction builds confidence for more complex operations."
-                },
-                {
-                    "question": "Which is larger: 3/4 or 1/2?",
-                    "type": "multiple-choice",
-                    "choices": ["1/2", "3/4", "They are equal", "Cannot tell"],
-                    "answer": "3/4",
-                    "explanation": "Comparing simple fractions helps verify foundational number sense."
-                },
-            ],
-            "Average": [
-                {
-                    "question": "Solve: 3x + 5 = 14. What is x?",
-                    "type": "short-answer",
-                    "answer": "3",
-                    "explanation": "This checks linear equation solving with one step of reasoning."
-                },
-                {
-                    "question": "What is the next number in the pattern 2, 4, 8, 16, ?",
-                    "type": "short-answer",
-                    "answer": "32",
-                    "explanation": "Recognizing patterns supports faster problem solving."
-                },
-                {
-                    "question": "A rectangle has length 6 and width 3. What is its area?",
-                    "type": "multiple-choice",
-                    "choices": ["9", "18", "24", "36"],
-                    "answer": "18",
-                    "explanation": "Area problems connect formulas to practical calculation."
-                },
-                {
-                    "question": "If a class starts at 8:30 and lasts 45 minutes, when does it end?",
-                    "type": "short-answer",
-                    "answer": "9:15",
-                    "explanation": "Time calculations strengthen applied arithmetic and attention to detail."
-                },
-            ],
-            "High-performing": [
-                {
-                    "question": "Factor the expression x² - 9.",
-                    "type": "short-answer",
-                    "answer": "(x - 3)(x + 3)",
-                    "explanation": "This checks algebraic structure and symbolic fluency."
-                },
-                {
-                    "question": "If f(x) = 2x + 1, what is f(4)?",
-                    "type": "short-answer",
-                    "answer": "9",
-                    "explanation": "Function evaluation is a core readiness skill for advanced study."
-                },
-                {
-                    "question": "A student scores 12, 15, and 18 on three tests. What is the average score?",
-                    "type": "short-answer",
-                    "answer": "15",
-                    "explanation": "Averages and data reasoning support higher-level quantitative work."
-                },
-                {
-                    "question": "Explain why the sum of two odd numbers is always even.",
-                    "type": "open-response",
-                    "answer": "Odd numbers can be written as 2n + 1 and 2m + 1; their sum is 2(n + m + 1), which is even.",
-                    "explanation": "This moves beyond computation into proof-style reasoning."
-                },
-                {
-                    "question": "Find the slope of the line through (2, 3) and (6, 11).",
-                    "type": "short-answer",
-                    "answer": "2",
-                    "explanation": "Slope questions test algebraic fluency and problem decomposition."
-                },
-            ],
-        },
-        "language": {
-            "At-risk": [
-                {
-                    "question": "Choose the correct sentence: 'She ___ to school every day.'",
-                    "type": "multiple-choice",
-                    "choices": ["go", "goes", "going", "gone"],
-                    "answer": "goes",
-                    "explanation": "This checks basic grammar agreement with a simple sentence."
-                },
-                {
-                    "question": "What is the main idea of a short paragraph?",
-                    "type": "multiple-choice",
-                    "choices": ["The longest sentence", "The most important point", "A random detail", "The title only"],
-                    "answer": "The most important point",
-                    "explanation": "Identifying the main idea builds reading comprehension."
-                },
-                {
-                    "question": "Rewrite the word 'quickly' in a sentence using a different adverb meaning.",
-                    "type": "open-response",
-                    "answer": "Possible answers include 'fast' or 'rapidly', depending on the sentence.",
-                    "explanation": "Vocabulary substitution helps students practice language precision."
-                },
-            ],
-            "Average": [
-                {
-                    "question": "Which sentence is punctuated correctly?",
-                    "type": "multiple-choice",
-                    "choices": ["Lets eat grandma.", "Let's eat, grandma.", "Lets eat, grandma.", "Let's eat grandma"],
-                    "answer": "Let's eat, grandma.",
-                    "explanation": "Punctuation changes meaning and is important for clear writing."
-                },
-                {
-                    "question": "Identify the verb in the sentence: 'The students finished their work quietly.'",
-                    "type": "short-answer",
-                    "answer": "finished",
-                    "explanation": "Parts of speech help with sentence analysis and writing accuracy."
-                },
-                {
-                    "question": "What is one inference you can make from a character who studies late every night?",
-                    "type": "open-response",
-                    "answer": "The character is likely hardworking or preparing carefully.",
-                    "explanation": "Inference questions measure deeper reading comprehension."
-                },
-                {
-                    "question": "Choose the best summary of a passage about school routines.",
-                    "type": "multiple-choice",
-                    "choices": ["A list of every detail", "The central idea in fewer words", "The longest sentence", "A random opinion"],
-                    "answer": "The central idea in fewer words",
-                    "explanation": "Summarizing tests comprehension and synthesis."
-                },
-            ],
-            "High-performing": [
-                {
-                    "question": "Analyze how tone shifts in a persuasive paragraph when the writer moves from calm facts to urgent language.",
-                    "type": "open-response",
-                    "answer": "The tone becomes more forceful and persuasive, increasing emotional pressure on the reader.",
-                    "explanation": "This pushes analytical reading beyond surface-level comprehension."
-                },
-                {
-                    "question": "Which revision best improves the clarity of this sentence: 'The reason was because the team was late.'",
-                    "type": "multiple-choice",
-                    "choices": ["The reason was because the team was late.", "The team was late.", "Because the reason was late.", "The lateness was the reason because."],
-                    "answer": "The team was late.",
-                    "explanation": "Revision skills matter for high-level writing precision."
-                },
-                {
-                    "question": "Compare two characters who respond differently to the same challenge.",
-                    "type": "open-response",
-                    "answer": "A strong response names a similarity and a difference using evidence from the text.",
-                    "explanation": "Comparison questions require evidence-based analysis."
-                },
-                {
-                    "question": "Identify the rhetorical strategy used when a writer repeats a phrase for emphasis.",
-                    "type": "short-answer",
-                    "answer": "Repetition or anaphora",
-                    "explanation": "Rhetorical awareness supports advanced reading and writing performance."
-                },
-                {
-                    "question": "Write a one-sentence thesis for an essay arguing that school routines improve achievement.",
-                    "type": "open-response",
-                    "answer": "A strong thesis clearly states a claim and gives a direction for the essay.",
-                    "explanation": "Thesis writing tests structured argumentation and synthesis."
-                },
-            ],
-        },
-        "study habits": {
-            "At-risk": [
-                {
-                    "question": "Which action best helps you start a study session?",
-                    "type": "multiple-choice",
-                    "choices": ["Open 10 tabs", "Set a 25-minute timer", "Check messages first", "Skip the first 10 minutes"],
-                    "answer": "Set a 25-minute timer",
-                    "explanation": "Basic routine design supports students who need stability."
-                },
-                {
-                    "question": "What should you do first when you miss a class?",
-                    "type": "short-answer",
-                    "answer": "Get the notes and identify the missed topic.",
-                    "explanation": "This keeps catch-up tasks specific and manageable."
-                },
-                {
-                    "question": "Name one way to reduce distractions while studying.",
-                    "type": "open-response",
-                    "answer": "Examples include silencing the phone, moving to a quiet place, or removing notifications.",
-                    "explanation": "Simple habits help rebuild consistency." 
-                },
-            ],
-            "Average": [
-                {
-                    "question": "What is the purpose of active recall?",
-                    "type": "short-answer",
-                    "answer": "To test memory by retrieving information without looking.",
-                    "explanation": "Active recall improves retention more than passive rereading."
-                },
-                {
-                    "question": "Why is spaced repetition useful?",
-                    "type": "open-response",
-                    "answer": "It helps move knowledge into long-term memory through repeated review at intervals.",
-                    "explanation": "This supports steady improvement over time."
-                },
-                {
-                    "question": "Which study plan is most balanced: 2 hours once a week or 20 minutes daily?",
-                    "type": "multiple-choice",
-                    "choices": ["2 hours once a week", "20 minutes daily", "Neither", "Only before exams"],
-                    "answer": "20 minutes daily",
-                    "explanation": "Daily consistency is easier to sustain and more effective."
-                },
-                {
-                    "question": "What should you review after a practice quiz?",
-                    "type": "short-answer",
-                    "answer": "The mistakes and the reason for each mistake.",
-                    "explanation": "Error analysis turns practice into learning."
-                },
-            ],
-            "High-performing": [
-                {
-                    "question": "Design a 3-step review loop for a hard topic.",
-                    "type": "open-response",
-                    "answer": "A strong answer includes learn, test, and refine or similar structured steps.",
-                    "explanation": "Advanced students should build efficient self-monitoring systems."
-                },
-                {
-                    "question": "Which strategy best prevents overconfidence before an exam?",
-                    "type": "multiple-choice",
-                    "choices": ["Skip practice tests", "Use timed mixed review", "Only read summaries", "Study only easy topics"],
-                    "answer": "Use timed mixed review",
-                    "explanation": "High-performing students still need challenge and calibration."
-                },
-                {
-                    "question": "Why is teaching a concept to someone else a strong learning strategy?",
-                    "type": "short-answer",
-                    "answer": "It reveals gaps and strengthens understanding through explanation.",
-                    "explanation": "Teaching forces deeper processing and mastery."
-                },
-                {
-                    "question": "What is one indicator that your study routine is becoming too easy?",
-                    "type": "open-response",
-                    "answer": "Examples include no mistakes, no challenge, or no growth over time.",
-                    "explanation": "Advanced study should continue to stretch the student."
-                },
-                {
-                    "question": "Which metric is most useful for tracking improvement in a tough subject?",
-                    "type": "multiple-choice",
-                    "choices": ["Time spent only", "Number of correct answers and error types", "Color of notes", "How long the textbook is"],
-                    "answer": "Number of correct answers and error types",
-                    "explanation": "Better tracking creates better feedback loops for advanced learners."
-                },
-            ],
-        },
-    }
-
-    topic_pool = quiz_templates.get(topic, quiz_templates["study habits"])
-    selected_pool = topic_pool.get(risk_level, topic_pool["Average"])
-    return selected_pool[:question_count]
+    """Quiz items from data/quiz_bank.json, already stamped with difficulty and topic; the caller owns the copies."""
+    return get_quiz_bank().questions(_quiz_topic_for(student_data, diagnosis), risk_level)
 
 def _audit_and_repair(raw_json: Dict, curated_res: List[Dict]) -> Dict:
     # Backward compatibility: accept legacy quiz_generation and normalize to quiz_questions.
@@ -406,39 +130,103 @@ def _audit_and_repair(raw_json: Dict, curated_res: List[Dict]) -> Dict:
     for k in required:
         if k not in raw_json:
             return None
-    curated_urls = {r['url'] for r in curated_res}
-    clean_res = [r for r in raw_json['resources'] if r.get('url') in curated_urls]
-    if not clean_res:
-        raw_json['resources'] = curated_res[:4]
-    else:
-        raw_json['resources'] = clean_res
-    steps = raw_json['next_steps']
-    if not isinstance(steps, list): steps = []
-    default_steps = [
-        "Review today's learning outcomes in your study journal.",
-        "Set your goals for tomorrow to stay organized.",
-        "Complete a 25-minute focused study block tonight.",
-        "Organize your study space for maximum productivity.",
-        "Tell someone what you learned today to boost retention."
-    ]
-    if len(steps) < 5: steps.extend(default_steps[:(5 - len(steps))])
-    raw_json['next_steps'] = steps[:5]
+    raw_json['resources'] = _repair_section("resources", raw_json['resources'], curated_res)
+    raw_json['next_steps'] = _repair_section("next_steps", raw_json['next_steps'], curated_res)
     return raw_json
 
+DEFAULT_NEXT_STEPS = [
+    "Review today's learning outcomes in your study journal.",
+    "Set your goals for tomorrow to stay organized.",
+    "Complete a 25-minute focused study block tonight.",
+    "Organize your study space for maximum productivity.",
+    "Tell someone what you learned today to boost retention."
+]
+
+def _repair_section(name: str, value, curated_res: List[Dict]):
+    """Repair one coaching section on its own, as soon as it has been received."""
+    if name == "resources":
+        curated_urls = {r['url'] for r in curated_res}
+        clean_res = [r for r in value if isinstance(r, dict) and r.get('url') in curated_urls] if isinstance(value, list) else []
+        return clean_res or curated_res[:4]
+    if name == "next_steps":
+        steps = list(value) if isinstance(value, list) else []
+        if len(steps) < 5: steps.extend(DEFAULT_NEXT_STEPS[:(5 - len(steps))])
+        return steps[:5]
+    return value
+
 _client = None
+_client_pid = None
 GROQ_MODEL = os.environ.get("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_TEMPERATURE = 0.4
+# Hard cap on a single upstream call, even when it finishes in the background.
+GROQ_REQUEST_TIMEOUT = float(os.environ.get("GROQ_REQUEST_TIMEOUT", 30))
+GROQ_MAX_CONCURRENCY = int(os.environ.get("GROQ_MAX_CONCURRENCY", 8))
+# Budgeted calls running or queued at once; past this a request gets the rule-based plan.
+GROQ_MAX_PENDING = int(os.environ.get("GROQ_MAX_PENDING", 4 * GROQ_MAX_CONCURRENCY))
+COACHING_CACHE = cache_from_env()
+FALLBACK_TABLE_PATH = os.environ.get("COACHING_FALLBACKS_PATH", os.path.join("models", "coaching_fallbacks.bin"))
+
+_llm_executor = None
+_llm_executor_lock = threading.Lock()
+# Budgeted calls in flight by coaching cache key, so identical requests share one call.
+_llm_inflight: Dict[str, "Future"] = {}
+_llm_inflight_lock = threading.Lock()
+_llm_slots = threading.BoundedSemaphore(GROQ_MAX_PENDING)
+_stats_lock = threading.Lock()
+# Sections the LLM must produce itself; the rest can be rebuilt from rules.
+LLM_REQUIRED_SECTIONS = ("learning_diagnosis", "study_plan", "resources", "next_steps")
+# Order in which streamed coaching sections are delivered.
+STREAM_SECTIONS = (
+    "learning_diagnosis", "weekly_goals", "milestone_goals", "quiz_questions",
+    "study_plan", "resources", "next_steps"
+)
+COACHING_STATS = {
+    "llm_calls": 0, "llm_errors": 0, "budget_exceeded": 0, "late_cached": 0, "fallbacks": 0,
+    "llm_shared": 0, "llm_rejected": 0,
+    "fallback_precomputed": 0, "fallback_built": 0
+}
+
+def _bump(counter: str) -> None:
+    with _stats_lock:
+        COACHING_STATS[counter] += 1
+
+def get_coaching_stats() -> Dict:
+    with _stats_lock:
+        return dict(COACHING_STATS)
+
+def _get_llm_executor() -> ThreadPoolExecutor:
+    global _llm_executor
+    if _llm_executor is None:
+        with _llm_executor_lock:
+            if _llm_executor is None:
+                _llm_executor = ThreadPoolExecutor(max_workers=GROQ_MAX_CONCURRENCY, thread_name_prefix="groq")
+    return _llm_executor
 
 def _get_client():
-    global _client
-    if _client is not None: return _client
+    global _client, _client_pid
+    # A client built before a fork (gunicorn preload_app) is rebuilt in the worker.
+    if _client is not None and _client_pid in (None, os.getpid()): return _client
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key or api_key == "your_groq_api_key_here": return None
     try:
         from groq import Groq
         _client = Groq(api_key=api_key)
+        _client_pid = os.getpid()
         return _client
     except Exception: return None
 
+def warm_up() -> Dict[str, float]:
+    """Load the registry, quiz bank, fallback table and Groq client ahead of the first request.
+
+    Returns the milliseconds spent on each step.
+    """
+    timings = {}
+    for name, step in (("registry", get_registry), ("quiz_bank", get_quiz_bank), ("fallback_table", _get_fallback_table), ("groq_client", _get_client)):
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 3)
+    return timings
+
 SYSTEM_PROMPT = """You are LearnScope.ai expert academic coach. 
 Output ONLY valid JSON. 100% compliance with 'APPROVED_CONTEXT_RESOURCES' is mandatory.
 JSON STRUCTURE:
@@ -455,26 +243,51 @@ JSON STRUCTURE:
 }
 RULES: 5 next_steps. No fabricated URLs."""
 
-def _generate_fallback(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str, curated: list) -> dict:
+def _coaching_cache_key(goal: str, weaknesses: list, curated: list) -> str:
+    """Stable fingerprint of everything the LLM prompt depends on."""
+    fingerprint = {
+        "model": GROQ_MODEL,
+        "temperature": GROQ_TEMPERATURE,
+        "system_prompt": hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest(),
+        "goal": goal,
+        "weaknesses": list(weaknesses),
+        "resources": [[r.get("name"), r.get("url")] for r in curated],
+    }
+    canonical = json.dumps(fingerprint, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def get_cache_stats() -> Optional[Dict]:
+    return COACHING_CACHE.stats() if COACHING_CACHE else None
+
+def _fallback_key(student_data: dict, diagnosis: dict, risk_level: str, goal: str) -> str:
+    """Every input the rule-based sections depend on, apart from the goal text."""
+    goal = goal or ""
+    # The subject reaches the sections twice: through the resources (defaulting to
+    # math) and through the quiz topic (defaulting to general), so key on both.
+    return json.dumps([
+        risk_level,
+        student_data.get("subject", "math"),
+        _quiz_topic_for(student_data, diagnosis),
+        list(diagnosis.get("weaknesses", [])),
+        list(diagnosis.get("strengths", [])[:2]),
+        _infer_goal_horizon(goal),
+        any(k in goal.lower() for k in ["exam", "test", "days", "soon"]),
+    ], separators=(",", ":"), ensure_ascii=False)
+
+def _fallback_strategy(goal: str) -> str:
     is_short = any(k in goal.lower() for k in ["exam", "test", "days", "soon"])
-    strategy = "SHORT_TERM" if is_short else "LONG_TERM"
-    quiz_items = _build_quiz_generation(student_data, diagnosis, risk_level)
-    quiz_questions = [
-        dict(
-            item,
-            difficulty=("basic" if risk_level == "At-risk" else "advanced" if risk_level == "High-performing" else "intermediate"),
-            topic=_quiz_topic_for(student_data, diagnosis)
-        )
-        for item in quiz_items
-    ]
+    return "SHORT_TERM" if is_short else "LONG_TERM"
+
+def _fallback_sections(student_data: dict, diagnosis: dict, risk_level: str, goal: str, curated: list) -> dict:
+    """Rule-based sections that do not embed the goal text (precomputable)."""
+    strategy = _fallback_strategy(goal)
+    quiz_questions = _build_quiz_generation(student_data, diagnosis, risk_level)
     return {
-        "learning_diagnosis": f"Your {strategy.lower()} plan for '{goal}' is ready. You are currently in the {risk_level} category.",
         "weekly_goals": _build_weekly_goals(student_data, diagnosis, risk_level, goal),
         "milestone_goals": _build_milestone_goals(student_data, diagnosis, risk_level, goal),
         "quiz_questions": quiz_questions,
-        "quiz_generation": quiz_questions,
         "study_plan": {"overview": f"{strategy} strategy guided by your academic risk level ({risk_level}).", "days": []},
-        "resources": curated[:4],
+        "resources": [dict(r) for r in curated[:4]],
         "next_steps": [
             "Review your weakest topics for 30 minutes tonight.",
             "Use the provided resources to close knowledge gaps.",
@@ -482,23 +295,193 @@ def _generate_fallback(student_data: dict, diagnosis: dict, risk_level: str, pre
             "Attend your next scheduled class with a list of 3 questions.",
             "Reflect on today's progress before sleeping."
         ],
+    }
+
+def _generate_fallback(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str, curated: Optional[list] = None) -> dict:
+    """Rule-based coaching, from the precomputed table when it has the key. The caller owns the result."""
+    table = _get_fallback_table()
+    sections = table.get(_fallback_key(student_data, diagnosis, risk_level, goal)) if table else None
+    if sections is not None:
+        # Table sections are shared by every key and request that uses them.
+        sections = copy.deepcopy(sections)
+    if sections is None:
+        _bump("fallback_built")
+        if curated is None:
+            curated = _get_curated_resources(student_data.get("subject", "math"), diagnosis.get("weaknesses", []))
+        sections = _fallback_sections(student_data, diagnosis, risk_level, goal, curated)
+    else:
+        _bump("fallback_precomputed")
+    strategy = _fallback_strategy(goal)
+    return {
+        "learning_diagnosis": f"Your {strategy.lower()} plan for '{goal}' is ready. You are currently in the {risk_level} category.",
+        **sections,
+        "quiz_generation": sections["quiz_questions"],
         "ai_generated": False
     }
 
-def generate_ai_coaching(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str = "Improve performance") -> dict:
-    subject = student_data.get("subject", "math")
-    curated = _get_curated_resources(subject, diagnosis.get("weaknesses", []))
+def fallback_fingerprint() -> str:
+    """Identifies the registry, quiz bank and rule code a precomputed fallback file was built from."""
+    import inspect
+
+    digest = hashlib.sha256(json.dumps(get_registry().table, sort_keys=True).encode("utf-8"))
+    digest.update(json.dumps(get_quiz_bank().table, sort_keys=True).encode("utf-8"))
+    for fn in (_get_curated_resources, _infer_goal_horizon, _build_weekly_goals, _build_milestone_goals,
+               _quiz_topic_for, _build_quiz_generation, _fallback_key, _fallback_strategy, _fallback_sections):
+        digest.update(inspect.getsource(fn).encode("utf-8"))
+    return digest.hexdigest()
+
+def _load_fallback_table() -> Optional[FallbackTable]:
+    if not os.path.exists(FALLBACK_TABLE_PATH):
+        return None
+    try:
+        table = FallbackTable(FALLBACK_TABLE_PATH)
+    except Exception as e:
+        print(f"AI_COACH: Error loading fallback table: {e}")
+        return None
+    if table.fingerprint != fallback_fingerprint():
+        print(f"AI_COACH: {FALLBACK_TABLE_PATH} is stale, rebuild it with build_coaching_fallbacks.py")
+        return None
+    return table
+
+_NOT_LOADED = object()
+FALLBACK_TABLE = _NOT_LOADED
+# The registry and quiz bank snapshots FALLBACK_TABLE was checked against.
+_FALLBACK_TABLE_SOURCES = None
+_fallback_table_lock = threading.Lock()
+
+def _fallback_sources() -> Tuple:
+    return get_registry(), get_quiz_bank()
+
+def _get_fallback_table() -> Optional[FallbackTable]:
+    """The precomputed table, re-opened and re-checked whenever the registry or quiz bank is reloaded."""
+    global FALLBACK_TABLE, _FALLBACK_TABLE_SOURCES
+    sources = _fallback_sources()
+    current = _FALLBACK_TABLE_SOURCES
+    if FALLBACK_TABLE is not _NOT_LOADED and (current is None or all(a is b for a, b in zip(sources, current))):
+        return FALLBACK_TABLE
+    with _fallback_table_lock:
+        if FALLBACK_TABLE is _NOT_LOADED or _FALLBACK_TABLE_SOURCES is current:
+            if FALLBACK_TABLE is not _NOT_LOADED:
+                print("AI_COACH: Registry or quiz bank changed, re-checking the fallback table")
+            FALLBACK_TABLE = _load_fallback_table()
+            _FALLBACK_TABLE_SOURCES = sources
+    return FALLBACK_TABLE
+
+def _request_completion(client, user_prompt: str) -> str:
+    chat = client.chat.completions.create(
+        messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
+        model=GROQ_MODEL, temperature=GROQ_TEMPERATURE, response_format={"type": "json_object"},
+        timeout=GROQ_REQUEST_TIMEOUT
+    )
+    return chat.choices[0].message.content
+
+def _request_completion_stream(client, user_prompt: str) -> Iterator[str]:
+    stream = client.chat.completions.create(
+        messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
+        # JSON mode cannot be combined with streaming; JsonSectionParser finds the object instead.
+        model=GROQ_MODEL, temperature=GROQ_TEMPERATURE, timeout=GROQ_REQUEST_TIMEOUT, stream=True
+    )
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+def _cache_late_completion(future, cache_key: str) -> None:
+    """Store an answer that arrived after the request gave up on it."""
+    try:
+        raw_content = future.result()
+        raw_result = json.loads(raw_content)
+    except Exception as e:
+        _bump("llm_errors")
+        print(f"AI_COACH: Late completion failed: {e}")
+        return
+    usable = isinstance(raw_result, dict) and all(k in raw_result for k in LLM_REQUIRED_SECTIONS)
+    if COACHING_CACHE and usable:
+        COACHING_CACHE.set(cache_key, raw_content)
+        _bump("late_cached")
+
+def _submit_completion(client, user_prompt: str, cache_key: str) -> Optional[Future]:
+    """The in-flight call for cache_key, or a new one; None when GROQ_MAX_PENDING calls are already pending."""
+    with _llm_inflight_lock:
+        future = _llm_inflight.get(cache_key)
+        if future is not None:
+            _bump("llm_shared")
+            return future
+        if not _llm_slots.acquire(blocking=False):
+            _bump("llm_rejected")
+            return None
+        _bump("llm_calls")
+        future = _get_llm_executor().submit(_request_completion, client, user_prompt)
+        future.settled = False
+        future.cache_late = False
+        _llm_inflight[cache_key] = future
+
+    def finished(f):
+        with _llm_inflight_lock:
+            if _llm_inflight.get(cache_key) is f:
+                del _llm_inflight[cache_key]
+            f.settled = True
+            late = f.cache_late
+        _llm_slots.release()
+        if late:
+            _cache_late_completion(f, cache_key)
+
+    future.add_done_callback(finished)
+    return future
+
+def _cache_when_done(future: Future, cache_key: str) -> None:
+    """Cache the answer once it arrives, however many requests gave up waiting for it."""
+    with _llm_inflight_lock:
+        if future.cache_late:
+            return
+        future.cache_late = True
+        settled = future.settled
+    if settled:
+        _cache_late_completion(future, cache_key)
+
+def generate_fallback_coaching(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str = "Improve performance") -> dict:
+    """Rule-based coaching with no LLM call; used as an instant placeholder."""
+    return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal)
+
+def generate_ai_coaching(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str = "Improve performance", timeout: Optional[float] = None) -> dict:
+    """LLM coaching, or the rule-based plan if the LLM is unavailable or fails.
+
+    ``timeout`` is the seconds left in the caller's latency budget. When the
+    LLM does not answer in time the rule-based plan is returned, and the late
+    answer is still written to the cache for the next identical request.
+    """
     client = _get_client()
     if not client:
-        return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
+        return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal)
+    subject = student_data.get("subject", "math")
+    curated = _get_curated_resources(subject, diagnosis.get("weaknesses", []))
     try:
-        res_text = "\n".join([f"• {r['name']}: {r['url']}" for r in curated])
-        user_prompt = f"Goal: {goal}\nWeakness: {', '.join(diagnosis.get('weaknesses', []))}\nRESOURCES:\n{res_text}"
-        chat = client.chat.completions.create(
-            messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_prompt}],
-            model=GROQ_MODEL, temperature=0.4, response_format={"type": "json_object"}
-        )
-        raw_result = json.loads(chat.choices[0].message.content)
+        cache_key = _coaching_cache_key(goal, diagnosis.get("weaknesses", []), curated)
+        raw_content = COACHING_CACHE.get(cache_key) if COACHING_CACHE else None
+        from_cache = raw_content is not None
+        if not from_cache:
+            res_text = "\n".join([f"• {r['name']}: {r['url']}" for r in curated])
+            user_prompt = f"Goal: {goal}\nWeakness: {', '.join(diagnosis.get('weaknesses', []))}\nRESOURCES:\n{res_text}"
+            if timeout is None:
+                _bump("llm_calls")
+                raw_content = _request_completion(client, user_prompt)
+            else:
+                future = _submit_completion(client, user_prompt, cache_key) if timeout > 0 else None
+                if future is None:
+                    # No budget left, or too many calls already pending: do not start another.
+                    if timeout <= 0:
+                        _bump("budget_exceeded")
+                    _bump("fallbacks")
+                    return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
+                try:
+                    raw_content = future.result(timeout=timeout)
+                except FutureTimeout:
+                    _bump("budget_exceeded")
+                    _bump("fallbacks")
+                    _cache_when_done(future, cache_key)
+                    print(f"AI_COACH: Latency budget exceeded ({timeout:.2f}s left), using rule-based coaching")
+                    return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
+        raw_result = json.loads(raw_content)
         if "weekly_goals" not in raw_result:
             raw_result["weekly_goals"] = _build_weekly_goals(student_data, diagnosis, risk_level, goal)
         if "milestone_goals" not in raw_result:
@@ -506,23 +489,73 @@ def generate_ai_coaching(student_data: dict, diagnosis: dict, risk_level: str, p
         if "quiz_questions" not in raw_result and "quiz_generation" in raw_result:
             raw_result["quiz_questions"] = raw_result.get("quiz_generation", [])
         if "quiz_questions" not in raw_result:
-            raw_result["quiz_questions"] = [
-                dict(
-                    item,
-                    difficulty=("basic" if risk_level == "At-risk" else "advanced" if risk_level == "High-performing" else "intermediate"),
-                    topic=_quiz_topic_for(student_data, diagnosis)
-                )
-                for item in _build_quiz_generation(student_data, diagnosis, risk_level)
-            ]
+            raw_result["quiz_questions"] = _build_quiz_generation(student_data, diagnosis, risk_level)
         final_result = _audit_and_repair(raw_result, curated)
         if not final_result:
+            _bump("fallbacks")
             return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
+        if COACHING_CACHE and not from_cache:
+            COACHING_CACHE.set(cache_key, raw_content)
         final_result["ai_generated"] = True
         return final_result
     except Exception as e:
         print(f"AI_COACH: Logic Error: {e}")
+        _bump("llm_errors")
+        _bump("fallbacks")
         return _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
 
+def stream_ai_coaching(student_data: dict, diagnosis: dict, risk_level: str, predicted_grade: float, goal: str = "Improve performance") -> Iterator[Tuple[str, object]]:
+    """Yield (section, value) pairs as soon as each coaching section is ready.
+
+    The LLM completion is streamed and every top-level section is repaired
+    the moment it is complete. Sections the LLM never delivered, including
+    after a mid-stream failure, are filled from the rule-based plan. The last
+    pair is ("ai_generated", bool).
+    """
+    subject = student_data.get("subject", "math")
+    curated = _get_curated_resources(subject, diagnosis.get("weaknesses", []))
+    sent = {}
+    ai_generated = False
+    client = _get_client()
+    if client:
+        try:
+            cache_key = _coaching_cache_key(goal, diagnosis.get("weaknesses", []), curated)
+            raw_content = COACHING_CACHE.get(cache_key) if COACHING_CACHE else None
+            from_cache = raw_content is not None
+            if from_cache:
+                chunks = [raw_content]
+            else:
+                res_text = "\n".join([f"• {r['name']}: {r['url']}" for r in curated])
+                user_prompt = f"Goal: {goal}\nWeakness: {', '.join(diagnosis.get('weaknesses', []))}\nRESOURCES:\n{res_text}"
+                _bump("llm_calls")
+                chunks = _request_completion_stream(client, user_prompt)
+            parser = JsonSectionParser()
+            received = []
+            for chunk in chunks:
+                received.append(chunk)
+                for name, value in parser.feed(chunk):
+                    if name == "quiz_generation":
+                        name = "quiz_questions"
+                    if name not in STREAM_SECTIONS or name in sent:
+                        continue
+                    sent[name] = _repair_section(name, value, curated)
+                    yield name, sent[name]
+            ai_generated = parser.finished and all(k in sent for k in LLM_REQUIRED_SECTIONS)
+            if ai_generated and COACHING_CACHE and not from_cache:
+                raw_content = "".join(received)
+                COACHING_CACHE.set(cache_key, raw_content[raw_content.index("{"):raw_content.rindex("}") + 1])
+        except Exception as e:
+            print(f"AI_COACH: Stream Error: {e}")
+            _bump("llm_errors")
+        if not ai_generated:
+            _bump("fallbacks")
+    missing = [name for name in STREAM_SECTIONS if name not in sent]
+    if missing:
+        fallback = _generate_fallback(student_data, diagnosis, risk_level, predicted_grade, goal, curated)
+        for name in missing:
+            yield name, fallback[name]
+    yield "ai_generated", ai_generated
+
 def is_ai_available() -> bool:
     key = os.environ.get("GROQ_API_KEY", "")
     return bool(key) and key != "your_groq_api_key_here"
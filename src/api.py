@@ -4,16 +4,22 @@ This API serves predictions from the trained ML model to the frontend.
 Includes AI Coach integration (Member 2) for LLM-powered coaching.
 """
 
-from flask import Flask, request, jsonify
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
-import pandas as pd
-import joblib
+import functools
+import hmac
+import json
 import sys
 import os
 import logging
 import uuid
 from datetime import datetime, timezone
 sys.path.insert(0, os.path.dirname(__file__))
+# pandas and joblib/sklearn are imported only on the paths that need them, so
+# a worker serving from the inference kernel never loads them.
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,33 +27,183 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from ai_coach import generate_ai_coaching, is_ai_available
+import ai_coach
+from ai_coach import (
+    generate_ai_coaching, generate_fallback_coaching, get_cache_stats, get_coaching_stats, is_ai_available,
+    stream_ai_coaching
+)
+from coaching_jobs import DONE, FAILED, jobs_from_env
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS
+from model_bundle import BundleSlot, ModelBundle, ModelReloadError, default_encoder, load_bundle
+from profiling import profiler_from_env
+from resource_registry import get_registry
+from feature_schema import CATEGORICAL_DEFAULTS, EXPECTED_FEATURES, NUMERIC_DEFAULTS, FeatureSchemaError
 
 app = Flask(__name__)
 allowed_origins = os.environ.get('ALLOWED_ORIGINS', '*').split(',')
 CORS(app, resources={r"/*": {"origins": allowed_origins}})
 
-MODEL_PATH = os.path.join('models', 'final_model.pkl')
-SCALER_PATH = os.path.join('models', 'scaler.pkl')
+MODELS_DIR = os.environ.get('MODELS_DIR', 'models')
+# 'kernel' serves from the fused NumPy kernel when one was exported; 'sklearn' forces the pickles.
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'kernel')
+# Map model arrays from disk so every gunicorn worker shares one copy through the page cache.
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '1') != '0'
+# Seconds between checks of MODELS_DIR for a new model; 0 turns the watcher off.
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 30))
+
+# 'async' returns rule-based coaching at once and delivers LLM coaching through /coaching/<id>.
+COACHING_MODE = os.environ.get('COACHING_MODE', 'sync')
+COACHING_STREAM_TIMEOUT = float(os.environ.get('COACHING_STREAM_TIMEOUT', 60))
+COACHING_JOBS = jobs_from_env()
+# End-to-end budget for /predict; coaching gets whatever is left of it.
+LATENCY_BUDGET_MS = float(os.environ.get('LATENCY_BUDGET_MS', 10000))
+# Admin endpoints (and on-demand profiling) are disabled unless a token is set.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+PROFILER = profiler_from_env()
+PROFILED_ENDPOINTS = {'predict', 'predict_batch_endpoint'}
+
+# Encoder for the built-in feature layout; served until a model bundle is loaded.
+FEATURE_ENCODER = default_encoder()
+MODELS = BundleSlot(
+    ModelBundle(FEATURE_ENCODER), MODELS_DIR,
+    loader=functools.partial(load_bundle, backend=INFERENCE_BACKEND, memory_map=MODEL_MMAP)
+)
+# Filled in at the end of this module and by warm_up(); served by /health/ready.
+STARTUP = {'ready': False, 'import_ms': None, 'warm_up_ms': None, 'stages': {}}
+
+STAGE_SECONDS = METRICS.histogram(
+    'learnscope_predict_stage_seconds', 'Time spent in each /predict pipeline stage', ['stage']
+)
+REQUEST_SECONDS = METRICS.histogram(
+    'learnscope_http_request_seconds', 'End-to-end request latency', ['endpoint']
+)
+REQUESTS_TOTAL = METRICS.counter(
+    'learnscope_http_requests_total', 'Requests served by endpoint and status code', ['endpoint', 'status']
+)
+
+def stage(name):
+    """Time a /predict pipeline stage into learnscope_predict_stage_seconds"""
+    return STAGE_SECONDS.time(stage=name)
 
-model = None
-scaler = None
+def is_admin_request():
+    """True when the request carries ADMIN_TOKEN as a bearer token or X-Admin-Token"""
+    if not ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get('X-Admin-Token', '')
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        supplied = auth[len('Bearer '):]
+    return hmac.compare_digest(supplied.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def admin_required(view):
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({
+                'status': {
+                    'code': 'error',
+                    'message': 'Admin endpoints are disabled',
+                    'timestamp': datetime.now(timezone.utc).isoformat()
+                }
+            }), 404
+        if not is_admin_request():
+            return jsonify({
+                'status': {
+                    'code': 'error',
+                    'message': 'Admin token required',
+                    'timestamp': datetime.now(timezone.utc).isoformat()
+                }
+            }), 401
+        return view(*args, **kwargs)
+    return guarded
+
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = str(uuid.uuid4())
+    g.profile = None
+    if request.endpoint in PROFILED_ENDPOINTS:
+        forced = request.headers.get('X-Profile') == '1' and is_admin_request()
+        if PROFILER.should_profile(forced):
+            g.profile = PROFILER.start()
+
+@app.after_request
+def _finish_request(response):
+    if g.get('profile') is not None:
+        profile, g.profile = g.profile, None
+        name = PROFILER.finish(profile, g.request_id, request.endpoint, response.status_code)
+        logger.info(f"[{g.request_id}] Profile saved as {name}")
+        response.headers['X-Profile-Id'] = name
+    started = g.get('request_started')
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+        REQUESTS_TOTAL.inc(endpoint=endpoint, status=str(response.status_code))
+    return response
+
+@app.teardown_request
+def _release_profiler(error=None):
+    # after_request is skipped on unhandled errors; never leave a capture running.
+    if g.get('profile') is not None:
+        profile, g.profile = g.profile, None
+        PROFILER.finish(profile, g.request_id, request.endpoint, 500)
 
 def load_model():
-    """Load the trained model and scaler"""
-    global model, scaler
+    """Load the model bundle in MODELS_DIR and serve it.
+
+    Raises FeatureSchemaError when the artifacts on disk were not produced by
+    the same training run; mock predictions are served until a good bundle
+    is loaded.
+    """
     try:
-        if os.path.exists(MODEL_PATH):
-            model = joblib.load(MODEL_PATH)
-            logger.info("SUCCESS: Model loaded successfully")
-        else:
-            logger.warning("WARNING: Model not found. Please train the model first.")
-            
-        if os.path.exists(SCALER_PATH):
-            scaler = joblib.load(SCALER_PATH)
-            logger.info("SUCCESS: Scaler loaded successfully")
-    except Exception as e:
-        logger.error(f"Error loading model: {e}")
+        MODELS.load()
+    except FeatureSchemaError as e:
+        logger.error(f"Refusing to serve mismatched model artifacts: {e}")
+        MODELS.reset(ModelBundle(FEATURE_ENCODER))
+        raise
+
+def is_model_loaded():
+    return MODELS.current.is_loaded
+
+def start_model_watcher():
+    """Reload new models from MODELS_DIR in this process (see MODEL_RELOAD_INTERVAL)"""
+    return MODELS.start_watcher(MODEL_RELOAD_INTERVAL)
+
+def warm_up():
+    """Do the work the first request would otherwise pay for.
+
+    Loads the model (if not loaded yet), the coaching registry, the fallback
+    table and the Groq client, then scores one default student so the kernel
+    pages and diagnosis code are touched. Safe to call more than once;
+    gunicorn.conf.py calls it again in every worker after fork. Raises
+    FeatureSchemaError like load_model.
+    """
+    started = time.perf_counter()
+    stages = {}
+
+    def mark(name, since):
+        stages[name] = round((time.perf_counter() - since) * 1000, 3)
+
+    if not is_model_loaded():
+        step = time.perf_counter()
+        load_model()
+        mark('model', step)
+    stages.update(ai_coach.warm_up())
+
+    step = time.perf_counter()
+    from diagnosis import get_student_diagnosis
+    bundle = MODELS.current
+    risk_level = str(predict_risk_levels(bundle.encoder.transform_one({}), bundle)[0]) if bundle.is_loaded else 'Average'
+    get_student_diagnosis({}, risk_level)
+    mark('first_prediction', step)
+
+    STARTUP.update(ready=True, warm_up_ms=round((time.perf_counter() - started) * 1000, 3), stages=stages)
+    logger.info(f"Ready after {STARTUP['import_ms']} ms import + {STARTUP['warm_up_ms']} ms warm-up: {stages}")
+    return STARTUP
+
+def predict_risk_levels(X, bundle=None):
+    """Predict risk categories for a block encoded by the same bundle's encoder"""
+    return (bundle or MODELS.current).predict(X)
 
 @app.route('/')
 def home():
@@ -55,7 +211,7 @@ def home():
     return jsonify({
         'status': 'running',
         'message': 'LearnScope.ai API',
-        'model_loaded': model is not None,
+        'model_loaded': is_model_loaded(),
         'version': '1.0.0'
     })
 
@@ -287,8 +443,15 @@ def normalize_ai_coaching(ai_coaching, student_data, diagnosis, risk_level, goal
         coaching['quiz_questions'] = defaults['quiz_questions']
     coaching['quiz_generation'] = coaching['quiz_questions']
 
+    coaching['next_steps'] = normalize_next_steps(coaching.get('next_steps'), defaults['next_steps'])
+
+    coaching['ai_generated'] = bool(coaching.get('ai_generated', True))
+    return coaching
+
+def normalize_next_steps(next_steps, default_steps):
+    """Exactly five next steps, each starting with an action verb."""
     action_verbs = ['Review', 'Plan', 'Practice', 'Check', 'Ask']
-    next_steps = coaching.get('next_steps') or defaults['next_steps']
+    next_steps = next_steps or default_steps
     normalized_steps = []
     for idx, step in enumerate(list(next_steps)[:5]):
         text = str(step).strip()
@@ -297,151 +460,196 @@ def normalize_ai_coaching(ai_coaching, student_data, diagnosis, risk_level, goal
             text = f"{verb} {text}".strip()
         normalized_steps.append(text)
     while len(normalized_steps) < 5:
-        normalized_steps.append(defaults['next_steps'][len(normalized_steps)])
-    coaching['next_steps'] = normalized_steps[:5]
+        normalized_steps.append(default_steps[len(normalized_steps)])
+    return normalized_steps[:5]
 
-    coaching['ai_generated'] = bool(coaching.get('ai_generated', True))
-    return coaching
+def normalize_coaching_section(name, value, defaults):
+    """Apply the normalize_ai_coaching rules to a single streamed section."""
+    if name == 'next_steps':
+        return normalize_next_steps(value, defaults['next_steps'])
+    return value or defaults.get(name)
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    """Predict student performance based on input features"""
-    request_id = str(uuid.uuid4())
-    logger.info(f"[{request_id}] Request received")
-    
+def wants_async_coaching():
+    """Decide per request whether LLM coaching runs in the background"""
+    mode = request.args.get('coaching', '').lower()
+    if mode in ('sync', 'async'):
+        return mode == 'async'
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    return COACHING_MODE == 'async'
+
+def request_deadline(started):
+    """Monotonic deadline for this request.
+
+    Clients may tighten the configured budget with X-Latency-Budget-Ms but
+    never extend it.
+    """
+    budget_ms = LATENCY_BUDGET_MS
+    requested = request.headers.get('X-Latency-Budget-Ms')
+    if requested:
+        try:
+            budget_ms = min(budget_ms, max(0.0, float(requested)))
+        except ValueError:
+            pass
+    return started + budget_ms / 1000.0
+
+def build_ai_coaching(student_data, diagnosis, risk_level, predicted_grade, goal, request_id, deadline=None):
+    """Generate LLM coaching and normalize it into the response contract"""
+    timeout = None if deadline is None else deadline - time.monotonic()
     try:
-        data = request.json
-        if not data:
-            logger.error(f"[{request_id}] No data provided")
-            return jsonify({
-                'status': {
-                    'code': 'error',
-                    'message': 'No data provided',
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
-                    'request_id': request_id
-                }
-            }), 400
-        
-        # Normalize input format (support both flat and nested)
+        with stage('ai_coaching'):
+            ai_coaching = generate_ai_coaching(
+                student_data=student_data,
+                diagnosis=diagnosis,
+                risk_level=risk_level,
+                predicted_grade=predicted_grade,
+                goal=goal,
+                timeout=timeout
+            )
+    except Exception as ai_error:
+        logger.error(f"[{request_id}] AI Coach error: {ai_error}")
+        ai_coaching = get_default_ai_coaching()
+    
+    # Ensure ai_coaching is never None
+    if ai_coaching is None:
+        ai_coaching = get_default_ai_coaching()
+    with stage('normalize_ai_coaching'):
+        return normalize_ai_coaching(ai_coaching, student_data, diagnosis, risk_level, goal)
+
+def parse_predict_request(request_id):
+    """Read, normalize and validate a /predict body.
+
+    Returns (data, None) on success or (None, error_response) on failure.
+    """
+    data = request.json
+    if not data:
+        logger.error(f"[{request_id}] No data provided")
+        return None, (jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'No data provided',
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            }
+        }), 400)
+    
+    # Normalize input format (support both flat and nested)
+    with stage('normalize_input'):
         data, was_normalized = normalize_input(data)
-        if was_normalized:
-            logger.info(f"[{request_id}] Input normalized from flat to nested format")
-        
-        # Input validation
+    if was_normalized:
+        logger.info(f"[{request_id}] Input normalized from flat to nested format")
+    
+    # Input validation
+    with stage('validate_input'):
         is_valid, error_msg = validate_input(data)
-        if not is_valid:
-            logger.error(f"[{request_id}] Validation failed: {error_msg}")
-            return jsonify({
-                'status': {
-                    'code': 'error',
-                    'message': f'Validation failed: {error_msg}',
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
-                    'request_id': request_id
-                },
-                'error_details': {'issue': error_msg}
-            }), 400
-        
-        df = pd.DataFrame([data.get('student_data', {})])
-        X = preprocess_input(df)
-        
-        prediction_score = None
-        if model is None:
-            logger.warning(f"[{request_id}] Model not loaded, using mock prediction")
+    if not is_valid:
+        logger.error(f"[{request_id}] Validation failed: {error_msg}")
+        return None, (jsonify({
+            'status': {
+                'code': 'error',
+                'message': f'Validation failed: {error_msg}',
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            },
+            'error_details': {'issue': error_msg}
+        }), 400)
+    return data, None
+
+def score_and_diagnose(data, request_id):
+    """Predict the risk level and diagnose one validated student.
+
+    Returns (risk_level, predicted_grade, diagnosis, goal).
+    """
+    prediction_score = None
+    bundle = MODELS.current
+    if not bundle.is_loaded:
+        logger.warning(f"[{request_id}] Model not loaded, using mock prediction")
+        prediction_score = calculate_mock_prediction(data.get('student_data', data))
+        risk_level = determine_risk_level(prediction_score)
+    else:
+        try:
+            with stage('preprocess'):
+                X = bundle.encoder.transform_one(data.get('student_data', {}))
+            with stage('model'):
+                risk_level = str(predict_risk_levels(X, bundle)[0])
+            prediction_score = score_for_risk_level(risk_level)
+                
+        except Exception as model_error:
+            logger.error(f"[{request_id}] Model prediction error: {model_error}")
             prediction_score = calculate_mock_prediction(data.get('student_data', data))
             risk_level = determine_risk_level(prediction_score)
-        else:
-            try:
-                if scaler:
-                    X_scaled = scaler.transform(X)
-                    prediction_risk = model.predict(X_scaled)[0]
-                else:
-                    prediction_risk = model.predict(X)[0]
-                
-                risk_level = prediction_risk
-                
-                if risk_level == "At-risk":
-                    prediction_score = 8.0
-                elif risk_level == "Average":
-                    prediction_score = 13.0
-                else:
-                    prediction_score = 17.0
-                    
-            except Exception as model_error:
-                logger.error(f"[{request_id}] Model prediction error: {model_error}")
-                prediction_score = calculate_mock_prediction(data.get('student_data', data))
-                risk_level = determine_risk_level(prediction_score)
-        
-        try:
-            from diagnosis import get_student_diagnosis
+    
+    try:
+        from diagnosis import get_student_diagnosis
+        with stage('diagnosis'):
             diagnosis = get_student_diagnosis(data.get('student_data', data), risk_level)
-        except Exception as diag_error:
-            logger.error(f"[{request_id}] Diagnosis error: {diag_error}")
-            diagnosis = {
-                "weaknesses": [],
-                "strengths": [],
-                "patterns": [],
-                "recommendations": [],
-                "reason": f"Student is in the {risk_level} category.",
-                "profile": "No profile assigned"
-            }
+    except Exception as diag_error:
+        logger.error(f"[{request_id}] Diagnosis error: {diag_error}")
+        diagnosis = get_default_diagnosis(risk_level)
+    
+    final_grade = float(prediction_score) if prediction_score else 12.0
+    goal = data.get('goal', {}).get('target_grade', 'Improve overall academic performance')
+    if isinstance(goal, dict):
+        goal = goal.get('target_grade', 'Improve overall academic performance')
+    return risk_level, final_grade, diagnosis, str(goal)
+
+def build_prediction_payload(data, risk_level, final_grade, diagnosis):
+    """Prediction, risk and diagnosis sections of the /predict response"""
+    return {
+        'predicted_grade': {
+            'value': final_grade,
+            'confidence': 0.85,
+            'subject': data.get('student_data', {}).get('subject', 'general')
+        },
+        'risk_level': {
+            'category': risk_level,
+            'score': risk_score_for_level(risk_level),
+            'factors': diagnosis.get('weaknesses', [])
+        },
+        'diagnosis': {
+            'strengths': diagnosis.get('strengths', []),
+            'weaknesses': diagnosis.get('weaknesses', []),
+            'patterns': diagnosis.get('patterns', []),
+            'recommendations': diagnosis.get('recommendations', [])
+        }
+    }
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Predict student performance based on input features"""
+    request_id = g.request_id
+    started = time.monotonic()
+    logger.info(f"[{request_id}] Request received")
+    
+    try:
+        deadline = request_deadline(started)
+        data, error_response = parse_predict_request(request_id)
+        if error_response is not None:
+            return error_response
         
-        final_grade = float(prediction_score) if prediction_score else 12.0
-        goal = data.get('goal', {}).get('target_grade', 'Improve overall academic performance')
-        if isinstance(goal, dict):
-            goal = goal.get('target_grade', 'Improve overall academic performance')
+        risk_level, final_grade, diagnosis, goal = score_and_diagnose(data, request_id)
         
-        try:
-            ai_coaching = generate_ai_coaching(
-                student_data=data.get('student_data', data),
-                diagnosis=diagnosis,
-                risk_level=risk_level,
-                predicted_grade=final_grade,
-                goal=str(goal)
+        coaching_job = None
+        if wants_async_coaching() and is_ai_available():
+            ai_coaching = normalize_ai_coaching(
+                generate_fallback_coaching(data.get('student_data', data), diagnosis, risk_level, final_grade, str(goal)),
+                data.get('student_data', data),
+                diagnosis,
+                risk_level,
+                str(goal)
             )
-        except Exception as ai_error:
-            logger.error(f"[{request_id}] AI Coach error: {ai_error}")
-            ai_coaching = get_default_ai_coaching()
-        
-        # Ensure ai_coaching is never None
-        if ai_coaching is None:
-            ai_coaching = get_default_ai_coaching()
-        ai_coaching = normalize_ai_coaching(
-            ai_coaching,
-            data.get('student_data', data),
-            diagnosis,
-            risk_level,
-            str(goal)
-        )
-        
-        # Calculate risk score
-        risk_score = 0
-        if risk_level == "At-risk":
-            risk_score = 75
-        elif risk_level == "Average":
-            risk_score = 50
+            coaching_job = COACHING_JOBS.submit(
+                build_ai_coaching, data.get('student_data', data), diagnosis, risk_level, final_grade, str(goal), request_id
+            )
+            if coaching_job is None:
+                logger.warning(f"[{request_id}] Coaching queue full, serving rule-based coaching only")
         else:
-            risk_score = 25
-        
-        # Extract factors from diagnosis
-        risk_factors = diagnosis.get('weaknesses', [])
+            ai_coaching = build_ai_coaching(
+                data.get('student_data', data), diagnosis, risk_level, final_grade, str(goal), request_id, deadline
+            )
         
         response_data = {
-            'predicted_grade': {
-                'value': final_grade,
-                'confidence': 0.85,
-                'subject': data.get('student_data', {}).get('subject', 'general')
-            },
-            'risk_level': {
-                'category': risk_level,
-                'score': risk_score,
-                'factors': risk_factors
-            },
-            'diagnosis': {
-                'strengths': diagnosis.get('strengths', []),
-                'weaknesses': diagnosis.get('weaknesses', []),
-                'patterns': diagnosis.get('patterns', []),
-                'recommendations': diagnosis.get('recommendations', [])
-            },
+            **build_prediction_payload(data, risk_level, final_grade, diagnosis),
             'ai_coaching': ai_coaching,
             'status': {
                 'code': 'success',
@@ -451,8 +659,17 @@ def predict():
             }
         }
         
+        if coaching_job is not None:
+            response_data['coaching_job'] = {
+                'id': coaching_job['id'],
+                'state': coaching_job['state'],
+                'poll_url': f"/coaching/{coaching_job['id']}",
+                'stream_url': f"/coaching/{coaching_job['id']}/stream"
+            }
+        
         # Validate response before returning
-        is_valid, validation_error = validate_response(response_data)
+        with stage('validate_response'):
+            is_valid, validation_error = validate_response(response_data)
         if not is_valid:
             logger.error(f"[{request_id}] Response validation failed: {validation_error}")
             # Return safe default response
@@ -477,49 +694,262 @@ def predict():
             }
         }), 500
 
-def preprocess_input(df):
-    """Preprocess input data to match training format exactly."""
-    expected_features = [
-        'age', 'Medu', 'Fedu', 'traveltime', 'studytime', 'failures', 'famrel', 
-        'freetime', 'goout', 'Dalc', 'Walc', 'health', 'absences', 
-        'school_MS', 'sex_M', 'address_U', 'famsize_LE3', 'Pstatus_T', 
-        'Mjob_health', 'Mjob_other', 'Mjob_services', 'Mjob_teacher', 
-        'Fjob_health', 'Fjob_other', 'Fjob_services', 'Fjob_teacher', 
-        'reason_home', 'reason_other', 'reason_reputation', 
-        'guardian_mother', 'guardian_other', 'schoolsup_yes', 'famsup_yes', 
-        'paid_yes', 'activities_yes', 'nursery_yes', 'higher_yes', 
-        'internet_yes', 'romantic_yes', 'subject_portuguese'
-    ]
-    
-    categorical_defaults = {
-        'school': 'GP', 'sex': 'F', 'address': 'U', 'famsize': 'GT3', 'Pstatus': 'T',
-        'Mjob': 'other', 'Fjob': 'other', 'reason': 'course', 'guardian': 'mother',
-        'schoolsup': 'no', 'famsup': 'no', 'paid': 'no', 'activities': 'no',
-        'nursery': 'yes', 'higher': 'yes', 'internet': 'yes', 'romantic': 'no',
-        'subject': 'math'
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl')
+
+def score_for_risk_level(risk_level):
+    """Map a predicted risk category to the representative grade we report"""
+    if risk_level == "At-risk":
+        return 8.0
+    if risk_level == "Average":
+        return 13.0
+    return 17.0
+
+def risk_score_for_level(risk_level):
+    """Map a risk category to its 0-100 risk score"""
+    if risk_level == "At-risk":
+        return 75
+    if risk_level == "Average":
+        return 50
+    return 25
+
+def get_default_diagnosis(risk_level):
+    """Return an empty diagnosis when the rule engine fails"""
+    return {
+        "weaknesses": [],
+        "strengths": [],
+        "patterns": [],
+        "recommendations": [],
+        "reason": f"Student is in the {risk_level} category.",
+        "profile": "No profile assigned"
     }
-    
-    for col, default in categorical_defaults.items():
+
+def _check_numeric_features(student_data):
+    """Return an error if a model feature is present but not a number"""
+    for col in NUMERIC_DEFAULTS:
+        if col not in student_data:
+            continue
+        value = student_data[col]
+        if not isinstance(value, (int, float)) or value != value:
+            return f"Field {col} must be a number"
+    return None
+
+def _batch_row_error(index, message):
+    return {
+        'index': index,
+        'status': {
+            'code': 'error',
+            'message': f'Validation failed: {message}'
+        },
+        'error_details': {'issue': message}
+    }
+
+def _predict_batch_scores(student_rows):
+    """Run one encode/scale/predict pass and return (risk_level, score) per row"""
+    bundle = MODELS.current
+    if bundle.is_loaded:
+        try:
+            X = bundle.encoder.transform(student_rows)
+            risk_levels = [str(risk) for risk in predict_risk_levels(X, bundle)]
+            return [(risk, score_for_risk_level(risk)) for risk in risk_levels]
+        except Exception as model_error:
+            logger.error(f"Batch model prediction error: {model_error}")
+    else:
+        logger.warning("Model not loaded, using mock predictions for batch")
+
+    scored = []
+    for row in student_rows:
+        score = calculate_mock_prediction(row)
+        scored.append((determine_risk_level(score), score))
+    return scored
+
+def predict_batch(records, record_errors=None):
+    """Score many students with a single vectorized encode/scale/predict pass.
+
+    Each record may use the flat or nested format accepted by /predict.
+    Results are returned in input order. Rows that fail validation carry an
+    error status instead of failing the whole batch. ``record_errors`` maps
+    row indexes to errors already found while parsing the input.
+    """
+    from diagnosis import diagnose_students, get_student_diagnosis
+
+    record_errors = record_errors or {}
+    results = [None] * len(records)
+    valid_rows = []
+
+    for index, record in enumerate(records):
+        if index in record_errors:
+            results[index] = _batch_row_error(index, record_errors[index])
+            continue
+        if not isinstance(record, dict):
+            results[index] = _batch_row_error(index, "Each record must be a JSON object")
+            continue
+
+        data, _ = normalize_input(record)
+        is_valid, error_msg = validate_input(data)
+        if is_valid:
+            error_msg = _check_numeric_features(data['student_data'])
+        if error_msg:
+            results[index] = _batch_row_error(index, error_msg)
+            continue
+        valid_rows.append((index, data['student_data']))
+
+    if not valid_rows:
+        return results
+
+    student_rows = [student_data for _, student_data in valid_rows]
+    scored = _predict_batch_scores(student_rows)
+    try:
+        # Responses only serialise the diagnoses, so identical rows can share one.
+        diagnoses = diagnose_students(student_rows, [risk_level for risk_level, _ in scored], shared=True)
+    except Exception as diag_error:
+        logger.error(f"Batch diagnosis error, diagnosing row by row: {diag_error}")
+        diagnoses = [None] * len(valid_rows)
+
+    for (index, student_data), (risk_level, score), diagnosis in zip(valid_rows, scored, diagnoses):
+        if diagnosis is None:
+            try:
+                diagnosis = get_student_diagnosis(student_data, risk_level)
+            except Exception as diag_error:
+                logger.error(f"Batch diagnosis error on row {index}: {diag_error}")
+                diagnosis = get_default_diagnosis(risk_level)
+
+        results[index] = {
+            'index': index,
+            'predicted_grade': {
+                'value': float(score),
+                'confidence': 0.85,
+                'subject': student_data.get('subject', 'general')
+            },
+            'risk_level': {
+                'category': risk_level,
+                'score': risk_score_for_level(risk_level),
+                'factors': diagnosis.get('weaknesses', [])
+            },
+            'diagnosis': {
+                'strengths': diagnosis.get('strengths', []),
+                'weaknesses': diagnosis.get('weaknesses', []),
+                'patterns': diagnosis.get('patterns', []),
+                'recommendations': diagnosis.get('recommendations', [])
+            },
+            'status': {'code': 'success'}
+        }
+
+    return results
+
+def _read_batch_records():
+    """Read batch records from a JSON body or a streamed NDJSON body.
+
+    Returns (records, record_errors). NDJSON lines are parsed one at a time so
+    the raw body is never buffered; unparseable lines become per-row errors.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = []
+        record_errors = {}
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            if len(records) > MAX_BATCH_SIZE:
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError as parse_error:
+                record_errors[len(records)] = f"Invalid JSON record: {parse_error}"
+                records.append(None)
+        return records, record_errors
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('students')
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON list of students, an object with a 'students' list, or an NDJSON body")
+    return payload, {}
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch_endpoint():
+    """Predict performance for a whole roster of students in one request"""
+    request_id = g.request_id
+    logger.info(f"[{request_id}] Batch request received")
+
+    try:
+        records, record_errors = _read_batch_records()
+    except ValueError as parse_error:
+        logger.error(f"[{request_id}] Batch parse failed: {parse_error}")
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': str(parse_error),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            }
+        }), 400
+
+    if len(records) > MAX_BATCH_SIZE:
+        logger.error(f"[{request_id}] Batch too large")
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': f'Batch exceeds the maximum of {MAX_BATCH_SIZE} records',
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            }
+        }), 413
+
+    try:
+        results = predict_batch(records, record_errors)
+    except Exception as e:
+        logger.error(f"[{request_id}] Batch endpoint error: {str(e)}")
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'Internal server error',
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            }
+        }), 500
+
+    succeeded = sum(1 for result in results if result['status']['code'] == 'success')
+    logger.info(f"[{request_id}] Batch completed: {succeeded}/{len(results)} rows scored")
+    return jsonify({
+        'results': results,
+        'summary': {
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        },
+        'status': {
+            'code': 'success',
+            'message': 'Batch prediction completed',
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'request_id': request_id
+        }
+    })
+
+def preprocess_input(df):
+    """Preprocess input data to match training format exactly.
+
+    Reference pandas implementation of the built-in layout. FEATURE_ENCODER
+    encodes the same layout and must produce identical rows.
+    """
+    import pandas as pd
+
+    for col, default in CATEGORICAL_DEFAULTS.items():
         if col not in df.columns:
             df[col] = default
             
-    df_encoded = pd.get_dummies(df, columns=list(categorical_defaults.keys()))
+    df_encoded = pd.get_dummies(df, columns=list(CATEGORICAL_DEFAULTS.keys()))
     final_df = pd.DataFrame(index=df.index)
     
-    numeric_defaults = {
-        'age': 17, 'Medu': 2, 'Fedu': 2, 'traveltime': 1, 'studytime': 2, 'failures': 0, 
-        'famrel': 4, 'freetime': 3, 'goout': 3, 'Dalc': 1, 'Walc': 1, 'health': 3, 'absences': 0
-    }
-    
-    for col, default in numeric_defaults.items():
+    for col, default in NUMERIC_DEFAULTS.items():
         final_df[col] = df[col] if col in df.columns else default
             
-    for feat in expected_features:
-        if feat in numeric_defaults:
+    for feat in EXPECTED_FEATURES:
+        if feat in NUMERIC_DEFAULTS:
             continue
         final_df[feat] = df_encoded[feat] if feat in df_encoded.columns else 0
             
-    return final_df[expected_features]
+    return final_df[EXPECTED_FEATURES]
 
 def determine_risk_level(score):
     """Determine risk level based on predicted score"""
@@ -536,26 +966,341 @@ def calculate_mock_prediction(data):
     if data.get('famsup') == 'yes': score += 0.5
     return max(0, min(20, score))
 
+def _public_job(job):
+    return {
+        'id': job['id'],
+        'state': job['state'],
+        'created_at': job['created_at'],
+        'finished_at': job['finished_at']
+    }
+
+@app.route('/coaching/<job_id>', methods=['GET'])
+def coaching_job_status(job_id):
+    """Poll a background coaching job started by /predict in async mode"""
+    job = COACHING_JOBS.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'Unknown or expired coaching job',
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }
+        }), 404
+
+    body = {
+        'job': _public_job(job),
+        'status': {
+            'code': 'error' if job['state'] == FAILED else 'success',
+            'message': f"Coaching job is {job['state']}",
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+    }
+    if job['state'] == DONE:
+        body['ai_coaching'] = job['result']
+        return jsonify(body)
+    if job['state'] == FAILED:
+        return jsonify(body)
+    return jsonify(body), 202
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _ndjson(event, payload):
+    return json.dumps({'event': event, **payload}) + "\n"
+
+def wants_ndjson():
+    """Chunked NDJSON instead of SSE, by ?format=ndjson or the Accept header"""
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Predict, then stream AI coaching one section at a time.
+
+    Emits a ``prediction`` event straight away, a ``section`` event for each
+    coaching section as the LLM completes it, and a final ``done`` event.
+    """
+    request_id = g.request_id
+    logger.info(f"[{request_id}] Streaming request received")
+    try:
+        data, error_response = parse_predict_request(request_id)
+        if error_response is not None:
+            return error_response
+        risk_level, final_grade, diagnosis, goal = score_and_diagnose(data, request_id)
+    except Exception as e:
+        logger.error(f"[{request_id}] Predict stream error: {str(e)}")
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'Internal error occurred',
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': request_id
+            }
+        }), 500
+
+    student_data = data.get('student_data', data)
+    frame = _ndjson if wants_ndjson() else _sse
+
+    def events():
+        yield frame('prediction', {
+            **build_prediction_payload(data, risk_level, final_grade, diagnosis),
+            'request_id': request_id
+        })
+        defaults = get_default_ai_coaching()
+        ai_generated = False
+        try:
+            for name, value in stream_ai_coaching(student_data, diagnosis, risk_level, final_grade, goal):
+                if name == 'ai_generated':
+                    ai_generated = bool(value)
+                    continue
+                yield frame('section', {'name': name, 'value': normalize_coaching_section(name, value, defaults)})
+        except Exception as e:
+            logger.error(f"[{request_id}] Coaching stream error: {e}")
+            yield frame('error', {'message': 'Coaching stream failed', 'request_id': request_id})
+        logger.info(f"[{request_id}] Streaming request completed")
+        yield frame('done', {
+            'ai_generated': ai_generated,
+            'request_id': request_id,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        })
+
+    mimetype = 'application/x-ndjson' if frame is _ndjson else 'text/event-stream'
+    return Response(events(), mimetype=mimetype, headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/coaching/<job_id>/stream', methods=['GET'])
+def coaching_job_stream(job_id):
+    """Server-sent events variant of /coaching/<id> that pushes the result when ready"""
+    if COACHING_JOBS.get(job_id) is None:
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'Unknown or expired coaching job',
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }
+        }), 404
+
+    def events():
+        deadline = time.monotonic() + COACHING_STREAM_TIMEOUT
+        next_keepalive = time.monotonic()
+        while True:
+            job = COACHING_JOBS.get(job_id)
+            if job is None:
+                yield _sse('error', {'message': 'Unknown or expired coaching job'})
+                return
+            if job['state'] == DONE:
+                yield _sse('coaching', {'job': _public_job(job), 'ai_coaching': job['result']})
+                return
+            if job['state'] == FAILED:
+                yield _sse('error', {'job': _public_job(job), 'message': job.get('error', 'Coaching failed')})
+                return
+            if time.monotonic() > deadline:
+                yield _sse('timeout', {'job': _public_job(job)})
+                return
+            if time.monotonic() >= next_keepalive:
+                yield ": keep-alive\n\n"
+                next_keepalive = time.monotonic() + 5
+            time.sleep(0.2)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@METRICS.collector
+def _collect_service_metrics():
+    """Model, cache, coaching and job state read at scrape time"""
+    bundle = MODELS.current
+    yield ('learnscope_model_loaded', 'gauge', 'Whether a trained model is loaded (1) or mock predictions are served (0)',
+           [({'backend': bundle.backend}, int(bundle.is_loaded))])
+    yield ('learnscope_model_reloads_total', 'counter', 'Model reloads swapped in, rejected by the smoke test, and rolled back',
+           [({'result': result}, count) for result, count in sorted(MODELS.stats.items())])
+    yield ('learnscope_ai_available', 'gauge', 'Whether the LLM coach is configured',
+           [({}, int(is_ai_available()))])
+
+    cache = get_cache_stats()
+    if cache is not None:
+        labels = {'backend': cache['backend']}
+        yield ('learnscope_coaching_cache_hits_total', 'counter', 'Coaching cache hits', [(labels, cache['hits'])])
+        yield ('learnscope_coaching_cache_misses_total', 'counter', 'Coaching cache misses', [(labels, cache['misses'])])
+        yield ('learnscope_coaching_cache_hit_ratio', 'gauge', 'Coaching cache hit ratio since start', [(labels, cache['hit_rate'])])
+        yield ('learnscope_coaching_cache_evictions_total', 'counter', 'Coaching cache LRU evictions', [(labels, cache['evictions'])])
+        yield ('learnscope_coaching_cache_errors_total', 'counter', 'Coaching cache backend errors', [(labels, cache['errors'])])
+        yield ('learnscope_coaching_cache_entries', 'gauge', 'Entries in the coaching cache', [(labels, cache['size'])])
+
+    yield ('learnscope_coaching_events_total', 'counter', 'LLM calls, errors, budget overruns and fallbacks',
+           [({'event': event}, count) for event, count in sorted(get_coaching_stats().items())])
+
+    jobs = COACHING_JOBS.stats()
+    yield ('learnscope_coaching_jobs_in_flight', 'gauge', 'Background coaching jobs queued or running', [({}, jobs['in_flight'])])
+    yield ('learnscope_coaching_jobs_rejected_total', 'counter', 'Background coaching jobs rejected because the queue was full',
+           [({}, jobs['rejected'])])
+
+MAX_SEARCH_RESULTS = 20
+
+@app.route('/resources/search', methods=['GET'])
+def search_resources():
+    """Rank the curated resources for a query.
+
+    ?q= searches free text. ?subject= and ?weaknesses= (comma-separated) search
+    for a student instead. ?k= sets the number of results (default 5) and
+    ?tag= keeps only resources listed under that tag.
+    """
+    query = request.args.get('q', '').strip()
+    subject = request.args.get('subject', '').strip()
+    weaknesses = [w.strip() for w in request.args.get('weaknesses', '').split(',') if w.strip()]
+    try:
+        k = int(request.args.get('k', 5))
+    except ValueError:
+        k = 0
+    message = None
+    if not (query or subject or weaknesses):
+        message = 'Provide q, or subject and weaknesses'
+    elif not 1 <= k <= MAX_SEARCH_RESULTS:
+        message = f'k must be a whole number from 1 to {MAX_SEARCH_RESULTS}'
+    if message:
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': message,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'request_id': g.request_id
+            }
+        }), 400
+
+    registry, tag = get_registry(), request.args.get('tag') or None
+    if query:
+        results = registry.search(query, k, tag)
+    else:
+        results = registry.search_for_student(subject, weaknesses, k, tag)
+    return jsonify({'query': query or {'subject': subject, 'weaknesses': weaknesses}, 'results': results})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of request, stage and coaching metrics"""
+    return Response(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/admin/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Most recent request profiles, newest first"""
+    return jsonify({'profiles': PROFILER.list(), 'profiler': PROFILER.stats()})
+
+@app.route('/admin/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download one pstats profile for snakeviz / flameprof / gprof2dot"""
+    path = PROFILER.path_for(name)
+    if path is None:
+        return jsonify({
+            'status': {
+                'code': 'error',
+                'message': 'Unknown or expired profile',
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            }
+        }), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=name)
+
+def _model_admin_error(message, code):
+    return jsonify({
+        'status': {
+            'code': 'error',
+            'message': message,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'request_id': g.request_id
+        },
+        'model': MODELS.describe()
+    }), code
+
+@app.route('/admin/model', methods=['GET'])
+@admin_required
+def model_status():
+    """Served and previous model bundles, reload counts and the last rejection"""
+    return jsonify({'model': MODELS.describe()})
+
+@app.route('/admin/model/reload', methods=['POST'])
+@admin_required
+def reload_model():
+    """Load, smoke-test and swap in the bundle in MODELS_DIR.
+
+    An optional JSON body {"version": "<name>"} loads MODELS_DIR/versions/<name>
+    instead, e.g. one written by incremental.py with --no-activate.
+    """
+    version = (request.get_json(silent=True) or {}).get('version')
+    source = None
+    if version is not None:
+        versions_dir = os.path.join(MODELS_DIR, 'versions')
+        known = os.listdir(versions_dir) if os.path.isdir(versions_dir) else []
+        if version not in known:
+            return _model_admin_error(f'Unknown model version: {version}', 404)
+        source = os.path.join(versions_dir, version)
+    try:
+        MODELS.reload(source)
+    except (FeatureSchemaError, ModelReloadError) as e:
+        return _model_admin_error(f'Model not reloaded: {e}', 422)
+    logger.info(f"[{g.request_id}] Model reloaded by admin request")
+    return jsonify({'model': MODELS.describe()})
+
+@app.route('/admin/model/rollback', methods=['POST'])
+@admin_required
+def rollback_model():
+    """Serve the previous bundle again"""
+    try:
+        MODELS.rollback()
+    except ModelReloadError as e:
+        return _model_admin_error(str(e), 409)
+    logger.info(f"[{g.request_id}] Model rolled back by admin request")
+    return jsonify({'model': MODELS.describe()})
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
+    bundle = MODELS.current
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
-        'scaler_loaded': scaler is not None
+        'model_loaded': bundle.is_loaded,
+        'scaler_loaded': bundle.scaler is not None,
+        'inference_backend': bundle.backend,
+        'model_version': bundle.version
     })
 
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the process is up and answering"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness: warm_up() has finished, so requests will not pay for loading"""
+    bundle = MODELS.current
+    body = {
+        'status': 'ready' if STARTUP['ready'] else 'starting',
+        'model_loaded': bundle.is_loaded,
+        'inference_backend': bundle.backend,
+        'model_version': bundle.version,
+        'startup': {
+            'import_ms': STARTUP['import_ms'],
+            'warm_up_ms': STARTUP['warm_up_ms'],
+            'stages': STARTUP['stages']
+        }
+    }
+    return jsonify(body), 200 if STARTUP['ready'] else 503
+
 @app.route('/ai-status', methods=['GET'])
 def ai_status():
     """Check if AI Coach (LLM) is configured and available"""
     return jsonify({
         'ai_available': is_ai_available(),
         'model': os.environ.get('GROQ_MODEL', 'llama-3.3-70b-versatile'),
-        'provider': 'Groq'
+        'provider': 'Groq',
+        'cache': get_cache_stats(),
+        'coaching': get_coaching_stats(),
+        'latency_budget_ms': LATENCY_BUDGET_MS,
+        'jobs': COACHING_JOBS.stats()
     })
 
+STARTUP['import_ms'] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 3)
+
 if __name__ == '__main__':
-    load_model()
+    warm_up()
+    start_model_watcher()
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('FLASK_ENV') == 'development'
     print(f"Running on http://0.0.0.0:{port}")
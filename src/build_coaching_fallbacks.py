@@ -0,0 +1,69 @@
+"""
+Build the precomputed rule-based coaching file for LearnScope.ai.
+
+Enumerates every student profile the diagnosis rules can tell apart, for each
+risk level, subject and goal horizon, and writes all fallback sections to
+models/coaching_fallbacks.bin. Run from the repository root after changing
+data/resources.json or the rule-based coaching builders:
+
+    python src/build_coaching_fallbacks.py
+"""
+
+import itertools
+import os
+import time
+
+import ai_coach
+from coaching_fallbacks import FallbackTable, write_fallback_table
+from diagnosis import get_student_diagnosis
+from diagnosis_rules import get_rules
+
+RISK_LEVELS = ["At-risk", "Average", "High-performing"]
+# None stands for a request that leaves the subject out.
+SUBJECTS = ["math", "portuguese", None]
+
+# One goal per (horizon, short strategy) combination.
+GOALS = ["Pass the exam", "Pass the course", "Finish revision in 10 days", "Improve overall academic performance"]
+
+SECTIONS = ["weekly_goals", "milestone_goals", "quiz_questions", "study_plan", "resources", "next_steps"]
+
+
+def enumerate_fallbacks():
+    entries = {}
+    # One value for every combination of thresholds in data/diagnosis_rules.json.
+    grid = get_rules().representative_values()
+    fields = list(grid)
+    for values in itertools.product(*grid.values()):
+        # None stands for a field the student left out.
+        profile = {field: value for field, value in zip(fields, values) if value is not None}
+        for risk_level, subject, goal in itertools.product(RISK_LEVELS, SUBJECTS, GOALS):
+            student_data = dict(profile, subject=subject) if subject is not None else dict(profile)
+            diagnosis = get_student_diagnosis(student_data, risk_level)
+            key = ai_coach._fallback_key(student_data, diagnosis, risk_level, goal)
+            if key in entries:
+                continue
+            curated = ai_coach._get_curated_resources(student_data.get("subject", "math"), diagnosis.get("weaknesses", []))
+            entries[key] = ai_coach._fallback_sections(student_data, diagnosis, risk_level, goal, curated)
+    return entries
+
+
+def build(path=ai_coach.FALLBACK_TABLE_PATH):
+    started = time.perf_counter()
+    entries = enumerate_fallbacks()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    stats = write_fallback_table(path, entries, SECTIONS, ai_coach.fallback_fingerprint())
+
+    # Read every entry back to prove the file round-trips exactly.
+    table = FallbackTable(path)
+    for key, sections in entries.items():
+        if table.get(key) != sections:
+            raise RuntimeError(f"Fallback table entry does not round-trip: {key}")
+
+    print(f"Precomputed {stats['keys']} fallback keys from {stats['blobs']} unique sections "
+          f"({stats['bytes'] / 1024:.1f} KiB) in {time.perf_counter() - started:.2f}s")
+    print(f"Coaching fallbacks saved successfully in {path}")
+    return stats
+
+
+if __name__ == "__main__":
+    build()
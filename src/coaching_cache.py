@@ -0,0 +1,211 @@
+"""
+Coaching Cache for LearnScope.ai
+Caches raw LLM coaching responses keyed on a fingerprint of the prompt inputs,
+with TTL expiry and LRU eviction. The storage backend is pluggable:
+
+- memory: per-process OrderedDict (default)
+- sqlite: a local file shared by every worker on the host
+- redis:  any shared store with a redis-py style get/set(ex=) client
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS coaching_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_coaching_cache_access ON coaching_cache(last_access)")
+        self._conn.commit()
+
+    def _connect(self) -> None:
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be used across fork (gunicorn preload_app);
+        # each worker opens its own on first use.
+        if self._pid != os.getpid():
+            self._connect()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM coaching_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM coaching_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE coaching_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO coaching_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM coaching_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM coaching_cache WHERE key IN "
+                    "(SELECT key FROM coaching_cache ORDER BY last_access ASC LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM coaching_cache").fetchone()[0]
+
+
+class SharedBackend:
+    """Wraps a redis-py compatible client. TTL is enforced by the store and
+    LRU eviction by its own policy (e.g. ``maxmemory-policy allkeys-lru``).
+    Any object with ``get(key)`` and ``set(key, value, ex=seconds)`` works,
+    so tests and local runs can substitute an in-process fake."""
+
+    name = "shared"
+
+    def __init__(self, client, prefix: str = "learnscope:coaching:"):
+        self.client = client
+        self.prefix = prefix
+        self.evictions = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> "SharedBackend":
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class CoachingCache:
+    def __init__(self, backend, ttl_seconds: float = 86400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"AI_COACH: Cache read error: {e}")
+            self.errors += 1
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception as e:
+            print(f"AI_COACH: Cache write error: {e}")
+            self.errors += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "errors": self.errors,
+            "size": size,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def cache_from_env() -> Optional[CoachingCache]:
+    """Build the cache selected by COACHING_CACHE_BACKEND (memory|sqlite|redis|off)."""
+    backend_name = os.environ.get("COACHING_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.environ.get("COACHING_CACHE_TTL", 86400))
+    max_entries = int(os.environ.get("COACHING_CACHE_MAX_ENTRIES", 1024))
+    try:
+        if backend_name in ("off", "none", ""):
+            return None
+        if backend_name == "sqlite":
+            path = os.environ.get("COACHING_CACHE_PATH", os.path.join("data", "cache", "coaching_cache.sqlite3"))
+            return CoachingCache(SQLiteBackend(path, max_entries), ttl)
+        if backend_name == "redis":
+            return CoachingCache(SharedBackend.from_url(os.environ["COACHING_CACHE_URL"]), ttl)
+        return CoachingCache(MemoryBackend(max_entries), ttl)
+    except Exception as e:
+        print(f"AI_COACH: Could not start {backend_name} cache, falling back to memory: {e}")
+        return CoachingCache(MemoryBackend(max_entries), ttl)
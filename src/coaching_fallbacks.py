@@ -0,0 +1,132 @@
+"""
+Coaching Fallbacks for LearnScope.ai
+Compact, memory-mapped store of precomputed rule-based coaching payloads.
+
+The rule-based coaching only depends on a small discrete set of inputs, so
+build_coaching_fallbacks.py enumerates all of them offline. Every section is
+serialized once and shared between all keys that produce it. The file is
+mapped read-only at startup, so gunicorn workers share the pages, and a
+section is decoded at most once per process.
+
+Layout (little-endian):
+    header   magic, version, n_keys, n_sections, n_blobs, meta_len
+    meta     JSON: fingerprint, section names, build time
+    digests  uint64[n_keys]              sorted 64-bit key digests
+    table    uint32[n_keys, n_sections]  blob id of each section
+    offsets  uint64[n_blobs + 1]         blob boundaries in the data region
+    data     concatenated UTF-8 JSON blobs
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"LSFALLBK"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIIIQ")
+
+
+def key_digest(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _align(pos: int) -> int:
+    return (pos + 7) & ~7
+
+
+def write_fallback_table(path: str, entries: Dict[str, Dict], sections: List[str], fingerprint: str) -> Dict:
+    """Write ``entries`` (key -> section payloads) to ``path`` and return build stats."""
+    blobs, blob_ids, rows = [], {}, []
+    for key, payload in entries.items():
+        row = []
+        for name in sections:
+            blob = json.dumps(payload[name], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            blob_id = blob_ids.get(blob)
+            if blob_id is None:
+                blob_id = blob_ids[blob] = len(blobs)
+                blobs.append(blob)
+            row.append(blob_id)
+        rows.append((key_digest(key), row))
+    rows.sort(key=lambda r: r[0])
+
+    digests = np.array([d for d, _ in rows], dtype="<u8")
+    if np.unique(digests).size != digests.size:
+        raise ValueError("Two fallback keys share a digest; cannot build an unambiguous index")
+    table = np.array([r for _, r in rows], dtype="<u4").reshape(len(rows), len(sections))
+    offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(b) for b in blobs])
+
+    meta = json.dumps({
+        "fingerprint": fingerprint,
+        "sections": list(sections),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), len(sections), len(blobs), len(meta)))
+        f.write(meta)
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        f.write(digests.tobytes())
+        f.write(table.tobytes())
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        f.write(offsets.tobytes())
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return {"keys": len(rows), "blobs": len(blobs), "bytes": os.path.getsize(path)}
+
+
+class FallbackTable:
+    """Read-only view of a fallback file.
+
+    Each section blob is decoded on first use and then shared by every key
+    and request that refers to it, so callers must treat the returned section
+    values as read-only.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_keys, n_sections, n_blobs, meta_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a coaching fallback file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported coaching fallback format version {version}")
+
+        pos = _HEADER.size
+        meta = json.loads(self._mmap[pos:pos + meta_len])
+        self.fingerprint = meta["fingerprint"]
+        self.sections = tuple(meta["sections"])
+        pos = _align(pos + meta_len)
+        self._digests = np.frombuffer(self._mmap, dtype="<u8", count=n_keys, offset=pos)
+        pos += 8 * n_keys
+        self._table = np.frombuffer(self._mmap, dtype="<u4", count=n_keys * n_sections, offset=pos).reshape(n_keys, n_sections)
+        pos = _align(pos + 4 * n_keys * n_sections)
+        self._offsets = np.frombuffer(self._mmap, dtype="<u8", count=n_blobs + 1, offset=pos)
+        self._data_start = pos + 8 * (n_blobs + 1)
+        self._decoded = {}
+
+    def __len__(self) -> int:
+        return int(self._digests.size)
+
+    def get(self, key: str) -> Optional[Dict]:
+        digest = np.uint64(key_digest(key))
+        i = int(np.searchsorted(self._digests, digest))
+        if i >= self._digests.size or self._digests[i] != digest:
+            return None
+        return {name: self._section(blob_id) for name, blob_id in zip(self.sections, self._table[i].tolist())}
+
+    def _section(self, blob_id: int):
+        value = self._decoded.get(blob_id)
+        if value is None:
+            start = self._data_start + int(self._offsets[blob_id])
+            end = self._data_start + int(self._offsets[blob_id + 1])
+            value = self._decoded[blob_id] = json.loads(self._mmap[start:end])
+        return value
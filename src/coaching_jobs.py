@@ -0,0 +1,125 @@
+"""
+Coaching Jobs for LearnScope.ai
+Runs slow LLM coaching calls on a bounded background executor so a request
+can return the model prediction immediately and deliver coaching later.
+
+Job state is kept as JSON in one of the coaching cache backends, so with the
+sqlite or redis backend any worker can answer a poll for a job another worker
+started. When gunicorn runs more than one worker (WEB_CONCURRENCY) the
+default backend is sqlite, since an in-memory job is invisible to the others.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from coaching_cache import MemoryBackend, SharedBackend, SQLiteBackend
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class CoachingJobs:
+    def __init__(self, store=None, max_workers: int = 4, max_pending: int = 64, ttl_seconds: float = 600):
+        self.store = store or MemoryBackend(max_entries=max_pending * 16)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so gunicorn workers never inherit a forked pool.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="coaching")
+        return self._executor
+
+    def _save(self, job: Dict) -> None:
+        self.store.set(f"job:{job['id']}", json.dumps(job), self.ttl_seconds)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        raw = self.store.get(f"job:{job_id}")
+        return json.loads(raw) if raw else None
+
+    def submit(self, fn: Callable[..., Dict], *args, **kwargs) -> Optional[Dict]:
+        """Queue ``fn`` and return the pending job, or None if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            return None
+        job = {"id": str(uuid.uuid4()), "state": PENDING, "created_at": time.time(), "finished_at": None}
+        self._save(job)
+        try:
+            self._get_executor().submit(self._run, dict(job), fn, args, kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        return job
+
+    def _run(self, job: Dict, fn: Callable[..., Dict], args, kwargs) -> None:
+        try:
+            job["state"] = RUNNING
+            self._save(job)
+            job["result"] = fn(*args, **kwargs)
+            job["state"] = DONE
+        except Exception as e:
+            print(f"AI_COACH: Background coaching job {job['id']} failed: {e}")
+            job["state"] = FAILED
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            try:
+                self._save(job)
+            finally:
+                self._slots.release()
+
+    def stats(self) -> Dict:
+        # BoundedSemaphore keeps its counter in _value; it is only read here.
+        in_flight = self.max_pending - self._slots._value
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "rejected": self.rejected,
+        }
+
+
+def server_workers() -> int:
+    """Worker processes gunicorn starts by default (its WEB_CONCURRENCY setting)."""
+    return max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+
+
+def jobs_from_env() -> CoachingJobs:
+    """Build the job runner configured by the COACHING_JOBS_* variables.
+
+    Raises RuntimeError when several workers are configured and the shared
+    job store cannot be opened, rather than silently keeping jobs per worker.
+    """
+    max_workers = int(os.environ.get("COACHING_JOBS_WORKERS", 4))
+    max_pending = int(os.environ.get("COACHING_JOBS_MAX_PENDING", 64))
+    ttl = float(os.environ.get("COACHING_JOBS_TTL", 600))
+    workers = server_workers()
+    backend_name = (os.environ.get("COACHING_JOBS_BACKEND") or ("sqlite" if workers > 1 else "memory")).lower()
+    store = None
+    try:
+        if backend_name == "sqlite":
+            path = os.environ.get("COACHING_JOBS_PATH", os.path.join("data", "cache", "coaching_jobs.sqlite3"))
+            store = SQLiteBackend(path, max_entries=max_pending * 16)
+        elif backend_name == "redis":
+            store = SharedBackend.from_url(os.environ["COACHING_JOBS_URL"])
+    except Exception as e:
+        if workers > 1:
+            raise RuntimeError(f"Could not start {backend_name} job store for {workers} workers: {e}") from e
+        print(f"AI_COACH: Could not start {backend_name} job store, falling back to memory: {e}")
+    if store is None and workers > 1:
+        print(f"AI_COACH: Coaching jobs are kept per worker with {workers} workers; a poll may miss a job another worker started")
+    return CoachingJobs(store, max_workers=max_workers, max_pending=max_pending, ttl_seconds=ttl)
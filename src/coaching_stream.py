@@ -0,0 +1,66 @@
+"""
+Coaching Stream for LearnScope.ai
+Incremental parser for the coaching JSON object the LLM streams back. Each
+top-level member is handed out as soon as its closing ',' or '}' arrives, so a
+section can be repaired and forwarded long before the whole completion exists.
+"""
+
+import json
+from typing import Iterator, Tuple
+
+
+class JsonSectionParser:
+    """Split a streamed JSON object into its top-level (key, value) members.
+
+    Anything before the opening '{' or after the closing '}' is ignored. Only
+    string state and nesting depth are tracked while scanning; each
+    member is handed to ``json.loads`` once it is complete, so malformed
+    members raise ``ValueError`` just like a full parse would.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = None
+        self.finished = False
+
+    def feed(self, text: str) -> Iterator[Tuple[str, object]]:
+        """Add streamed text and yield every member it completes."""
+        self._buffer += text
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            self._pos += 1
+            # Text around the object (a preamble, a code fence) is skipped.
+            if self.finished or (self._depth == 0 and char != "{"):
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos
+            elif char in "}]" or (char == "," and self._depth == 1):
+                if self._depth == 1:
+                    member = buffer[self._member_start:self._pos - 1]
+                    self._member_start = self._pos
+                    if member.strip():
+                        yield next(iter(json.loads("{" + member + "}").items()))
+                if char != ",":
+                    self._depth -= 1
+                    self.finished = self._depth == 0
+        # Drop text that belongs to members already handed out.
+        if self._member_start is not None and self._member_start > 0:
+            self._buffer = self._buffer[self._member_start:]
+            self._pos -= self._member_start
+            self._member_start = 0
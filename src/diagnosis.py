@@ -1,30 +1,25 @@
 """
 Diagnosis Service for LearnScope.ai
 This module provides rule-based diagnosis of student performance factors.
+
+The thresholds live in data/diagnosis_rules.json (see diagnosis_rules.py).
+get_student_diagnosis diagnoses one student. diagnose_students evaluates the
+same compiled rules for a whole roster as boolean masks over columns and
+returns the same dictionaries, in order.
 """
 
-def get_student_diagnosis(student_data, risk_level, predicted_score=None):
-    """ Expert-level academic diagnosis analyzed from student performance metrics. """
-    weakness_map = [
-        ("failures", student_data.get('failures', 0) >= 1, "past academic failures", 10),
-        ("absences", student_data.get('absences', 0) > 10, "high absenteeism", 8),
-        ("studytime", student_data.get('studytime', 2) <= 1, "low weekly study engagement", 5),
-        ("health", student_data.get('health', 3) <= 2, "physical or mental health barriers", 3),
-        ("goout", student_data.get('goout', 3) >= 4, "excessive social distractions", 3)
-    ]
-    
-    found_weaknesses = sorted([w for w in weakness_map if w[1]], key=lambda x: x[3], reverse=True)
-    top_weaknesses = [w[2] for w in found_weaknesses[:3]]
-    
-    strength_map = [
-        (student_data.get('failures', 0) == 0, "excellent academic history"),
-        (student_data.get('absences', 0) < 5, "consistent school attendance"),
-        (student_data.get('studytime', 2) >= 3, "strong self-study discipline"),
-        (student_data.get('higher') == "yes", "clear long-term academic ambition"),
-        (student_data.get('famsup') == "yes", "reliable family support network")
-    ]
-    all_strengths = [s[1] for s in strength_map if s[0]]
-    top_strengths = all_strengths[:3]
+import numpy as np
+
+from diagnosis_rules import get_rules
+
+RISK_LEVELS = ["At-risk", "Average", "High-performing"]
+# Distinct (clause truths, risk level) combinations kept per rule set.
+MEMO_SIZE = 4096
+
+
+def _compose(rules, selected, risk_level):
+    """Build the diagnosis from the rules that apply to a student."""
+    top_weaknesses, top_strengths, profile, patterns, recommendations = selected
 
     reason = ""
     if risk_level == "At-risk":
@@ -46,63 +41,134 @@ def get_student_diagnosis(student_data, risk_level, predicted_score=None):
         else:
             reason = "The student maintains a highly stable and efficient learning routine with no major risks detected."
 
-    profile = "Standard Profile"
-    f_val = student_data.get('failures', 0)
-    a_val = student_data.get('absences', 0)
-    s_val = student_data.get('studytime', 2)
-    g_val = student_data.get('goout', 3)
-
-    if f_val >= 1 and a_val > 10:
-        profile = "Academically At-Risk"
-    elif s_val >= 3 and f_val == 0:
-        profile = "Disciplined Achiever"
-    elif s_val <= 1 and g_val >= 4:
-        profile = "Distracted Learner"
-    elif student_data.get('health', 3) <= 2:
-        profile = "Vulnerable Student"
-    elif student_data.get('higher') == "yes" and s_val >= 2:
-        profile = "Goal-Oriented Student"
-
-    # Generate patterns based on combined analysis
-    patterns = []
-    if f_val >= 1 and a_val > 10:
-        patterns.append("Recurring academic failure combined with poor attendance")
-    if s_val <= 1 and g_val >= 4:
-        patterns.append("Low study time with high social engagement")
-    if student_data.get('health', 3) <= 2 and a_val > 5:
-        patterns.append("Health issues impacting school attendance")
-    if s_val >= 3 and f_val == 0:
-        patterns.append("Consistent study habits with no academic failures")
-    
-    # Generate actionable recommendations
-    recommendations = []
-    if f_val >= 1:
-        recommendations.append("Review past failures with teachers to identify root causes")
-    if a_val > 10:
-        recommendations.append("Create a plan to reduce absenteeism and catch up on missed work")
-    if s_val <= 1:
-        recommendations.append("Increase weekly study time to at least 2-5 hours")
-    if student_data.get('health', 3) <= 2:
-        recommendations.append("Prioritize health and wellness to improve academic focus")
-    if g_val >= 4:
-        recommendations.append("Balance social activities with academic responsibilities")
-    if s_val >= 3:
-        recommendations.append("Maintain current study habits and consider advanced challenges")
-    
-    # Ensure at least 3 recommendations
-    if len(recommendations) < 3:
-        default_recs = [
-            "Set specific, measurable academic goals for each subject",
-            "Establish a consistent daily study routine",
-            "Seek help from teachers or peers when concepts are unclear"
-        ]
-        recommendations.extend(default_recs[:(3 - len(recommendations))])
-    
+    # Ensure a minimum number of recommendations
+    missing = rules.limits['min_recommendations'] - len(recommendations)
+    if missing > 0:
+        recommendations = recommendations + rules.default_recommendations[:missing]
+
     return {
         "weaknesses": top_weaknesses,
         "strengths": top_strengths,
         "patterns": patterns,
-        "recommendations": recommendations[:5],
+        "recommendations": recommendations[:rules.limits['max_recommendations']],
         "reason": reason,
         "profile": profile
     }
+
+
+def _copy(diagnosis):
+    """A diagnosis with its own lists, so callers may modify it."""
+    return {
+        "weaknesses": diagnosis["weaknesses"][:],
+        "strengths": diagnosis["strengths"][:],
+        "patterns": diagnosis["patterns"][:],
+        "recommendations": diagnosis["recommendations"][:],
+        "reason": diagnosis["reason"],
+        "profile": diagnosis["profile"]
+    }
+
+
+def get_student_diagnosis(student_data, risk_level, predicted_score=None, rules=None):
+    """ Expert-level academic diagnosis analyzed from student performance metrics. """
+    rules = rules or get_rules()
+    key = (rules.evaluate(student_data), risk_level)
+    diagnosis = rules.memo.get(key)
+    if diagnosis is None:
+        diagnosis = _compose(rules, rules.select(key[0]), risk_level)
+        if len(rules.memo) >= MEMO_SIZE:
+            rules.memo.clear()
+        rules.memo[key] = diagnosis
+    return _copy(diagnosis)
+
+
+def _field_columns(rules, students, columns):
+    """Return (field -> column array, row count) for the fields the rules read."""
+    if hasattr(students, 'columns') and hasattr(students, 'iloc'):
+        n = len(students)
+        present = {f: students[f].to_numpy() for f in rules.fields if f in students.columns}
+    elif isinstance(students, np.ndarray):
+        if columns is None:
+            raise ValueError("columns are required to diagnose a 2-D array")
+        n = len(students)
+        present = {f: students[:, list(columns).index(f)] for f in rules.fields if f in columns}
+    elif isinstance(students, dict):
+        n = len(next(iter(students.values()))) if students else 0
+        present = {f: np.asarray(students[f]) for f in rules.fields if f in students}
+    else:
+        n = len(students)
+        present = {
+            f: np.array([s.get(f, d) for s in students], dtype=object if f in rules.text_fields else None)
+            for f, d in rules.fields.items()
+        }
+
+    fields = {}
+    for field, default in rules.fields.items():
+        if field in rules.text_fields:
+            fields[field] = np.asarray(present[field], dtype=object) if field in present else np.full(n, default, dtype=object)
+            continue
+        column = np.asarray(present[field]) if field in present else np.full(n, default)
+        if column.dtype.kind not in 'biuf':
+            raise TypeError(f"{field} must be numeric to diagnose a roster")
+        fields[field] = column
+    return fields, n
+
+
+def _first_k(mask, k):
+    """Keep the first k True entries of each row."""
+    return mask & (np.cumsum(mask, axis=1) <= k)
+
+
+def diagnose_students(students, risk_levels, columns=None, shared=False, rules=None):
+    """Diagnose a roster in one pass; row i equals get_student_diagnosis(students[i], risk_levels[i]).
+
+    students may be a DataFrame, a list of student dicts, a dict of columns or
+    a 2-D array whose column names are given in ``columns``. Every rule clause
+    is evaluated as a mask over the whole roster. Rows are then grouped by
+    which clauses hold (and by risk level), so each distinct diagnosis is
+    built once. With ``shared=True`` rows in the same group get the same
+    dict, which callers must not modify. Raises TypeError when a numeric
+    field holds non-numbers.
+    """
+    rules = rules or get_rules()
+    fields, n = _field_columns(rules, students, columns)
+    if n == 0:
+        return []
+    hits = rules.evaluate_columns(fields)
+
+    risk = np.asarray(risk_levels, dtype=object)
+    risk_codes = np.where(risk == RISK_LEVELS[0], 0, np.where(risk == RISK_LEVELS[1], 1, 2)).astype(np.uint8)
+    if hits.shape[1] < 62:
+        keys = (hits.astype(np.int64) @ (1 << np.arange(hits.shape[1], dtype=np.int64))) * 3 + risk_codes
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    else:
+        keys = np.column_stack([np.packbits(hits, axis=1), risk_codes])
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    unique = hits[first]
+
+    def section(rule_list, limit=None):
+        mask = unique[:, [c for c, _ in rule_list]] if rule_list else np.zeros((len(unique), 0), dtype=bool)
+        return _first_k(mask, limit) if limit is not None else mask, [label for _, label in rule_list]
+
+    # Weaknesses are already in weight order, so the heaviest k are the first k present.
+    weaknesses, weakness_labels = section(rules.weaknesses, rules.limits['weaknesses'])
+    strengths, strength_labels = section(rules.strengths, rules.limits['strengths'])
+    profiles, profile_labels = section(rules.profiles, 1)
+    patterns, pattern_labels = section(rules.patterns)
+    recommendations, recommendation_labels = section(rules.recommendations)
+
+    built = []
+    for g in range(len(unique)):
+        matched_profile = np.flatnonzero(profiles[g])
+        selected = (
+            [weakness_labels[j] for j in np.flatnonzero(weaknesses[g])],
+            [strength_labels[j] for j in np.flatnonzero(strengths[g])],
+            profile_labels[matched_profile[0]] if len(matched_profile) else rules.default_profile,
+            [pattern_labels[j] for j in np.flatnonzero(patterns[g])],
+            [recommendation_labels[j] for j in np.flatnonzero(recommendations[g])]
+        )
+        built.append(_compose(rules, selected, RISK_LEVELS[risk_codes[first[g]]]))
+
+    groups = inverse.ravel().tolist()
+    if shared:
+        return [built[g] for g in groups]
+    return [_copy(built[g]) for g in groups]
@@ -0,0 +1,242 @@
+"""
+Diagnosis rule table for LearnScope.ai
+data/diagnosis_rules.json declares every diagnosis threshold as a condition
+such as "absences > 10". compile_rules() turns the table into a deduplicated
+set of predicates and clauses (the conditions a rule needs together). A
+condition shared by a weakness, a profile, a pattern and a recommendation is
+evaluated once per student, and the result is reused by every section.
+
+The compiled rules run in two modes over the same predicates: evaluate() for
+one student dict, and evaluate_columns() for a roster held as column arrays.
+get_rules() re-reads the file when it changes, so thresholds can be tuned
+without a deploy.
+"""
+
+import json
+import logging
+import operator
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RULES_PATH = os.environ.get('DIAGNOSIS_RULES_PATH', os.path.join('data', 'diagnosis_rules.json'))
+# Seconds between checks of the rules file for edits.
+RULES_CHECK_INTERVAL = float(os.environ.get('DIAGNOSIS_RULES_CHECK_INTERVAL', 5))
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne
+}
+SECTIONS = ('weaknesses', 'strengths', 'profiles', 'patterns', 'recommendations')
+
+
+class RuleError(ValueError):
+    """The rule table is malformed."""
+
+
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text.strip('"\'')
+
+
+def parse_condition(text, fields):
+    """Parse "field op value" into (field, op, value)."""
+    parts = str(text).split()
+    if len(parts) != 3:
+        raise RuleError(f"Condition {text!r} must look like 'field op value'")
+    field, op, raw = parts
+    if field not in fields:
+        raise RuleError(f"Condition {text!r} uses undeclared field {field!r}")
+    if op not in OPERATORS:
+        raise RuleError(f"Condition {text!r} uses unknown operator {op!r}")
+    value = _parse_value(raw)
+    if isinstance(value, str) and op not in ('==', '!='):
+        raise RuleError(f"Condition {text!r} can only compare text with == or !=")
+    return field, op, value
+
+
+class CompiledRules:
+    """A rule table compiled to deduplicated predicates and clauses."""
+
+    def __init__(self, table, source=None):
+        try:
+            self.fields = {name: spec.get('default') for name, spec in table['fields'].items()}
+            limits = table['limits']
+            self.limits = {key: int(limits[key]) for key in
+                           ('weaknesses', 'strengths', 'min_recommendations', 'max_recommendations')}
+            self.default_profile = str(table['default_profile'])
+            self.default_recommendations = [str(text) for text in table['default_recommendations']]
+            sections = {name: table[name] for name in SECTIONS}
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise RuleError(f"Rule table is missing or has a malformed entry: {e}")
+        if self.limits['min_recommendations'] > len(self.default_recommendations):
+            raise RuleError("min_recommendations is larger than the default recommendations list")
+        self.source = source
+
+        # Clause i < len(predicates) is predicate i alone; rules needing several
+        # conditions at once get the clause ids after those.
+        self.predicates = []
+        predicate_ids = {}
+
+        def parse(when):
+            conditions = [when] if isinstance(when, str) else list(when or [])
+            if not conditions:
+                raise RuleError("Every rule needs at least one condition")
+            ids = []
+            for condition in conditions:
+                predicate = parse_condition(condition, self.fields)
+                if predicate not in predicate_ids:
+                    predicate_ids[predicate] = len(self.predicates)
+                    self.predicates.append(predicate)
+                ids.append(predicate_ids[predicate])
+            return tuple(sorted(set(ids)))
+
+        parsed = {}
+        for name, rules in sections.items():
+            try:
+                parsed[name] = [(parse(rule['when']), str(rule['label']), float(rule.get('weight', 0))) for rule in rules]
+            except RuleError:
+                raise
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                raise RuleError(f"Malformed {name} rule: {e}")
+
+        self.compound = []
+        compound_ids = {}
+
+        def clause(ids):
+            if len(ids) == 1:
+                return ids[0]
+            if ids not in compound_ids:
+                compound_ids[ids] = len(self.predicates) + len(self.compound)
+                self.compound.append(ids)
+            return compound_ids[ids]
+
+        compiled = {name: [(clause(ids), label, weight) for ids, label, weight in rules] for name, rules in parsed.items()}
+        self.clauses = [(i,) for i in range(len(self.predicates))] + self.compound
+        # Heaviest first; sorted() is stable, so equal weights keep their file order.
+        self.weaknesses = [(c, label) for c, label, _ in sorted(compiled['weaknesses'], key=lambda r: r[2], reverse=True)]
+        self.strengths = [(c, label) for c, label, _ in compiled['strengths']]
+        self.profiles = [(c, label) for c, label, _ in compiled['profiles']]
+        self.patterns = [(c, label) for c, label, _ in compiled['patterns']]
+        self.recommendations = [(c, label) for c, label, _ in compiled['recommendations']]
+
+        self.text_fields = {field for field, _, value in self.predicates if isinstance(value, str)}
+        self._checks = [(field, self.fields[field], OPERATORS[op], value) for field, op, value in self.predicates]
+        # Compound clauses are almost always pairs, and `a and b` is cheaper than all().
+        self._pairs = self.compound if all(len(ids) == 2 for ids in self.compound) else None
+        # Diagnoses already built from these rules, keyed by (clause truths, risk level).
+        self.memo = {}
+
+    def evaluate(self, student):
+        """Truth of every clause for one student dict, as a tuple; each predicate is evaluated once."""
+        get = student.get
+        values = [op(get(field, default), value) for field, default, op, value in self._checks]
+        if self._pairs is not None:
+            values += [values[a] and values[b] for a, b in self._pairs]
+        else:
+            values += [all([values[i] for i in ids]) for ids in self.compound]
+        return tuple(values)
+
+    def evaluate_columns(self, columns):
+        """(rows x clauses) boolean matrix for a roster of field -> column array."""
+        values = [np.asarray(op(columns[field], value), dtype=bool) for field, _, op, value in self._checks]
+        values.extend(np.logical_and.reduce([values[i] for i in ids]) for ids in self.compound)
+        return np.column_stack(values)
+
+    def select(self, hits):
+        """Sections that apply for one row of clause truths: (weaknesses, strengths, profile, patterns, recommendations)."""
+        profile = self.default_profile
+        for c, label in self.profiles:
+            if hits[c]:
+                profile = label
+                break
+        return (
+            [label for c, label in self.weaknesses if hits[c]][:self.limits['weaknesses']],
+            [label for c, label in self.strengths if hits[c]][:self.limits['strengths']],
+            profile,
+            [label for c, label in self.patterns if hits[c]],
+            [label for c, label in self.recommendations if hits[c]]
+        )
+
+    def representative_values(self):
+        """For each field, values covering every combination of its predicates (e.g. to enumerate profiles)."""
+        values = {}
+        for field, default in self.fields.items():
+            checks = [(OPERATORS[op], value) for f, op, value in self.predicates if f == field]
+            if field in self.text_fields:
+                candidates = [value for _, value in checks] + [None]
+            else:
+                candidates = sorted({c for _, value in checks for c in (value - 1, value, value + 1) if c >= 0})
+            seen = {}
+            for candidate in candidates:
+                try:
+                    signature = tuple(op(candidate, value) for op, value in checks)
+                except TypeError:
+                    continue
+                seen.setdefault(signature, candidate)
+            values[field] = list(seen.values()) or [default]
+        return values
+
+
+def compile_rules(table, source=None):
+    return CompiledRules(table, source)
+
+
+def load_rules(path=None):
+    """Read and compile a rule file; raises RuleError (or OSError) when it cannot be used."""
+    path = path or RULES_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            table = json.load(f)
+        except ValueError as e:
+            raise RuleError(f"{path} is not valid JSON: {e}")
+    return compile_rules(table, source=path)
+
+
+_RULES = None
+_RULES_STAMP = None
+_RULES_CHECKED = 0.0
+_RULES_LOCK = threading.Lock()
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_rules():
+    """The compiled rules in RULES_PATH, re-read when the file changes.
+
+    An edit that does not compile is logged and the previous rules stay in
+    use. Raises when there are no rules to fall back on.
+    """
+    global _RULES, _RULES_STAMP, _RULES_CHECKED
+    if _RULES is not None and time.monotonic() - _RULES_CHECKED < RULES_CHECK_INTERVAL:
+        return _RULES
+    with _RULES_LOCK:
+        stamp = _file_stamp(RULES_PATH)
+        if _RULES is None or stamp != _RULES_STAMP:
+            try:
+                rules = load_rules(RULES_PATH)
+            except (OSError, RuleError) as e:
+                if _RULES is None:
+                    raise
+                logger.error(f"Keeping the current diagnosis rules, {RULES_PATH} could not be used: {e}")
+            else:
+                if _RULES is not None:
+                    logger.info(f"Diagnosis rules reloaded from {RULES_PATH}")
+                _RULES = rules
+            _RULES_STAMP = stamp
+        _RULES_CHECKED = time.monotonic()
+    return _RULES
@@ -0,0 +1,90 @@
+"""
+Feature Encoder for LearnScope.ai
+Compiles the training feature layout into a NumPy encoder so the API can turn
+student dicts into model rows without going through pandas on every request.
+"""
+
+import numpy as np
+
+
+class FeatureEncoder:
+    """Encode student dicts into the one-hot feature layout used in training.
+
+    The column-index map and a row template holding every default are built
+    once. Encoding a student copies the template and only touches the fields
+    the student actually provided. Rows are float64 like the pandas path, so
+    non-integer inputs reach the scaler unrounded.
+    """
+
+    def __init__(self, expected_features, categorical_defaults, numeric_defaults, dtype=np.float64):
+        self.columns = tuple(expected_features)
+        self.dtype = np.dtype(dtype)
+        index = {name: i for i, name in enumerate(self.columns)}
+
+        template = np.zeros(len(self.columns), dtype=self.dtype)
+
+        numeric = []
+        for col, default in numeric_defaults.items():
+            if col in index:
+                template[index[col]] = default
+                numeric.append((col, index[col]))
+
+        categorical = []
+        for col, default in categorical_defaults.items():
+            prefix = f"{col}_"
+            vocab = {
+                name[len(prefix):]: i
+                for name, i in index.items()
+                if name.startswith(prefix) and name not in numeric_defaults
+            }
+            default_idx = vocab.get(str(default))
+            if default_idx is not None:
+                template[default_idx] = 1
+            categorical.append((col, default_idx, vocab))
+
+        self._template = template
+        self._numeric = tuple(numeric)
+        self._categorical = tuple(categorical)
+
+    @classmethod
+    def from_schema(cls, schema, dtype=np.float64):
+        """Build an encoder from a feature schema written by train.py."""
+        return cls(schema['columns'], schema['categorical_defaults'], schema['numeric_defaults'], dtype=dtype)
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    def encode_into(self, student, row):
+        """Write one student dict into a preallocated feature row."""
+        row[:] = self._template
+        for col, idx in self._numeric:
+            if col in student:
+                value = student[col]
+                try:
+                    row[idx] = value
+                except (TypeError, ValueError):
+                    raise ValueError(f"Field {col} must be a number") from None
+        for col, default_idx, vocab in self._categorical:
+            if col in student:
+                if default_idx is not None:
+                    row[default_idx] = 0
+                value = student[col]
+                if value is None or value != value:
+                    continue
+                idx = vocab.get(str(value))
+                if idx is not None:
+                    row[idx] = 1
+        return row
+
+    def transform(self, students, out=None):
+        """Encode a sequence of student dicts into an (n_rows, n_features) block."""
+        if out is None:
+            out = np.empty((len(students), len(self.columns)), dtype=self.dtype)
+        for i, student in enumerate(students):
+            self.encode_into(student, out[i])
+        return out
+
+    def transform_one(self, student):
+        """Encode a single student dict into a (1, n_features) block."""
+        return self.transform([student])
@@ -0,0 +1,168 @@
+"""
+Feature Schema for LearnScope.ai
+Describes the exact feature layout a trained model expects. train.py writes it
+next to the model and the API builds its encoder from it at load time, so the
+serving feature layout can never drift from what training produced.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+SCHEMA_VERSION = 1
+
+# Built-in layout used when a model was trained before schemas were emitted.
+EXPECTED_FEATURES = [
+    'age', 'Medu', 'Fedu', 'traveltime', 'studytime', 'failures', 'famrel',
+    'freetime', 'goout', 'Dalc', 'Walc', 'health', 'absences',
+    'school_MS', 'sex_M', 'address_U', 'famsize_LE3', 'Pstatus_T',
+    'Mjob_health', 'Mjob_other', 'Mjob_services', 'Mjob_teacher',
+    'Fjob_health', 'Fjob_other', 'Fjob_services', 'Fjob_teacher',
+    'reason_home', 'reason_other', 'reason_reputation',
+    'guardian_mother', 'guardian_other', 'schoolsup_yes', 'famsup_yes',
+    'paid_yes', 'activities_yes', 'nursery_yes', 'higher_yes',
+    'internet_yes', 'romantic_yes', 'subject_portuguese'
+]
+
+# Values assumed for fields a student leaves out of a request.
+CATEGORICAL_DEFAULTS = {
+    'school': 'GP', 'sex': 'F', 'address': 'U', 'famsize': 'GT3', 'Pstatus': 'T',
+    'Mjob': 'other', 'Fjob': 'other', 'reason': 'course', 'guardian': 'mother',
+    'schoolsup': 'no', 'famsup': 'no', 'paid': 'no', 'activities': 'no',
+    'nursery': 'yes', 'higher': 'yes', 'internet': 'yes', 'romantic': 'no',
+    'subject': 'math'
+}
+
+NUMERIC_DEFAULTS = {
+    'age': 17, 'Medu': 2, 'Fedu': 2, 'traveltime': 1, 'studytime': 2, 'failures': 0,
+    'famrel': 4, 'freetime': 3, 'goout': 3, 'Dalc': 1, 'Walc': 1, 'health': 3, 'absences': 0
+}
+
+
+class FeatureSchemaError(Exception):
+    """Raised when a model, scaler and feature schema do not belong together."""
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def columns_fingerprint(columns):
+    return hashlib.sha256(json.dumps(list(columns)).encode('utf-8')).hexdigest()
+
+
+def build_feature_schema(features_df, feature_names, scaler, model, model_path, scaler_path):
+    """Describe the fitted feature layout of a trained model.
+
+    ``features_df`` is the cleaned frame before one-hot encoding and
+    ``feature_names`` the encoded columns in the order the scaler was fit on.
+    """
+    columns = [str(c) for c in feature_names]
+    categorical_cols = [c for c in features_df.columns if features_df[c].dtype.kind == 'O']
+    numeric_cols = [c for c in features_df.columns if c not in categorical_cols]
+
+    categories = {col: sorted(str(v) for v in features_df[col].unique()) for col in categorical_cols}
+    categorical_defaults = {
+        col: CATEGORICAL_DEFAULTS.get(col, str(features_df[col].mode().iloc[0]))
+        for col in categorical_cols
+    }
+    numeric_defaults = {
+        col: NUMERIC_DEFAULTS.get(col, int(features_df[col].median()))
+        for col in numeric_cols
+    }
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'columns': columns,
+        'fingerprint': columns_fingerprint(columns),
+        'numeric_defaults': numeric_defaults,
+        'categorical_defaults': categorical_defaults,
+        'categories': categories,
+        'scaler': _scaler_section(scaler, scaler_path),
+        'model': _model_section(model, model_path),
+    }
+
+
+def refresh_feature_schema(schema, scaler, model, model_path, scaler_path):
+    """Copy ``schema`` for a model updated in place on the same columns."""
+    return {
+        **schema,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'scaler': _scaler_section(scaler, scaler_path),
+        'model': _model_section(model, model_path),
+    }
+
+
+def _scaler_section(scaler, scaler_path):
+    return {
+        'mean': [float(v) for v in scaler.mean_],
+        'scale': [float(v) for v in scaler.scale_],
+        'var': [float(v) for v in scaler.var_],
+        'n_samples_seen': int(scaler.n_samples_seen_),
+        'sha256': file_sha256(scaler_path),
+    }
+
+
+def _model_section(model, model_path):
+    return {
+        'type': type(model).__name__,
+        'classes': [str(c) for c in model.classes_],
+        'n_features': int(model.n_features_in_),
+        'sha256': file_sha256(model_path),
+    }
+
+
+def save_feature_schema(schema, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_feature_schema(path):
+    """Load a schema file, or return None when the model predates schemas."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        schema = json.load(f)
+    if schema.get('schema_version') != SCHEMA_VERSION:
+        raise FeatureSchemaError(
+            f"Unsupported feature schema version {schema.get('schema_version')} (expected {SCHEMA_VERSION})"
+        )
+    if schema.get('fingerprint') != columns_fingerprint(schema.get('columns', [])):
+        raise FeatureSchemaError("Feature schema column fingerprint does not match its columns")
+    return schema
+
+
+def verify_artifacts(schema, model, scaler, model_path, scaler_path):
+    """Return a list of reasons the loaded model/scaler do not match the schema."""
+    problems = []
+    columns = schema['columns']
+
+    if os.path.exists(model_path) and file_sha256(model_path) != schema['model']['sha256']:
+        problems.append(f"{model_path} is not the model this schema was trained with")
+    if os.path.exists(scaler_path) and file_sha256(scaler_path) != schema['scaler']['sha256']:
+        problems.append(f"{scaler_path} is not the scaler this schema was trained with")
+
+    if model is not None:
+        if getattr(model, 'n_features_in_', len(columns)) != len(columns):
+            problems.append(f"model expects {model.n_features_in_} features, schema has {len(columns)}")
+        classes = [str(c) for c in getattr(model, 'classes_', [])]
+        if classes and classes != schema['model']['classes']:
+            problems.append("model classes do not match the schema")
+
+    if scaler is not None:
+        fitted = getattr(scaler, 'feature_names_in_', None)
+        if fitted is not None and [str(c) for c in fitted] != columns:
+            problems.append("scaler feature names do not match the schema columns")
+        if [float(v) for v in scaler.mean_] != schema['scaler']['mean'] or \
+                [float(v) for v in scaler.scale_] != schema['scaler']['scale']:
+            problems.append("scaler statistics do not match the schema")
+
+    return problems
@@ -0,0 +1,264 @@
+"""
+Incremental Training for LearnScope.ai
+Folds a file of newly graded records into the served model without touching
+the full history, so an update costs time in proportion to the new rows only.
+
+- The scaler statistics are updated with ``partial_fit``.
+- Linear models continue as an ``SGDClassifier`` (log loss). The current
+  coefficients are first re-expressed for the updated scaler, so the model
+  starts from exactly the decisions it made before. A multinomial
+  ``LogisticRegression`` becomes a one-vs-rest model: SGD trains one binary
+  classifier per class, so its probabilities and later updates differ from a
+  multinomial refit.
+- Random forests keep every existing tree, with thresholds moved to the
+  updated scaler, and grow new trees on the delta with ``warm_start``.
+
+Every update is written to models/versions/<version>/ and then promoted over
+the served artifacts. The files are replaced one at a time under a marker
+file, and the API retries a load until the marker is gone and the hashes agree. The feature
+columns never change; a record with an unseen category needs a full retrain.
+
+Run from the repository root:
+    python src/incremental.py data/new_grades.csv --subject math
+"""
+
+import argparse
+import copy
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import SGDClassifier
+from sklearn.utils.class_weight import compute_class_weight, compute_sample_weight
+
+from feature_encoder import FeatureEncoder
+from feature_schema import file_sha256, load_feature_schema, refresh_feature_schema, save_feature_schema
+from inference_kernel import export_inference_kernel
+from model_bundle import PROMOTING_FILE
+from ingestion import downcast_integers, read_student_csv
+from preprocessing import create_risk_label
+
+MODELS_DIR = "models"
+ARTIFACTS = ("final_model.pkl", "scaler.pkl", "feature_schema.json", "inference_kernel.npz")
+MANIFEST = "manifest.json"
+
+
+def load_graded_records(path, subject=None):
+    """Read new graded records (same layout as the UCI files) and label them."""
+    df = read_student_csv(path)
+    if "subject" not in df.columns:
+        if subject is None:
+            raise ValueError(f"{path} has no subject column; pass the subject explicitly")
+        df["subject"] = subject
+    # Rows still missing a grade (or any other field) are left for a later update.
+    df = downcast_integers(create_risk_label(df).dropna().drop_duplicates())
+    return df.drop(columns=[c for c in ("G1", "G2", "G3") if c in df.columns])
+
+
+def encode_records(df, schema):
+    """Encode labelled records into the schema's columns; returns (X, y)."""
+    fields = list(schema["numeric_defaults"]) + list(schema["categorical_defaults"])
+    missing = [f for f in fields if f not in df.columns]
+    if missing:
+        raise ValueError(f"New records are missing fields: {missing}")
+    for col, known in schema["categories"].items():
+        unseen = sorted(set(df[col].astype(str)) - set(known))
+        if unseen:
+            raise ValueError(f"Unseen {col} values {unseen}; run a full retrain to add new categories")
+
+    encoder = FeatureEncoder.from_schema(schema)
+    X = encoder.transform(df[fields].to_dict("records"))
+    return X, df["risk_level"].astype(str).to_numpy()
+
+
+def update_scaler(scaler, X):
+    updated = copy.deepcopy(scaler)
+    # Encoded rows have no column names; the schema keeps the column order.
+    if hasattr(updated, "feature_names_in_"):
+        del updated.feature_names_in_
+    updated.partial_fit(X)
+    return updated
+
+
+def remap_linear(coef, intercept, old_scaler, new_scaler):
+    """Rewrite a linear model on old-scaled inputs as one on new-scaled inputs."""
+    ratio = new_scaler.scale_ / old_scaler.scale_
+    shift = (new_scaler.mean_ - old_scaler.mean_) / old_scaler.scale_
+    return coef * ratio, intercept + coef @ shift
+
+
+def remap_forest(model, old_scaler, new_scaler):
+    """Move every split threshold of a fitted forest to the new scaled space, in place."""
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        feature = tree.feature[split]
+        raw = tree.threshold[split] * old_scaler.scale_[feature] + old_scaler.mean_[feature]
+        tree.threshold[split] = (raw - new_scaler.mean_[feature]) / new_scaler.scale_[feature]
+
+
+def update_linear(model, old_scaler, new_scaler, X_scaled, y, epochs=5, eta0=0.01, balanced=True):
+    coef, intercept = remap_linear(
+        np.asarray(model.coef_, dtype=np.float64), np.asarray(model.intercept_, dtype=np.float64),
+        old_scaler, new_scaler
+    )
+    n_seen = int(new_scaler.n_samples_seen_)
+    if isinstance(model, SGDClassifier):
+        # Keep the penalty per sample constant as the history grows.
+        updated = clone(model).set_params(alpha=model.alpha * int(old_scaler.n_samples_seen_) / n_seen)
+    else:
+        # LogisticRegression's C, written as SGD's per-sample alpha.
+        updated = SGDClassifier(
+            loss="log_loss", alpha=1.0 / (model.C * n_seen), learning_rate="constant", eta0=eta0, random_state=42
+        )
+    updated.classes_ = np.asarray(model.classes_)
+    updated.coef_ = coef
+    updated.intercept_ = intercept
+    updated.n_features_in_ = coef.shape[1]
+
+    # partial_fit cannot take class_weight="balanced", so weight the rows instead.
+    sample_weight = compute_sample_weight("balanced", y) if balanced else None
+    for _ in range(epochs):
+        updated.partial_fit(X_scaled, y, sample_weight=sample_weight)
+    return updated
+
+
+def update_forest(model, old_scaler, new_scaler, X_scaled, y, new_trees=None):
+    missing = sorted(set(map(str, model.classes_)) - set(y))
+    if missing:
+        # warm_start refits classes_ from the new rows, so every class must be present.
+        raise ValueError(f"New records contain no {missing} rows; a forest update needs every class")
+
+    updated = copy.deepcopy(model)
+    remap_forest(updated, old_scaler, new_scaler)
+    if new_trees is None:
+        share = len(y) / int(old_scaler.n_samples_seen_)
+        new_trees = max(5, int(round(len(updated.estimators_) * share)))
+    class_weight = updated.class_weight
+    if class_weight in ("balanced", "balanced_subsample"):
+        # The presets would be recomputed from the delta anyway; spell them out.
+        weights = compute_class_weight("balanced", classes=updated.classes_, y=y)
+        updated.set_params(class_weight=dict(zip(updated.classes_, weights)))
+    updated.set_params(warm_start=True, n_estimators=len(updated.estimators_) + new_trees)
+    updated.fit(X_scaled, y)
+    updated.set_params(warm_start=False, class_weight=class_weight)
+    return updated
+
+
+def _current_version(models_dir, schema):
+    path = os.path.join(models_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    # A full retrain since the last update leaves a stale manifest behind.
+    if manifest.get("artifacts", {}).get("final_model.pkl") != schema["model"]["sha256"]:
+        return None
+    return manifest.get("version")
+
+
+def promote(version_dir, models_dir):
+    """Copy a version's artifacts over the served ones.
+
+    Each file is swapped in with an atomic rename, but the set is not, so
+    PROMOTING_FILE marks the directory while the files are mixed. Loaders
+    (model_bundle.BundleSlot) wait for it to go before trusting a mismatch.
+    """
+    marker = os.path.join(models_dir, PROMOTING_FILE)
+    with open(marker, "w") as f:
+        f.write(os.path.basename(version_dir))
+    try:
+        for name in ARTIFACTS + (MANIFEST,):
+            tmp_path = os.path.join(models_dir, f"{name}.tmp")
+            shutil.copyfile(os.path.join(version_dir, name), tmp_path)
+            os.replace(tmp_path, os.path.join(models_dir, name))
+    finally:
+        os.remove(marker)
+
+
+def update_model(records_path, subject=None, models_dir=MODELS_DIR, epochs=5, new_trees=None, activate=True):
+    """Update the served model with new graded records and return the manifest."""
+    schema = load_feature_schema(os.path.join(models_dir, "feature_schema.json"))
+    if schema is None:
+        raise FileNotFoundError("No feature schema found; run train.py first")
+    model = joblib.load(os.path.join(models_dir, "final_model.pkl"))
+    scaler = joblib.load(os.path.join(models_dir, "scaler.pkl"))
+
+    X, y = encode_records(load_graded_records(records_path, subject), schema)
+    if len(y) == 0:
+        raise ValueError(f"{records_path} has no usable graded records")
+
+    new_scaler = update_scaler(scaler, X)
+    X_scaled = new_scaler.transform(X)
+    if hasattr(model, "coef_"):
+        new_model = update_linear(model, scaler, new_scaler, X_scaled, y, epochs=epochs)
+    elif hasattr(model, "estimators_"):
+        new_model = update_forest(model, scaler, new_scaler, X_scaled, y, new_trees=new_trees)
+    else:
+        raise TypeError(f"Cannot update a {type(model).__name__} incrementally")
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    version_dir = os.path.join(models_dir, "versions", version)
+    os.makedirs(version_dir)
+    model_path = os.path.join(version_dir, "final_model.pkl")
+    scaler_path = os.path.join(version_dir, "scaler.pkl")
+    joblib.dump(new_model, model_path)
+    joblib.dump(new_scaler, scaler_path)
+    new_schema = refresh_feature_schema(schema, new_scaler, new_model, model_path, scaler_path)
+    save_feature_schema(new_schema, os.path.join(version_dir, "feature_schema.json"))
+    export_inference_kernel(new_model, new_scaler, new_schema, os.path.join(version_dir, "inference_kernel.npz"))
+
+    predictions = new_model.predict(X_scaled)
+    manifest = {
+        "version": version,
+        "parent": _current_version(models_dir, schema),
+        "parent_model_sha256": schema["model"]["sha256"],
+        "mode": "incremental",
+        "created_at": new_schema["created_at"],
+        "model_type": type(new_model).__name__,
+        "records": {
+            "path": records_path,
+            "sha256": file_sha256(records_path),
+            "rows": int(len(y)),
+            "accuracy": round(float(np.mean(predictions == y)), 4),
+        },
+        "n_samples_seen": int(new_scaler.n_samples_seen_),
+        "artifacts": {name: file_sha256(os.path.join(version_dir, name)) for name in ARTIFACTS},
+    }
+    with open(os.path.join(version_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    if activate:
+        promote(version_dir, models_dir)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the LearnScope.ai risk model with new graded records")
+    parser.add_argument("records", help="semicolon-separated CSV of new records including G3")
+    parser.add_argument("--subject", choices=["math", "portuguese"], help="subject for files without a subject column")
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--epochs", type=int, default=5, help="passes over the new records (linear models)")
+    parser.add_argument("--trees", type=int, default=None, help="trees to add (forests; default scales with the delta)")
+    parser.add_argument("--no-activate", action="store_true", help="write the version without serving it")
+    args = parser.parse_args()
+
+    manifest = update_model(
+        args.records,
+        subject=args.subject,
+        models_dir=args.models_dir,
+        epochs=args.epochs,
+        new_trees=args.trees,
+        activate=not args.no_activate
+    )
+    print(f"Version {manifest['version']} built from {manifest['records']['rows']} new records "
+          f"({manifest['n_samples_seen']} seen in total)")
+    print(f"Accuracy on the new records: {manifest['records']['accuracy'] * 100:.2f} %")
+    if args.no_activate:
+        print(f"Artifacts written to {os.path.join(args.models_dir, 'versions', manifest['version'])}")
+    else:
+        print(f"Artifacts promoted to {args.models_dir}/")
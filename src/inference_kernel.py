@@ -0,0 +1,190 @@
+"""
+Inference Kernel for LearnScope.ai
+Exports the fitted scaler + classifier as plain NumPy arrays and scores rows
+with them, so the API can predict without sklearn's per-call validation or
+even importing sklearn.
+
+- Linear models: the StandardScaler is folded into the coefficients, so a
+  prediction is one affine map plus argmax.
+- Random forests: every tree is flattened into shared node arrays and all
+  trees are walked together, one depth level per step.
+
+The kernel is an uncompressed .npz whose members start on 64-byte
+boundaries, so ``KernelPredictor.load`` can map the arrays straight from the
+file. Processes that load the same kernel then share its pages through the
+page cache instead of each holding a private copy.
+"""
+
+import io
+import mmap
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+KERNEL_VERSION = 1
+ALIGNMENT = 64
+# Extra-field id used by Android's zipalign for padding; readers skip it.
+_ALIGN_EXTRA_ID = 0xD935
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+
+
+def _scaler_arrays(scaler, n_features):
+    if scaler is None:
+        return np.zeros(n_features), np.ones(n_features)
+    return np.asarray(scaler.mean_, dtype=np.float64), np.asarray(scaler.scale_, dtype=np.float64)
+
+
+def export_inference_kernel(model, scaler, schema, path):
+    """Write a fused kernel for ``model`` (and the scaler in front of it) to ``path``."""
+    n_features = int(model.n_features_in_)
+    mean, scale = _scaler_arrays(scaler, n_features)
+    arrays = {
+        'version': np.array(KERNEL_VERSION),
+        'classes': np.asarray([str(c) for c in model.classes_]),
+        'schema_fingerprint': np.array(schema['fingerprint']),
+        'model_sha256': np.array(schema['model']['sha256']),
+        'n_features': np.array(n_features),
+    }
+
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        arrays['kind'] = np.array('linear')
+        arrays['weights'] = (coef / scale).T.copy()
+        arrays['bias'] = np.asarray(model.intercept_, dtype=np.float64) - (coef * (mean / scale)).sum(axis=1)
+    elif hasattr(model, 'estimators_'):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            # Leaves point at themselves so finished walks stay put.
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            proba = tree.value[:, 0, :]
+            values.append(proba / proba.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += tree.node_count
+        arrays['kind'] = np.array('forest')
+        arrays['mean'] = mean
+        arrays['scale'] = scale
+        arrays['feature'] = np.concatenate(features).astype(np.intp)
+        arrays['threshold'] = np.concatenate(thresholds)
+        arrays['left'] = np.concatenate(lefts).astype(np.intp)
+        arrays['right'] = np.concatenate(rights).astype(np.intp)
+        arrays['value'] = np.concatenate(values)
+        arrays['roots'] = np.asarray(roots, dtype=np.intp)
+        arrays['max_depth'] = np.array(max(e.tree_.max_depth for e in model.estimators_))
+    else:
+        raise TypeError(f"Cannot export an inference kernel for {type(model).__name__}")
+
+    tmp_path = f"{path}.tmp"
+    _write_aligned_npz(tmp_path, arrays)
+    # Replace rather than rewrite: a server may still have the old file mapped.
+    os.replace(tmp_path, path)
+
+
+def _write_aligned_npz(path, arrays):
+    with open(path, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as zf:
+        for name, array in arrays.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.asanyarray(array), allow_pickle=False)
+            info = zipfile.ZipInfo(f"{name}.npy", date_time=(1980, 1, 1, 0, 0, 0))
+            # Pad the local header so the .npy (and, by its own 64-byte header
+            # padding, the array data) starts on an aligned offset.
+            data_start = f.tell() + _LOCAL_HEADER.size + len(info.filename.encode('utf-8')) + 4
+            padding = -data_start % ALIGNMENT
+            info.extra = struct.pack('<HH', _ALIGN_EXTRA_ID, padding) + bytes(padding)
+            zf.writestr(info, buffer.getvalue())
+
+
+def _map_npz(path):
+    """Map every array of an uncompressed .npz read-only; None if the file cannot be mapped."""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            header = _LOCAL_HEADER.unpack_from(buffer, info.header_offset)
+            start = info.header_offset + _LOCAL_HEADER.size + header[9] + header[10]
+            member = io.BytesIO(buffer[start:start + min(info.file_size, 4096)])
+            version = np.lib.format.read_magic(member)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(member)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(member)
+            else:
+                return None
+            offset = start + member.tell()
+            if dtype.hasobject or offset % dtype.alignment:
+                return None
+            count = int(np.prod(shape, dtype=np.int64))
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            arrays[info.filename[:-len('.npy')]] = array.reshape(shape, order='F' if fortran_order else 'C')
+    return arrays
+
+
+class KernelPredictor:
+    """NumPy-only predictor loaded from an exported inference kernel."""
+
+    def __init__(self, arrays):
+        self.kind = str(arrays['kind'])
+        self.classes = np.asarray(arrays['classes'])
+        self.schema_fingerprint = str(arrays['schema_fingerprint'])
+        self.model_sha256 = str(arrays['model_sha256'])
+        self.n_features = int(arrays['n_features'])
+        self._arrays = {name: arrays[name] for name in arrays}
+
+        if self.kind == 'linear':
+            self._weights = self._arrays['weights']
+            self._bias = self._arrays['bias']
+        elif self.kind == 'forest':
+            self._mean = self._arrays['mean']
+            self._scale = self._arrays['scale']
+            self._feature = self._arrays['feature']
+            self._threshold = self._arrays['threshold']
+            self._left = self._arrays['left']
+            self._right = self._arrays['right']
+            self._value = self._arrays['value']
+            self._roots = self._arrays['roots']
+            self._max_depth = int(self._arrays['max_depth'])
+        else:
+            raise ValueError(f"Unknown inference kernel kind: {self.kind}")
+
+    @classmethod
+    def load(cls, path, memory_map=True):
+        """Load a kernel, mapping its arrays from the file when ``memory_map`` is set."""
+        data = _map_npz(path) if memory_map else None
+        if data is None:
+            with np.load(path, allow_pickle=False) as npz:
+                data = {name: npz[name] for name in npz.files}
+        if int(data['version']) != KERNEL_VERSION:
+            raise ValueError(f"Unsupported inference kernel version {int(data['version'])}")
+        return cls(data)
+
+    def decision_scores(self, X):
+        """Return per-class scores (logits for linear, probabilities for forests)."""
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == 'linear':
+            return X @ self._weights + self._bias
+
+        # Match sklearn: scale in float64, then compare in float32 like tree.apply.
+        X_scaled = ((X - self._mean) / self._scale).astype(np.float32)
+        rows = np.arange(X_scaled.shape[0])[:, None]
+        nodes = np.broadcast_to(self._roots, (X_scaled.shape[0], self._roots.size))
+        for _ in range(self._max_depth):
+            go_left = X_scaled[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return self._value[nodes].mean(axis=1)
+
+    def predict(self, X):
+        scores = self.decision_scores(X)
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(np.intp)]
+        return self.classes[np.argmax(scores, axis=1)]
@@ -0,0 +1,105 @@
+"""
+Data Ingestion for LearnScope.ai
+Reads the semicolon-separated UCI student files with explicit compact dtypes
+and caches the merged, cleaned frame as Parquet.
+
+- Ordinal 1-5 scales, counts and grades are int8 (absences int16). They are
+  parsed as nullable Int8/Int16 so a blank cell becomes NA instead of a parse
+  error, and downcast to plain int8/int16 once no NA is left.
+- Text fields (yes/no flags, jobs, school, ...) are pandas categoricals whose
+  categories are the sorted values seen, so one-hot encoding produces the
+  same columns, in the same order, as the plain object columns did.
+- The cache key covers the bytes of every source file, so editing or
+  replacing a file invalidates it.
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from feature_schema import file_sha256
+
+# Bump when the dtypes or cleaning steps change, to invalidate old caches.
+INGEST_VERSION = 1
+DATASET_CACHE_DIR = os.path.join("data", "cache", "dataset")
+
+INT8_COLUMNS = (
+    "age", "Medu", "Fedu", "traveltime", "studytime", "failures", "famrel",
+    "freetime", "goout", "Dalc", "Walc", "health", "G1", "G2", "G3"
+)
+INT16_COLUMNS = ("absences",)
+CATEGORY_COLUMNS = (
+    "school", "sex", "address", "famsize", "Pstatus", "Mjob", "Fjob", "reason",
+    "guardian", "schoolsup", "famsup", "paid", "activities", "nursery",
+    "higher", "internet", "romantic"
+)
+
+STUDENT_DTYPES = {
+    **{col: "Int8" for col in INT8_COLUMNS},
+    **{col: "Int16" for col in INT16_COLUMNS},
+    **{col: "category" for col in CATEGORY_COLUMNS},
+}
+
+
+def downcast_integers(df):
+    """Turn nullable Int8/Int16 columns that hold no NA into plain int8/int16."""
+    casts = {
+        col: dtype.name.lower() for col, dtype in df.dtypes.items()
+        if dtype.name in ("Int8", "Int16") and not df[col].hasnans
+    }
+    return df.astype(casts) if casts else df
+
+
+def read_student_csv(path, subject=None):
+    """Read one UCI student file with compact dtypes; columns with blank cells stay nullable."""
+    df = downcast_integers(pd.read_csv(path, sep=";", dtype=STUDENT_DTYPES))
+    if subject is not None:
+        df["subject"] = pd.Categorical([subject] * len(df))
+    return df
+
+
+def concat_students(frames):
+    """Concatenate typed frames, merging category sets instead of falling back to object."""
+    merged = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            merged[col] = union_categoricals([f[col] for f in frames], sort_categories=True)
+    return merged
+
+
+def clean_students(df):
+    """Drop incomplete and duplicate rows, then forget categories no row uses."""
+    df = downcast_integers(df.dropna().drop_duplicates().reset_index(drop=True))
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _cache_key(sources):
+    digest = hashlib.sha256(f"ingest-v{INGEST_VERSION}".encode("utf-8"))
+    for subject, path in sources:
+        digest.update(f"\0{subject}\0{file_sha256(path)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_students(sources, cache_dir=DATASET_CACHE_DIR):
+    """Load, merge and clean ``[(subject, path), ...]``, reusing the Parquet cache when it is current."""
+    path = os.path.join(cache_dir, f"{_cache_key(sources)}.parquet") if cache_dir else None
+    if path and os.path.exists(path):
+        return pd.read_parquet(path)
+
+    df = clean_students(concat_students([read_student_csv(p, subject) for subject, p in sources]))
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except ImportError:
+            # No Parquet engine installed: serve uncached.
+            return df
+        os.replace(tmp_path, path)
+    return df
@@ -0,0 +1,357 @@
+"""
+Model bundles for LearnScope.ai
+A bundle is everything needed to score a student: the feature schema, the
+encoder built from it, and either the inference kernel or the sklearn model
+and scaler. The API serves from one bundle at a time and replaces it by
+rebinding a single reference. A request that already picked up a bundle
+finishes on it; the next request sees the new one.
+
+BundleSlot holds the served bundle and the one before it (for rollback).
+It checks every replacement against a small built-in smoke set before
+swapping it in, and can poll the models directory for new artifacts.
+"""
+
+import logging
+import os
+import threading
+import time
+import warnings
+from datetime import datetime, timezone
+
+from feature_encoder import FeatureEncoder
+from feature_schema import (
+    CATEGORICAL_DEFAULTS, EXPECTED_FEATURES, NUMERIC_DEFAULTS,
+    FeatureSchemaError, load_feature_schema, verify_artifacts
+)
+from inference_kernel import KernelPredictor
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = 'final_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+SCHEMA_FILE = 'feature_schema.json'
+KERNEL_FILE = 'inference_kernel.npz'
+# incremental.py writes the manifest last when it promotes a version.
+WATCHED_FILES = (MODEL_FILE, SCALER_FILE, SCHEMA_FILE, KERNEL_FILE, 'manifest.json')
+# Present in the models directory while incremental.py replaces the artifacts.
+PROMOTING_FILE = '.promoting'
+# Seconds a load waits for a promote in progress before giving up.
+PROMOTE_WAIT = 10
+
+RISK_LEVELS = ('At-risk', 'Average', 'High-performing')
+
+# Students every new bundle must score before it is served: the all-defaults
+# row, the extremes of the ordinal features, and every category present.
+SMOKE_STUDENTS = [
+    {},
+    {'studytime': 1, 'failures': 3, 'absences': 40, 'goout': 5, 'Dalc': 5, 'Walc': 5, 'health': 1,
+     'higher': 'no', 'internet': 'no', 'schoolsup': 'yes', 'romantic': 'yes'},
+    {'studytime': 4, 'failures': 0, 'absences': 0, 'goout': 1, 'Dalc': 1, 'Walc': 1, 'health': 5,
+     'Medu': 4, 'Fedu': 4, 'higher': 'yes', 'internet': 'yes', 'famsup': 'yes', 'paid': 'yes'},
+    {'school': 'MS', 'sex': 'M', 'age': 19, 'address': 'R', 'famsize': 'LE3', 'Pstatus': 'A',
+     'Mjob': 'health', 'Fjob': 'teacher', 'reason': 'reputation', 'guardian': 'other', 'subject': 'portuguese'},
+]
+
+
+class ModelReloadError(Exception):
+    """A bundle was not swapped in; the served bundle is unchanged."""
+
+
+class ModelBundle:
+    """Schema, encoder and predictor that were loaded together."""
+
+    def __init__(self, encoder, schema=None, model=None, scaler=None, kernel=None, source=None):
+        self.encoder = encoder
+        self.schema = schema
+        self.model = model
+        self.scaler = scaler
+        self.kernel = kernel
+        self.source = source
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+    @property
+    def is_loaded(self):
+        return self.kernel is not None or self.model is not None
+
+    @property
+    def backend(self):
+        return 'kernel' if self.kernel is not None else 'sklearn'
+
+    @property
+    def version(self):
+        """Short hash of the model file, or None for a bundle without a schema"""
+        return self.schema['model']['sha256'][:12] if self.schema else None
+
+    def predict(self, X):
+        """Predict risk categories for an encoded feature block"""
+        if self.kernel is not None:
+            return self.kernel.predict(X)
+        with warnings.catch_warnings():
+            # Scalers trained before fitting moved to plain arrays still carry column names.
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            if self.scaler:
+                X = self.scaler.transform(X)
+            return self.model.predict(X)
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'model_loaded': self.is_loaded,
+            'inference_backend': self.backend,
+            'features': len(self.encoder.columns)
+        }
+
+
+def default_encoder():
+    """Encoder for the built-in feature layout, used before a schema is loaded"""
+    return FeatureEncoder(EXPECTED_FEATURES, CATEGORICAL_DEFAULTS, NUMERIC_DEFAULTS)
+
+
+def _load_kernel(schema, kernel_path, backend, memory_map):
+    """Load the fused inference kernel if it was exported for this schema"""
+    if backend != 'kernel' or schema is None or not os.path.exists(kernel_path):
+        return None
+    loaded = KernelPredictor.load(kernel_path, memory_map=memory_map)
+    if loaded.schema_fingerprint != schema['fingerprint'] or loaded.model_sha256 != schema['model']['sha256']:
+        raise FeatureSchemaError(f"{kernel_path} was not exported from the model this schema describes")
+    if [str(c) for c in loaded.classes] != schema['model']['classes'] or loaded.n_features != len(schema['columns']):
+        raise FeatureSchemaError(f"{kernel_path} classes or feature count do not match the schema")
+    return loaded
+
+
+def load_bundle(models_dir, backend='kernel', memory_map=True):
+    """Load the artifacts in models_dir into a bundle.
+
+    When a verified inference kernel is available the sklearn pickles are not
+    unpickled at all. Raises FeatureSchemaError when the artifacts were not
+    produced by the same training run.
+    """
+    model_path = os.path.join(models_dir, MODEL_FILE)
+    scaler_path = os.path.join(models_dir, SCALER_FILE)
+    model = scaler = None
+
+    schema = load_feature_schema(os.path.join(models_dir, SCHEMA_FILE))
+    kernel = _load_kernel(schema, os.path.join(models_dir, KERNEL_FILE), backend, memory_map)
+    if kernel is not None:
+        logger.info(f"SUCCESS: Inference kernel loaded ({kernel.kind})")
+    else:
+        try:
+            import joblib
+            if os.path.exists(model_path):
+                model = joblib.load(model_path, mmap_mode='r' if memory_map else None)
+                logger.info("SUCCESS: Model loaded successfully")
+            else:
+                logger.warning("WARNING: Model not found. Please train the model first.")
+
+            if os.path.exists(scaler_path):
+                scaler = joblib.load(scaler_path, mmap_mode='r' if memory_map else None)
+                logger.info("SUCCESS: Scaler loaded successfully")
+        except Exception as e:
+            logger.error(f"Error loading model: {e}")
+
+    if schema is None:
+        logger.warning("WARNING: Feature schema not found, using the built-in feature layout. Retrain to emit one.")
+        encoder = default_encoder()
+        columns = list(EXPECTED_FEATURES)
+    else:
+        problems = verify_artifacts(schema, model, scaler, model_path, scaler_path)
+        if problems:
+            raise FeatureSchemaError("; ".join(problems))
+        encoder = FeatureEncoder.from_schema(schema)
+        columns = schema['columns']
+        logger.info(f"SUCCESS: Feature schema loaded ({len(columns)} features)")
+
+    fitted_features = getattr(scaler, 'feature_names_in_', None)
+    if fitted_features is not None and [str(c) for c in fitted_features] != columns:
+        raise FeatureSchemaError("scaler feature names do not match the API feature layout")
+
+    return ModelBundle(encoder, schema, model, scaler, kernel, source=models_dir)
+
+
+def smoke_test(bundle):
+    """Return a list of reasons the bundle cannot serve SMOKE_STUDENTS."""
+    if not bundle.is_loaded:
+        return ["no model or inference kernel was loaded"]
+    try:
+        X = bundle.encoder.transform(SMOKE_STUDENTS)
+        predictions = [str(p) for p in bundle.predict(X)]
+    except Exception as e:
+        return [f"scoring the smoke set failed: {e}"]
+
+    problems = []
+    if len(predictions) != len(SMOKE_STUDENTS):
+        problems.append(f"{len(predictions)} predictions for {len(SMOKE_STUDENTS)} smoke students")
+    known = bundle.schema['model']['classes'] if bundle.schema else RISK_LEVELS
+    unknown = sorted(set(predictions) - set(known))
+    if unknown:
+        problems.append(f"unknown risk levels {unknown}")
+    single = [str(bundle.predict(bundle.encoder.transform_one(s))[0]) for s in SMOKE_STUDENTS]
+    if single != predictions:
+        problems.append("single-row and batch predictions disagree")
+    return problems
+
+
+def promotion_in_progress(models_dir):
+    return os.path.exists(os.path.join(models_dir, PROMOTING_FILE))
+
+
+def artifact_signature(models_dir):
+    """(name, mtime_ns, size) of each watched file; changes when a deploy replaces one"""
+    signature = []
+    for name in WATCHED_FILES:
+        try:
+            stat = os.stat(os.path.join(models_dir, name))
+        except FileNotFoundError:
+            continue
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class BundleSlot:
+    """The served bundle, the previous one, and the reload/rollback operations.
+
+    Readers take ``slot.current`` once per request and use only that bundle.
+    Reloads and rollbacks are serialised by a lock; readers never wait on it.
+    """
+
+    def __init__(self, bundle, models_dir, loader=load_bundle):
+        self.current = bundle
+        self.previous = None
+        self.models_dir = models_dir
+        self.loader = loader
+        self.stats = {'reloaded': 0, 'rejected': 0, 'rolled_back': 0}
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._pending = None
+        self._watcher_pid = None
+        self._watch_interval = 0
+
+    def _swap(self, bundle):
+        self.previous, self.current = self.current, bundle
+
+    def _load_settled(self, source):
+        """Load source as (bundle, signature), retrying while a promote is replacing its files.
+
+        A load that overlaps a promote can read the new model next to the old
+        schema; the mismatch is only final once the files stop changing.
+        """
+        deadline = time.monotonic() + PROMOTE_WAIT
+        while True:
+            signature = artifact_signature(source)
+            try:
+                return self.loader(source), signature
+            except FeatureSchemaError:
+                changing = promotion_in_progress(source) or artifact_signature(source) != signature
+                if not changing or time.monotonic() >= deadline:
+                    raise
+            time.sleep(0.05)
+
+    def load(self):
+        """Load models_dir at startup and serve it without the smoke test"""
+        with self._lock:
+            bundle, signature = self._load_settled(self.models_dir)
+            self._swap(bundle)
+            self._signature = signature
+            return bundle
+
+    def reset(self, bundle):
+        """Serve a bundle unconditionally (e.g. the empty one after a failed load)"""
+        with self._lock:
+            self._swap(bundle)
+
+    def reload(self, models_dir=None):
+        """Load models_dir (default: the watched directory), smoke-test it and swap it in.
+
+        Raises FeatureSchemaError or ModelReloadError and keeps serving the
+        current bundle when the new one cannot be loaded or fails the smoke set.
+        """
+        source = models_dir or self.models_dir
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                bundle, signature = self._load_settled(source)
+                problems = smoke_test(bundle)
+                if problems:
+                    raise ModelReloadError(f"{source} failed the smoke test: " + "; ".join(problems))
+            except (FeatureSchemaError, ModelReloadError) as e:
+                self.stats['rejected'] += 1
+                self.last_error = str(e)
+                logger.error(f"Model reload rejected, still serving {self.current.version}: {e}")
+                raise
+            self._swap(bundle)
+            if source == self.models_dir:
+                self._signature = signature
+            self.stats['reloaded'] += 1
+            self.last_error = None
+            logger.info(f"Model reloaded from {source} in {(time.perf_counter() - started) * 1000:.1f} ms: "
+                        f"{self.previous.version} -> {bundle.version}")
+            return bundle
+
+    def rollback(self):
+        """Serve the previous bundle again; the current one becomes the previous"""
+        with self._lock:
+            if self.previous is None:
+                raise ModelReloadError("There is no previous model to roll back to")
+            self._swap(self.previous)
+            self.stats['rolled_back'] += 1
+            logger.info(f"Model rolled back: {self.previous.version} -> {self.current.version}")
+            return self.current
+
+    def poll(self):
+        """Reload when the watched files changed and have stayed unchanged for one poll.
+
+        Waiting one poll lets a deploy that replaces the files one at a time
+        finish before the bundle is loaded. Returns the new bundle or None.
+        """
+        if promotion_in_progress(self.models_dir):
+            return None
+        signature = artifact_signature(self.models_dir)
+        if signature == self._signature:
+            self._pending = None
+            return None
+        if signature != self._pending:
+            self._pending = signature
+            return None
+        self._pending = None
+        try:
+            return self.reload()
+        except (FeatureSchemaError, ModelReloadError):
+            # Do not retry the same files on every poll; the next deploy changes the signature.
+            self._signature = signature
+            return None
+
+    def start_watcher(self, interval):
+        """Poll the models directory every interval seconds in a daemon thread.
+
+        Threads do not survive fork, so call this in each worker; calling it
+        again in the same process is a no-op.
+        """
+        if interval <= 0 or self._watcher_pid == os.getpid():
+            return False
+        self._watcher_pid = os.getpid()
+        self._watch_interval = interval
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Model watcher error: {e}")
+
+        threading.Thread(target=watch, name='model-watcher', daemon=True).start()
+        logger.info(f"Watching {self.models_dir} for new models every {interval:g} s")
+        return True
+
+    def describe(self):
+        return {
+            'current': self.current.describe(),
+            'previous': self.previous.describe() if self.previous is not None else None,
+            'models_dir': self.models_dir,
+            'watch_interval_s': self._watch_interval if self._watcher_pid == os.getpid() else 0,
+            'stats': dict(self.stats),
+            'last_error': self.last_error
+        }
@@ -0,0 +1,201 @@
+"""
+Model Selection for LearnScope.ai
+Cross-validated comparison of candidate models for train.py.
+
+Every (candidate, fold) pair is an independent job run on a joblib process
+pool, so the grid scales with the number of cores. Each fold scales its own
+training rows, so no statistics leak from the validation rows. Finished fold
+results are cached on disk under a key covering the data, the candidate and
+the fold layout, so a re-run only fits what changed.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed
+from scipy import stats
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, recall_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+MODELS = {
+    "LogisticRegression": LogisticRegression,
+    "RandomForestClassifier": RandomForestClassifier,
+}
+
+# Each entry expands to one candidate per combination of its "grid" values.
+DEFAULT_GRID = [
+    {
+        "name": "logistic_regression",
+        "model": "LogisticRegression",
+        "fixed": {"max_iter": 1000, "class_weight": "balanced"},
+        "grid": {"C": [0.1, 1.0, 10.0]},
+    },
+    {
+        "name": "random_forest",
+        "model": "RandomForestClassifier",
+        "fixed": {"n_estimators": 300, "class_weight": "balanced", "random_state": 42},
+        "grid": {"max_depth": [None, 12], "min_samples_leaf": [1, 3]},
+    },
+]
+
+
+def load_grid(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def expand_grid(grid):
+    """Turn grid entries into a flat list of {id, model, params} candidates."""
+    candidates = []
+    for entry in grid:
+        if entry["model"] not in MODELS:
+            raise ValueError(f"Unknown model {entry['model']}; expected one of {sorted(MODELS)}")
+        names = sorted(entry.get("grid", {}))
+        for values in itertools.product(*(entry["grid"][name] for name in names)):
+            varied = dict(zip(names, values))
+            label = ",".join(f"{k}={v}" for k, v in varied.items())
+            candidates.append({
+                "id": f"{entry['name']}[{label}]" if label else entry["name"],
+                "model": entry["model"],
+                "params": {**entry.get("fixed", {}), **varied},
+            })
+    return candidates
+
+
+# Models whose own fit can use several cores through n_jobs.
+PARALLEL_MODELS = {"RandomForestClassifier"}
+
+
+def build_estimator(candidate, n_jobs=None):
+    estimator = MODELS[candidate["model"]](**candidate["params"])
+    if n_jobs is not None and candidate["model"] in PARALLEL_MODELS:
+        estimator.set_params(n_jobs=n_jobs)
+    return estimator
+
+
+def confidence_interval(values, level=0.95):
+    """Student-t interval for the mean of per-fold scores."""
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean())
+    if values.size < 2:
+        return mean, mean
+    half = float(stats.t.ppf((1 + level) / 2, values.size - 1) * values.std(ddof=1) / np.sqrt(values.size))
+    return mean - half, mean + half
+
+
+def _fit_fold(candidate, X, y, train_idx, test_idx, positive_label):
+    scaler = StandardScaler().fit(X[train_idx])
+    # Folds already run in parallel, so each estimator stays single-threaded.
+    estimator = build_estimator(candidate, n_jobs=1)
+    estimator.fit(scaler.transform(X[train_idx]), y[train_idx])
+    y_pred = estimator.predict(scaler.transform(X[test_idx]))
+    y_true = y[test_idx]
+    return {
+        "recall": float(recall_score(y_true, y_pred, labels=[positive_label], average="macro", zero_division=0)),
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "macro_f1": float(f1_score(y_true, y_pred, average="macro", zero_division=0)),
+    }
+
+
+def _data_fingerprint(X, y):
+    digest = hashlib.sha256()
+    digest.update(str(X.shape).encode("utf-8"))
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update("\0".join(map(str, y)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _fold_cache_path(cache_dir, data_fingerprint, candidate, fold, n_splits, seed, positive_label):
+    key = json.dumps({
+        "data": data_fingerprint,
+        "model": candidate["model"],
+        "params": candidate["params"],
+        "fold": fold,
+        "n_splits": n_splits,
+        "seed": seed,
+        "positive_label": positive_label,
+        "sklearn": sklearn.__version__,
+    }, sort_keys=True, default=str)
+    return os.path.join(cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def cross_validate_grid(X, y, grid=None, n_splits=5, n_jobs=-1, cache_dir=None, seed=42, positive_label="At-risk"):
+    """Score every candidate with stratified k-fold CV and return the leaderboard.
+
+    ``X`` is the unscaled feature matrix. The leaderboard is sorted by mean
+    recall on ``positive_label``, then mean accuracy.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(str)
+    candidates = expand_grid(grid or DEFAULT_GRID)
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    fingerprint = _data_fingerprint(X, y) if cache_dir else None
+
+    results = {}
+    pending = []
+    for c_idx, candidate in enumerate(candidates):
+        for fold, (train_idx, test_idx) in enumerate(folds):
+            path = _fold_cache_path(cache_dir, fingerprint, candidate, fold, n_splits, seed, positive_label) if cache_dir else None
+            if path and os.path.exists(path):
+                with open(path, "r") as f:
+                    results[(c_idx, fold)] = json.load(f)
+            else:
+                pending.append((c_idx, fold, path))
+
+    print(f"Cross-validating {len(candidates)} candidates x {n_splits} folds: "
+          f"{len(results)} cached, {len(pending)} to fit")
+
+    if pending:
+        fitted = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(candidates[c_idx], X, y, folds[fold][0], folds[fold][1], positive_label)
+            for c_idx, fold, _ in pending
+        )
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        for (c_idx, fold, path), scores in zip(pending, fitted):
+            results[(c_idx, fold)] = scores
+            if path:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(scores, f)
+                os.replace(tmp_path, path)
+
+    leaderboard = []
+    for c_idx, candidate in enumerate(candidates):
+        row = {"id": candidate["id"], "model": candidate["model"], "params": candidate["params"]}
+        for metric in ("recall", "accuracy", "macro_f1"):
+            scores = [results[(c_idx, fold)][metric] for fold in range(n_splits)]
+            low, high = confidence_interval(scores)
+            row[metric] = {
+                "mean": round(float(np.mean(scores)), 4),
+                "ci95": [round(low, 4), round(high, 4)],
+                "folds": [round(s, 4) for s in scores],
+            }
+        leaderboard.append(row)
+    leaderboard.sort(key=lambda r: (r["recall"]["mean"], r["accuracy"]["mean"]), reverse=True)
+    for rank, row in enumerate(leaderboard, start=1):
+        row["rank"] = rank
+    return leaderboard
+
+
+def print_leaderboard(leaderboard, positive_label="At-risk"):
+    print(f"\n{'rank':<6}{'candidate':<56}{positive_label + ' recall (95% CI)':<30}{'accuracy (95% CI)':<26}")
+    for row in leaderboard:
+        recall, accuracy = row["recall"], row["accuracy"]
+        print(f"{row['rank']:<6}{row['id']:<56}"
+              f"{recall['mean']:.3f} [{recall['ci95'][0]:.3f}, {recall['ci95'][1]:.3f}]{'':<7}"
+              f"{accuracy['mean']:.3f} [{accuracy['ci95'][0]:.3f}, {accuracy['ci95'][1]:.3f}]")
+
+
+def save_leaderboard(leaderboard, path, **meta):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**meta, "leaderboard": leaderboard}, f, indent=2, default=str)
+    os.replace(tmp_path, path)
@@ -1,21 +1,26 @@
+import numpy as np
 import pandas as pd
 import os
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from ingestion import DATASET_CACHE_DIR, concat_students, downcast_integers, load_students, read_student_csv
 
 def load_and_merge(mat_path, por_path):
-    mat = pd.read_csv(mat_path, sep=";")
-    por = pd.read_csv(por_path, sep=";")
+    mat = read_student_csv(mat_path, subject="math")
+    por = read_student_csv(por_path, subject="portuguese")
 
-    mat["subject"] = "math"
-    por["subject"] = "portuguese"
-
-    df = pd.concat([mat, por], ignore_index=True)
+    df = concat_students([mat, por])
 
     return df
 
+def load_dataset(mat_path, por_path, cache_dir=DATASET_CACHE_DIR):
+    """Merged, typed and deduplicated data, cached as Parquet by source file hash."""
+    return load_students([("math", mat_path), ("portuguese", por_path)], cache_dir=cache_dir)
+
 def create_risk_label(df):
     def risk_level(score):
+        if pd.isna(score):
+            return None
         if score < 10:
             return "At-risk"
         elif score < 15:
@@ -27,7 +32,7 @@ def create_risk_label(df):
     return df
 
 def clean_and_encode(df, target="G3", task="regression"):
-    df = df.dropna()
+    df = downcast_integers(df.dropna())
     df = df.drop_duplicates()
 
     if task == "classification":
@@ -47,13 +52,18 @@ def clean_and_encode(df, target="G3", task="regression"):
 def scale_features(X_train, X_test):
     scaler = StandardScaler()
 
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    # Fit on plain arrays: the API scales encoded rows, which carry no column names.
+    X_train_scaled = scaler.fit_transform(np.asarray(X_train, dtype=np.float64))
+    X_test_scaled = scaler.transform(np.asarray(X_test, dtype=np.float64))
 
     return X_train_scaled, X_test_scaled, scaler
 
-def preprocess_pipeline(mat_path, por_path, target="G3", task="regression", test_size=0.2):
-    df = load_and_merge(mat_path, por_path)
+def split_dataset(mat_path, por_path, target="G3", task="regression", test_size=0.2):
+    """Load, label, clean and split the data without scaling it.
+
+    Returns X_train, X_test, y_train, y_test, feature_names, cleaned_df.
+    """
+    df = load_dataset(mat_path, por_path)
 
     if task == "classification":
         df = create_risk_label(df)
@@ -77,14 +87,22 @@ def preprocess_pipeline(mat_path, por_path, target="G3", task="regression", test
             random_state=42
         )
 
-    X_train_scaled, X_test_scaled, scaler = scale_features(X_train, X_test)
-
     os.makedirs("data/processed", exist_ok=True)
-    cleaned_df.to_csv("data/processed/cleaned_dataset.csv", index=False)
+    cleaned_df.to_parquet("data/processed/cleaned_dataset.parquet", index=False)
 
     print("Dataset shape after preprocessing:", cleaned_df.shape)
     print("Target distribution:\n", y.value_counts())
 
-    feature_names = X.columns
+    return X_train, X_test, y_train, y_test, X.columns, cleaned_df
+
+def preprocess_pipeline(mat_path, por_path, target="G3", task="regression", test_size=0.2, return_cleaned=False):
+    X_train, X_test, y_train, y_test, feature_names, cleaned_df = split_dataset(
+        mat_path, por_path, target=target, task=task, test_size=test_size
+    )
+
+    X_train_scaled, X_test_scaled, scaler = scale_features(X_train, X_test)
+
+    if return_cleaned:
+        return X_train_scaled, X_test_scaled, y_train, y_test, scaler, feature_names, cleaned_df
 
-    return X_train_scaled, X_test_scaled, y_train, y_test, scaler, feature_names
\ No newline at end of file
+    return X_train_scaled, X_test_scaled, y_train, y_test, scaler, feature_names
@@ -0,0 +1,138 @@
+"""
+Request Profiling for LearnScope.ai
+Opt-in cProfile capture for live requests. A request is profiled when it is
+sampled (PROFILE_SAMPLE_RATE) or explicitly asked for by an admin. Each
+profile is written as a pstats file tagged with the request_id, and only the
+newest PROFILE_MAX_FILES are kept on disk.
+
+The .prof files load directly into snakeviz, flameprof, gprof2dot or
+``python -m pstats``.
+"""
+
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+_NAME_PATTERN = re.compile(r"^\d{13}_[0-9a-f-]{36}\.prof$")
+
+
+class RequestProfiler:
+    def __init__(self, directory: str, sample_rate: float = 0.0, max_profiles: int = 50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.captured = 0
+        self.skipped_busy = 0
+        # One capture at a time keeps the overhead bounded; newer Pythons
+        # also refuse to run two cProfile sessions at once.
+        self._busy = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def should_profile(self, forced: bool = False) -> bool:
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Begin a capture, or return None if another request is being profiled."""
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception:
+            self._busy.release()
+            raise
+        profile.started_at = time.perf_counter()
+        return profile
+
+    def finish(self, profile: cProfile.Profile, request_id: str, endpoint: str, status: int) -> Optional[str]:
+        """Stop a capture, store it in the ring buffer and return its file name."""
+        try:
+            profile.disable()
+            duration_ms = (time.perf_counter() - profile.started_at) * 1000.0
+        finally:
+            self._busy.release()
+
+        name = f"{int(time.time() * 1000):013d}_{request_id}.prof"
+        meta = {
+            "name": name,
+            "request_id": request_id,
+            "endpoint": endpoint,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._write_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, name)
+            profile.dump_stats(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            with open(f"{path}.json", "w") as f:
+                json.dump(meta, f)
+            self._trim()
+        self.captured += 1
+        return name
+
+    def _trim(self) -> None:
+        names = self._names()
+        for name in names[:max(0, len(names) - self.max_profiles)]:
+            for path in (os.path.join(self.directory, name), os.path.join(self.directory, f"{name}.json")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _names(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        # Names start with a zero-padded millisecond timestamp, so they sort by age.
+        return sorted(name for name in os.listdir(self.directory) if _NAME_PATTERN.match(name))
+
+    def list(self) -> List[Dict]:
+        """Stored profiles, newest first."""
+        profiles = []
+        for name in reversed(self._names()):
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                # Trimmed by a concurrent capture since the directory was listed.
+                continue
+            try:
+                with open(os.path.join(self.directory, f"{name}.json")) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {"name": name}
+            meta["size_bytes"] = size
+            profiles.append(meta)
+        return profiles
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Absolute path of a stored profile, or None for unknown or unsafe names."""
+        if not _NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return os.path.abspath(path) if os.path.exists(path) else None
+
+    def stats(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "max_profiles": self.max_profiles,
+            "captured": self.captured,
+            "skipped_busy": self.skipped_busy,
+            "stored": len(self._names()),
+        }
+
+
+def profiler_from_env() -> RequestProfiler:
+    """Build the profiler configured by the PROFILE_* variables."""
+    return RequestProfiler(
+        directory=os.environ.get("PROFILE_DIR", os.path.join("data", "profiles")),
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0)),
+        max_profiles=int(os.environ.get("PROFILE_MAX_FILES", 50)),
+    )
@@ -0,0 +1,126 @@
+"""
+Quiz question bank for LearnScope.ai
+data/quiz_bank.json holds the rule-based quiz questions by topic and risk
+level. QuizBank indexes them once by (topic, risk level, difficulty). Each
+item already carries its "difficulty" and "topic", so assembling a quiz is a
+lookup plus a shallow copy of the few items picked. Callers own what they get
+back and may modify it without touching the bank.
+
+questions() takes the first questions of a pool, which is what the
+precomputed fallbacks expect. sample() draws a different set for each
+student, without replacement, and works just as well on pools of tens of
+thousands of questions.
+"""
+
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+
+from seeding import student_rng
+
+logger = logging.getLogger(__name__)
+
+QUIZ_BANK_PATH = os.environ.get('QUIZ_BANK_PATH', os.path.join('data', 'quiz_bank.json'))
+# Pools re-stamped for topics the bank does not have, kept per bank.
+CACHE_SIZE = 1024
+
+
+class QuizBankError(ValueError):
+    """The quiz bank file is malformed."""
+
+
+class QuizBank:
+    """An immutable, indexed quiz bank."""
+
+    def __init__(self, table, source=None):
+        try:
+            self.difficulty = MappingProxyType({str(r): str(d) for r, d in table['difficulty'].items()})
+            self.question_counts = MappingProxyType({str(r): int(n) for r, n in table['question_counts'].items()})
+            self.default_topic = str(table['default_topic'])
+            self.default_risk_level = str(table['default_risk_level'])
+            topics = table['topics']
+            index = {}
+            for topic, levels in topics.items():
+                for risk_level, items in levels.items():
+                    for item in items:
+                        difficulty = item.get('difficulty') or self.difficulty[risk_level]
+                        stamped = {key: value for key, value in item.items() if key not in ('difficulty', 'topic')}
+                        stamped['difficulty'] = difficulty
+                        stamped['topic'] = topic
+                        index.setdefault((topic, risk_level, difficulty), []).append(stamped)
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise QuizBankError(f"Quiz bank is missing or has a malformed entry: {e}")
+        if self.default_risk_level not in self.question_counts:
+            raise QuizBankError(f"default_risk_level {self.default_risk_level!r} has no question count")
+        self.table = table
+        self.source = source
+        self.topics = frozenset(topics)
+        self.index = MappingProxyType({key: tuple(items) for key, items in index.items()})
+        self.size = sum(len(items) for items in self.index.values())
+        self._restamped = {}
+
+    def pool(self, topic, risk_level, difficulty=None):
+        """All questions for a topic and risk level, as (risk level used, tuple of shared items).
+
+        Unknown risk levels use default_risk_level. Topics the bank does not
+        have use default_topic's questions, stamped with the topic asked for.
+        """
+        risk_level = risk_level if risk_level in self.question_counts else self.default_risk_level
+        difficulty = difficulty or self.difficulty.get(risk_level)
+        if topic in self.topics:
+            return risk_level, self.index.get((topic, risk_level, difficulty), ())
+        key = (topic, risk_level, difficulty)
+        items = self._restamped.get(key)
+        if items is None:
+            items = tuple(dict(item, topic=topic) for item in self.index.get((self.default_topic, risk_level, difficulty), ()))
+            if len(self._restamped) >= CACHE_SIZE:
+                self._restamped.clear()
+            self._restamped[key] = items
+        return risk_level, items
+
+    def questions(self, topic, risk_level, difficulty=None, count=None):
+        """The first ``count`` questions of the pool (by default the risk level's question count)."""
+        risk_level, items = self.pool(topic, risk_level, difficulty)
+        return [dict(item) for item in items[:self.question_counts[risk_level] if count is None else count]]
+
+    def sample(self, topic, risk_level, key, difficulty=None, count=None):
+        """``count`` distinct questions drawn at random for one student.
+
+        ``key`` identifies the student (e.g. their ID). The same key always
+        draws the same questions, and different keys draw different ones.
+        """
+        risk_level, items = self.pool(topic, risk_level, difficulty)
+        count = self.question_counts[risk_level] if count is None else count
+        rng = student_rng(json.dumps([key, topic, risk_level, difficulty], default=str))
+        # random.sample over a range only touches the indices it draws.
+        return [dict(items[i]) for i in rng.sample(range(len(items)), min(count, len(items)))]
+
+    def describe(self):
+        return {"source": self.source, "questions": self.size, "topics": sorted(self.topics)}
+
+
+def load_quiz_bank(path=None):
+    """Read and index a quiz bank file; raises QuizBankError (or OSError) when it cannot be used."""
+    path = path or QUIZ_BANK_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            table = json.load(f)
+        except ValueError as e:
+            raise QuizBankError(f"{path} is not valid JSON: {e}")
+    return QuizBank(table, source=path)
+
+
+_QUIZ_BANK = None
+_QUIZ_BANK_LOCK = threading.Lock()
+
+
+def get_quiz_bank():
+    """The bank in QUIZ_BANK_PATH, loaded on first use."""
+    global _QUIZ_BANK
+    if _QUIZ_BANK is None:
+        with _QUIZ_BANK_LOCK:
+            if _QUIZ_BANK is None:
+                _QUIZ_BANK = load_quiz_bank(QUIZ_BANK_PATH)
+    return _QUIZ_BANK
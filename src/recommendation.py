@@ -1,118 +1,188 @@
-import random
-
-def generate_recommendations(student_row, predicted_risk):
-    recommendations = []
-    
-    # 1. CORE ADVICE POOLS (BY RISK LEVEL)
-    risk_pools = {
-        "At-risk": [
-            "Create a structured daily study schedule with fixed revision slots for each subject.",
-            "Practice past exam papers weekly to identify recurring weak areas and track your progress.",
-            "Join a study group or find a tutor — peer learning dramatically improves retention for at-risk students.",
-            "Schedule a meeting with your academic advisor to discuss a personalized recovery plan.",
-            "Use the 'Pomodoro Technique' (25 mins study, 5 mins break) to rebuild your focus and stamina.",
-            "Break down large subjects into 15-minute 'micro-lessons' to make catching up less overwhelming.",
-            "Focus on mastering the fundamentals of your weakest subject before moving to advanced topics."
-        ],
-        "Average": [
-            "Pinpoint 2-3 weak topics per subject and dedicate focused sessions to mastering them this week.",
-            "Simulate exam conditions with timed mock tests weekly to build speed and reduce test anxiety.",
-            "Use spaced repetition (e.g. Anki flashcards) to keep older material fresh alongside new content.",
-            "Try 'Active Recall' by testing yourself on topics immediately after reading about them.",
-            "Mind mapping can help you visualize connections between complex concepts in your current syllabus.",
-            "Record yourself explaining a concept out loud; listening back helps solidify memory.",
-            "Increase your daily study time by just 20 minutes to transition from 'Average' to 'High-performing'."
-        ],
-        "High-performing": [
-            "Maintain your momentum — set stretch goals like aiming for the top percentile or olympiad problems.",
-            "Tackle advanced and cross-disciplinary problems to deepen conceptual understanding.",
-            "Teaching peers is one of the best ways to solidify your own knowledge — consider informal tutoring.",
-            "Look into academic research or personal projects related to your favorite subjects.",
-            "Optimize your study environment further to enter 'Flow State' more quickly during deep work.",
-            "Start preparing for university-level material in your strongest subjects to stay ahead of the curve.",
-            "Apply for academic competitions or summer programs to challenge your skills against top students."
-        ]
-    }
-
-    # Pick 3 random core tips
-    core_pool = risk_pools.get(predicted_risk, risk_pools["Average"])
-    recommendations.extend(random.sample(core_pool, min(len(core_pool), 3)))
-
-    # 2. TRAIT-SPECIFIC POOLS (PICK ONE FROM RELEVANT POOLS)
-    
-    # Study Time
-    st = student_row.get("studytime", 2)
-    st_tips = []
-    if st <= 1:
-        st_tips = [
-            "Your study time is very low (< 2 hrs/week). Aim for at least 1 hour daily to see a grade jump.",
-            "Try a 'no-phone' study hour every evening to maximize the limited time you spend on books.",
-            "Briefly review your class notes for 10 minutes every day; it's better than zero study time."
-        ]
-    elif st == 2:
-        st_tips = [
-            "Consistency is key — you're doing 2-5 hrs/week, but daily consistency will yield better results.",
-            "Try to increase your study sessions by 15 minutes each to hit the next excellence tier.",
-            "Use weekend mornings for deeper 'focus blocks' while your energy is highest."
-        ]
-    elif st >= 4:
-        st_tips = [
-            "You have elite study habits (> 10 hrs/week). Ensure you're getting 8 hours of sleep to match.",
-            "To avoid burnout, schedule a 'complete rest day' where you don't look at any school work.",
-            "Investigate 'Deep Work' techniques to make your 10+ hours even more efficient."
-        ]
-    if st_tips: recommendations.append(random.choice(st_tips))
-
-    # Absences
-    absences = student_row.get("absences", 0)
-    if absences > 10:
-        abs_tips = [
-            f"High absenteeism ({absences} days) creates gaps. Ask teachers for missing handouts immediately.",
-            "Prioritize attending Monday and Friday classes as these often bookend critical weekly topics.",
-            "If you must miss class, ensure you have a 'notetaking buddy' to stay caught up in real-time."
-        ]
-        recommendations.append(random.choice(abs_tips))
-
-    # Failures
-    failures = student_row.get("failures", 0)
-    if failures > 0:
-        fail_tips = [
-            f"You've had {failures} past failure(s). Don't be discouraged — focus on root cause analysis.",
-            "Identify if your past failures were due to test anxiety or conceptual gaps, and target accordingly.",
-            "Visit your teacher's office hours this week specifically to review the topics you failed previously."
-        ]
-        recommendations.append(random.choice(fail_tips))
-
-    # Support / Internet / Health
-    if student_row.get("internet") == "yes":
-        recommendations.append(random.choice([
-            "Check out 3Blue1Brown on YouTube for visual math concepts.",
-            "Use Khan Academy to practice specific topics where your textbook is confusing.",
-            "Download educational apps like Quizlet to study while you're on the go."
-        ]))
-
-    if student_row.get("health", 3) <= 2:
-        recommendations.append("Priority: Your health is impacting your focus. Small walks and better hydration can change your productivity.")
-
-    if student_row.get("higher") == "yes":
-        recommendations.append(random.choice([
-            "University entrance exams reward consistent performers. Keep your G3 score as high as possible.",
-            "Dreaming of higher ed? Start a digital portfolio of your best academic work now."
-        ]))
-
-    # Final logic for Mathematics/Portuguese
-    subject = student_row.get("subject", "math")
-    if subject == "math":
-        recommendations.append(random.choice([
-            "Math Tip: Don't just watch videos. Solve 3 problems yourself for every 1 video you watch.",
-            "Focus on the 'Why' behind the formulas — it helps with long-term memory."
-        ]))
-    else:
-        recommendations.append(random.choice([
-            "Portuguese Tip: Read diverse materials — news, poetry, and science — to widen your vocabulary.",
-            "Practice writing short daily summaries of articles to improve your synthesis skills."
-        ]))
-
-    # Shuffling to make the output order feel different
-    random.shuffle(recommendations)
-    return recommendations
\ No newline at end of file
+"""
+Rule-based study recommendations for LearnScope.ai
+
+The advice pools are immutable module constants built once at import. Every
+student gets their own random.Random seeded from a hash of the student's ID
+(when present), the fields the rules read, the risk level and an optional
+seed. So identical inputs always give identical recommendations, and results
+are memoized on that key.
+"""
+
+import functools
+import json
+from types import MappingProxyType
+
+from seeding import student_rng
+
+# 1. CORE ADVICE POOLS (BY RISK LEVEL)
+RISK_POOLS = MappingProxyType({
+    "At-risk": (
+        "Create a structured daily study schedule with fixed revision slots for each subject.",
+        "Practice past exam papers weekly to identify recurring weak areas and track your progress.",
+        "Join a study group or find a tutor — peer learning dramatically improves retention for at-risk students.",
+        "Schedule a meeting with your academic advisor to discuss a personalized recovery plan.",
+        "Use the 'Pomodoro Technique' (25 mins study, 5 mins break) to rebuild your focus and stamina.",
+        "Break down large subjects into 15-minute 'micro-lessons' to make catching up less overwhelming.",
+        "Focus on mastering the fundamentals of your weakest subject before moving to advanced topics."
+    ),
+    "Average": (
+        "Pinpoint 2-3 weak topics per subject and dedicate focused sessions to mastering them this week.",
+        "Simulate exam conditions with timed mock tests weekly to build speed and reduce test anxiety.",
+        "Use spaced repetition (e.g. Anki flashcards) to keep older material fresh alongside new content.",
+        "Try 'Active Recall' by testing yourself on topics immediately after reading about them.",
+        "Mind mapping can help you visualize connections between complex concepts in your current syllabus.",
+        "Record yourself explaining a concept out loud; listening back helps solidify memory.",
+        "Increase your daily study time by just 20 minutes to transition from 'Average' to 'High-performing'."
+    ),
+    "High-performing": (
+        "Maintain your momentum — set stretch goals like aiming for the top percentile or olympiad problems.",
+        "Tackle advanced and cross-disciplinary problems to deepen conceptual understanding.",
+        "Teaching peers is one of the best ways to solidify your own knowledge — consider informal tutoring.",
+        "Look into academic research or personal projects related to your favorite subjects.",
+        "Optimize your study environment further to enter 'Flow State' more quickly during deep work.",
+        "Start preparing for university-level material in your strongest subjects to stay ahead of the curve.",
+        "Apply for academic competitions or summer programs to challenge your skills against top students."
+    )
+})
+CORE_TIPS = 3
+
+# 2. TRAIT-SPECIFIC POOLS (ONE TIP FROM EACH RELEVANT POOL)
+LOW_STUDYTIME_TIPS = (
+    "Your study time is very low (< 2 hrs/week). Aim for at least 1 hour daily to see a grade jump.",
+    "Try a 'no-phone' study hour every evening to maximize the limited time you spend on books.",
+    "Briefly review your class notes for 10 minutes every day; it's better than zero study time."
+)
+MODERATE_STUDYTIME_TIPS = (
+    "Consistency is key — you're doing 2-5 hrs/week, but daily consistency will yield better results.",
+    "Try to increase your study sessions by 15 minutes each to hit the next excellence tier.",
+    "Use weekend mornings for deeper 'focus blocks' while your energy is highest."
+)
+HIGH_STUDYTIME_TIPS = (
+    "You have elite study habits (> 10 hrs/week). Ensure you're getting 8 hours of sleep to match.",
+    "To avoid burnout, schedule a 'complete rest day' where you don't look at any school work.",
+    "Investigate 'Deep Work' techniques to make your 10+ hours even more efficient."
+)
+# Templates are filled in with the student's own numbers.
+ABSENCE_TIPS = (
+    "High absenteeism ({absences} days) creates gaps. Ask teachers for missing handouts immediately.",
+    "Prioritize attending Monday and Friday classes as these often bookend critical weekly topics.",
+    "If you must miss class, ensure you have a 'notetaking buddy' to stay caught up in real-time."
+)
+FAILURE_TIPS = (
+    "You've had {failures} past failure(s). Don't be discouraged — focus on root cause analysis.",
+    "Identify if your past failures were due to test anxiety or conceptual gaps, and target accordingly.",
+    "Visit your teacher's office hours this week specifically to review the topics you failed previously."
+)
+INTERNET_TIPS = (
+    "Check out 3Blue1Brown on YouTube for visual math concepts.",
+    "Use Khan Academy to practice specific topics where your textbook is confusing.",
+    "Download educational apps like Quizlet to study while you're on the go."
+)
+HEALTH_TIP = "Priority: Your health is impacting your focus. Small walks and better hydration can change your productivity."
+HIGHER_EDUCATION_TIPS = (
+    "University entrance exams reward consistent performers. Keep your G3 score as high as possible.",
+    "Dreaming of higher ed? Start a digital portfolio of your best academic work now."
+)
+SUBJECT_TIPS = MappingProxyType({
+    "math": (
+        "Math Tip: Don't just watch videos. Solve 3 problems yourself for every 1 video you watch.",
+        "Focus on the 'Why' behind the formulas — it helps with long-term memory."
+    ),
+    "portuguese": (
+        "Portuguese Tip: Read diverse materials — news, poetry, and science — to widen your vocabulary.",
+        "Practice writing short daily summaries of articles to improve your synthesis skills."
+    )
+})
+
+# Fields the rules read, with the value used when a student leaves one out.
+TRAIT_DEFAULTS = MappingProxyType({
+    "studytime": 2, "absences": 0, "failures": 0, "internet": None,
+    "health": 3, "higher": None, "subject": "math"
+})
+# The first of these present identifies the student in the seed.
+ID_FIELDS = ("student_id", "id")
+CACHE_SIZE = 4096
+
+
+def _plain(value):
+    # NumPy scalars (e.g. from DataFrame rows) hash and compare like Python numbers.
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def recommendation_key(student_row, predicted_risk, seed=0):
+    """Canonical key of everything the output depends on; also the RNG seed source."""
+    student_id = next((student_row[f] for f in ID_FIELDS if student_row.get(f) is not None), None)
+    traits = [student_row.get(f, default) for f, default in TRAIT_DEFAULTS.items()]
+    return json.dumps([seed, student_id, predicted_risk, traits], default=_plain, separators=(",", ":"))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _recommend(key):
+    _, _, predicted_risk, traits = json.loads(key)
+    student = dict(zip(TRAIT_DEFAULTS, traits))
+    rng = student_rng(key)
+
+    core_pool = RISK_POOLS.get(predicted_risk, RISK_POOLS["Average"])
+    recommendations = rng.sample(core_pool, min(len(core_pool), CORE_TIPS))
+
+    st = student["studytime"]
+    st_tips = ()
+    if st <= 1:
+        st_tips = LOW_STUDYTIME_TIPS
+    elif st == 2:
+        st_tips = MODERATE_STUDYTIME_TIPS
+    elif st >= 4:
+        st_tips = HIGH_STUDYTIME_TIPS
+    if st_tips:
+        recommendations.append(rng.choice(st_tips))
+
+    absences = student["absences"]
+    if absences > 10:
+        recommendations.append(rng.choice(ABSENCE_TIPS).format(absences=absences))
+
+    failures = student["failures"]
+    if failures > 0:
+        recommendations.append(rng.choice(FAILURE_TIPS).format(failures=failures))
+
+    if student["internet"] == "yes":
+        recommendations.append(rng.choice(INTERNET_TIPS))
+
+    if student["health"] <= 2:
+        recommendations.append(HEALTH_TIP)
+
+    if student["higher"] == "yes":
+        recommendations.append(rng.choice(HIGHER_EDUCATION_TIPS))
+
+    subject = "math" if student["subject"] == "math" else "portuguese"
+    recommendations.append(rng.choice(SUBJECT_TIPS[subject]))
+
+    # Shuffled so the order varies from student to student
+    rng.shuffle(recommendations)
+    return tuple(recommendations)
+
+
+def generate_recommendations(student_row, predicted_risk, seed=0):
+    """Recommendations for one student; the same inputs always give the same list.
+
+    ``seed`` changes every student's selection at once (e.g. per term).
+    """
+    return list(_recommend(recommendation_key(student_row, predicted_risk, seed)))
+
+
+def generate_recommendations_batch(students, predicted_risks, seed=0):
+    """Recommendations for a roster, in order; equal to calling generate_recommendations per row.
+
+    students is a list of dicts or a DataFrame. predicted_risks is one risk
+    level for everyone or one per student. Students with identical keys are
+    generated once.
+    """
+    if hasattr(students, "to_dict"):
+        students = students.to_dict("records")
+    if isinstance(predicted_risks, str):
+        predicted_risks = [predicted_risks] * len(students)
+    if len(predicted_risks) != len(students):
+        raise ValueError(f"{len(predicted_risks)} risk levels for {len(students)} students")
+
+    keys = [recommendation_key(s, r, seed) for s, r in zip(students, predicted_risks)]
+    generated = {key: _recommend(key) for key in dict.fromkeys(keys)}
+    return [list(generated[key]) for key in keys]
@@ -0,0 +1,227 @@
+"""
+Curated resource registry for LearnScope.ai
+data/resources.json groups resources into categories ("math", "absences",
+"advanced", ...). compile_registry() turns the file into an inverted index:
+every tag maps to its resources, already sorted by priority. A resource is
+indexed under its category and under any extra "tags" it lists. Weakness
+text is mapped to tags once per distinct string (see WEAKNESS_TAGS), and the
+top resources for each (subject, tags) key are cached. A request is then a
+dictionary lookup, however large the registry grows.
+
+get_registry() returns the current snapshot. A snapshot never changes after
+it is built. A reload compiles a new one and swaps the module reference, so
+readers never wait on a reload.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_PATH = os.environ.get('RESOURCES_PATH', os.path.join('data', 'resources.json'))
+# Seconds between checks of the registry file for edits.
+RESOURCES_CHECK_INTERVAL = float(os.environ.get('RESOURCES_CHECK_INTERVAL', 5))
+
+# Weakness text containing the key selects the tag; the file may override this with "weakness_tags".
+WEAKNESS_TAGS = {"absent": ["absences"], "study": ["studytime"], "failure": ["failures"]}
+# Tag used when no weakness selects one.
+DEFAULT_TAGS = ["advanced"]
+TOP_K = 4
+SEARCH_K = 5
+# Entries kept in each of a snapshot's lookup caches.
+CACHE_SIZE = 4096
+
+
+def _bounded_set(cache, key, value):
+    if len(cache) >= CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
+def _ranked(entries, rank):
+    for priority, position, offset, item in entries:
+        yield priority, rank, position, offset, item
+
+
+class ResourceRegistry:
+    """An immutable snapshot of the registry, indexed by tag."""
+
+    def __init__(self, table, source=None):
+        categories = table.get("categories", {})
+        if not isinstance(categories, dict):
+            raise ValueError("'categories' must map category names to resource lists")
+        self.table = table
+        self.source = source
+        self.weakness_tags = tuple(
+            (needle.lower(), tuple(tag.lower() for tag in tags))
+            for needle, tags in table.get("weakness_tags", WEAKNESS_TAGS).items()
+        )
+        self.default_tags = tuple(tag.lower() for tag in table.get("default_tags", DEFAULT_TAGS))
+
+        # Entries sort by (-priority, category order, position in category) within each tag.
+        index = {}
+        for position, (category, items) in enumerate(categories.items()):
+            for offset, item in enumerate(items):
+                entry = (-item.get("priority", 0), position, offset, item)
+                tags = [category] + list(item.get("tags", []))
+                for tag in dict.fromkeys(t.lower() for t in tags):
+                    index.setdefault(tag, []).append(entry)
+        self.index = {tag: tuple(sorted(entries, key=lambda e: e[:3])) for tag, entries in index.items()}
+        self.size = sum(len(items) for items in categories.values())
+
+        # One search document per URL: its highest-priority entry, with every tag it is listed under.
+        documents = {}
+        for tag, entries in self.index.items():
+            for _, position, offset, item in entries:
+                best, tags = documents.setdefault(item['url'], [(position, offset, item), {}])
+                if item.get("priority", 0) > best[2].get("priority", 0):
+                    documents[item['url']][0] = (position, offset, item)
+                tags[tag] = None
+        from resource_search import SearchIndex
+        self.search_index = SearchIndex([(item, list(tags)) for (_, _, item), tags in
+                                         sorted(documents.values(), key=lambda d: d[0][:2])])
+        self._tag_cache = {}
+        self._top_cache = {}
+        # The same lookups keyed by the raw arguments, which skips the tag mapping.
+        self._request_cache = {}
+
+    def tags_for(self, weakness):
+        """Tags a weakness string selects, in WEAKNESS_TAGS order."""
+        tags = self._tag_cache.get(weakness)
+        if tags is None:
+            text = weakness.lower()
+            tags = tuple(tag for needle, needle_tags in self.weakness_tags if needle in text for tag in needle_tags)
+            _bounded_set(self._tag_cache, weakness, tags)
+        return tags
+
+    def key(self, subject, weaknesses):
+        """Cache key: the subject and the tags its weaknesses select, in first-seen order."""
+        tags = tuple(dict.fromkeys(itertools.chain.from_iterable(self.tags_for(w) for w in weaknesses)))
+        return (subject or "").lower(), tags
+
+    def top(self, subject, weaknesses, k=TOP_K):
+        """The k highest-priority resources for a subject and its weaknesses, one per URL."""
+        request = (subject, tuple(weaknesses), k)
+        found = self._request_cache.get(request)
+        if found is None:
+            key = self.key(subject, weaknesses) + (k,)
+            found = self._top_cache.get(key)
+            if found is None:
+                found = _bounded_set(self._top_cache, key, self._select(*key))
+            _bounded_set(self._request_cache, request, found)
+        return list(found)
+
+    def _select(self, subject, tags, k):
+        wanted = list(tags) + [subject]
+        if not tags:
+            wanted.extend(self.default_tags)
+        # Equal priorities keep the order the tags were asked for in.
+        lists = [_ranked(self.index[tag], i) for i, tag in enumerate(dict.fromkeys(wanted)) if tag in self.index]
+        selected, seen = [], set()
+        # Each list is sorted, so the first copy of a URL is its highest-priority one.
+        for *_, item in heapq.merge(*lists, key=lambda e: e[:4]):
+            if item['url'] in seen:
+                continue
+            seen.add(item['url'])
+            selected.append(item)
+            if len(selected) == k:
+                break
+        return tuple(selected)
+
+    def search(self, query, k=SEARCH_K, tag=None):
+        """Resources ranked by BM25 relevance to a free-text query, each with its score."""
+        return [dict(item, score=score) for item, score in self.search_index.search(query, k, tag)]
+
+    def search_for_student(self, subject, weaknesses, k=SEARCH_K, tag=None):
+        """search() with a student's weaknesses, the tags they select and the subject as the query."""
+        terms = list(weaknesses) + [tag for w in weaknesses for tag in self.tags_for(w)] + [subject or ""]
+        return self.search(terms, k, tag)
+
+    def describe(self):
+        return {
+            "source": self.source, "resources": self.size, "tags": len(self.index),
+            "search_terms": len(self.search_index.vocabulary)
+        }
+
+
+def compile_registry(table, source=None):
+    return ResourceRegistry(table, source)
+
+
+def load_registry(path=None):
+    """Read and compile a registry file; raises OSError or ValueError when it cannot be used."""
+    path = path or RESOURCES_PATH
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    if not isinstance(table, dict):
+        raise ValueError(f"{path} must hold a JSON object")
+    return compile_registry(table, source=path)
+
+
+_REGISTRY = None
+_REGISTRY_STAMP = None
+_REGISTRY_CHECKED = 0.0
+_RELOAD_LOCK = threading.Lock()
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _reload(path):
+    global _REGISTRY, _REGISTRY_STAMP, _REGISTRY_CHECKED
+    stamp = _file_stamp(path)
+    try:
+        registry = load_registry(path) if stamp is not None else compile_registry({"categories": {}}, source=path)
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        if _REGISTRY is not None:
+            logger.error(f"Keeping the current resource registry, {path} could not be used: {e}")
+            registry = _REGISTRY
+        else:
+            logger.error(f"Error loading resource registry {path}: {e}")
+            registry = compile_registry({"categories": {}}, source=path)
+    else:
+        if _REGISTRY is not None:
+            logger.info(f"Resource registry reloaded from {path}")
+    # A single reference assignment; readers see either the old or the new snapshot.
+    _REGISTRY = registry
+    _REGISTRY_STAMP = stamp
+    _REGISTRY_CHECKED = time.monotonic()
+    return registry
+
+
+def reload_registry(path=None):
+    """Compile the registry file and swap it in; the current snapshot stays on failure."""
+    with _RELOAD_LOCK:
+        return _reload(path or RESOURCES_PATH)
+
+
+def get_registry():
+    """The current registry snapshot, re-read when RESOURCES_PATH changes.
+
+    Only one thread checks the file at a time; the others keep using the
+    current snapshot rather than waiting.
+    """
+    global _REGISTRY_CHECKED
+    registry = _REGISTRY
+    if registry is not None and time.monotonic() - _REGISTRY_CHECKED < RESOURCES_CHECK_INTERVAL:
+        return registry
+    if not _RELOAD_LOCK.acquire(blocking=registry is None):
+        return registry
+    try:
+        if _REGISTRY is None or _file_stamp(RESOURCES_PATH) != _REGISTRY_STAMP:
+            return _reload(RESOURCES_PATH)
+        _REGISTRY_CHECKED = time.monotonic()
+        return _REGISTRY
+    finally:
+        _RELOAD_LOCK.release()
@@ -0,0 +1,117 @@
+"""
+Full-text search over the curated resources for LearnScope.ai
+SearchIndex ranks resources with BM25 over their name, "why" text and tags.
+The whole BM25 weight of every (term, resource) pair is computed when the
+registry loads and kept in a sparse term x resource matrix. A query only
+sums the rows of its terms and ranks the resources that scored, so its cost
+depends on the query, not on the size of the library.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+# BM25 term-frequency saturation and length normalisation.
+K1 = 1.2
+B = 0.75
+# A word in the name counts this many times.
+NAME_WEIGHT = 2
+TOP_K = 5
+# Distinct queries cached per index.
+CACHE_SIZE = 4096
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it its of on or the to with your you".split()
+)
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lower-cased, lightly stemmed words of text, without stopwords."""
+    return [_stem(word) for word in _WORD.findall(str(text or "").lower()) if word not in STOPWORDS]
+
+
+class SearchIndex:
+    """BM25 index over resources; each resource is searchable by its name, why and tags."""
+
+    def __init__(self, resources, k1=K1, b=B):
+        """resources is a sequence of (item, tags) pairs, one per distinct resource."""
+        self.items = tuple(item for item, _ in resources)
+        self.tags = tuple(tuple(tags) for _, tags in resources)
+        n = len(self.items)
+        self.vocabulary = {}
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(n)
+        for doc, (item, tags) in enumerate(resources):
+            terms = tokenize(item.get("name")) * NAME_WEIGHT + tokenize(item.get("why")) + tokenize(" ".join(tags))
+            lengths[doc] = len(terms)
+            for term in terms:
+                rows.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                cols.append(doc)
+                counts.append(1.0)
+        # Duplicate (term, doc) entries are summed into term frequencies.
+        tf = sparse.csr_matrix((counts, (rows, cols)), shape=(len(self.vocabulary), n))
+        tf.sum_duplicates()
+
+        df = np.diff(tf.indptr)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths / (lengths.mean() if n else 1.0))
+        term_of_entry = np.repeat(np.arange(len(self.vocabulary)), df)
+        tf.data = idf[term_of_entry] * tf.data * (k1 + 1) / (tf.data + norm[tf.indices])
+        self.weights = tf
+        self._indptr = tf.indptr.tolist()
+
+        priorities = np.array([item.get("priority", 0) for item in self.items], dtype=float)
+        # Equal scores go to the higher priority, then to the earlier resource.
+        self._tie_rank = np.lexsort((np.arange(n), -priorities)).argsort()
+        self._tag_masks = {}
+        for doc, tags in enumerate(self.tags):
+            for tag in tags:
+                self._tag_masks.setdefault(tag, np.zeros(n, dtype=bool))[doc] = True
+        self._cache = {}
+
+    def scores(self, query):
+        """BM25 score of every resource for a query string (or list of terms)."""
+        terms = tokenize(query) if isinstance(query, str) else [t for q in query for t in tokenize(q)]
+        counts = Counter(self.vocabulary[t] for t in terms if t in self.vocabulary)
+        if not counts:
+            return np.zeros(len(self.items))
+        # The CSR rows of the query terms are contiguous slices; add them up directly.
+        indptr, indices, data = self._indptr, self.weights.indices, self.weights.data
+        docs = np.concatenate([indices[indptr[t]:indptr[t + 1]] for t in counts])
+        weights = np.concatenate([data[indptr[t]:indptr[t + 1]] * c for t, c in counts.items()])
+        return np.bincount(docs, weights=weights, minlength=len(self.items))
+
+    def search(self, query, k=TOP_K, tag=None):
+        """The k best (item, score) pairs for a query, best first; tag keeps only resources with that tag."""
+        key = (query if isinstance(query, str) else tuple(query), k, tag)
+        found = self._cache.get(key)
+        if found is None:
+            found = self._search(query, k, tag)
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = found
+        return list(found)
+
+    def _search(self, query, k, tag):
+        scores = self.scores(query)
+        matched = scores > 0
+        if tag is not None:
+            matched &= self._tag_masks.get(tag.lower(), np.zeros(len(self.items), dtype=bool))
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > k:
+            # Keep everything tied with the k-th best before ordering.
+            cutoff = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= cutoff]
+        order = candidates[np.lexsort((self._tie_rank[candidates], -scores[candidates]))][:k]
+        return tuple((self.items[doc], round(float(scores[doc]), 4)) for doc in order)
@@ -0,0 +1,14 @@
+"""
+Seeded randomness for LearnScope.ai
+Per-student random generators shared by the recommendation rules and the quiz
+bank. A generator is seeded from a hash of a key, so the same key always
+draws the same values, whatever the global random state.
+"""
+
+import hashlib
+import random
+
+
+def student_rng(key):
+    """A random.Random seeded from the key's hash, independent of the global random state."""
+    return random.Random(int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big"))
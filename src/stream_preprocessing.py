@@ -0,0 +1,214 @@
+"""
+Streaming Preprocessing for LearnScope.ai
+Out-of-core version of preprocess_pipeline for histories that do not fit in
+memory. The sources are read in chunks, twice:
+
+1. Fix the one-hot vocabulary and hash every complete row. Duplicates are
+   found from the sorted 8-byte row hashes, so only a hash and a keep flag
+   per row stay in memory.
+2. Encode the kept rows chunk by chunk into memory-mapped .npy files and
+   accumulate the scaler statistics with ``partial_fit``.
+
+The encoded columns match ``clean_and_encode`` on the same data. The store is
+consumed with ``StreamStore``, which hands out scaled row batches;
+``python src/train.py --store DIR`` trains the served model from it.
+
+Run from the repository root:
+    python src/stream_preprocessing.py --chunksize 100000
+    python src/stream_preprocessing.py --source math=exports/mat_2019_2024.csv --source portuguese=exports/por.csv
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from feature_schema import file_sha256
+from ingestion import CATEGORY_COLUMNS, STUDENT_DTYPES, downcast_integers
+from preprocessing import create_risk_label
+
+STORE_VERSION = 1
+DEFAULT_SOURCES = [("math", "data/student-mat.csv"), ("portuguese", "data/student-por.csv")]
+DEFAULT_STORE_DIR = os.path.join("data", "processed", "stream")
+
+# Categoricals would get per-chunk category sets, so chunks read text as plain strings.
+CHUNK_DTYPES = {col: (object if dtype == "category" else dtype) for col, dtype in STUDENT_DTYPES.items()}
+
+
+def iter_chunks(sources, chunksize):
+    """Yield chunks of complete rows, in file order, tagged with their subject."""
+    for subject, path in sources:
+        for chunk in pd.read_csv(path, sep=";", dtype=CHUNK_DTYPES, chunksize=chunksize):
+            chunk["subject"] = subject
+            # Integer columns are nullable until the incomplete rows are gone, then int8/int16
+            # again, so a row hashes the same whichever chunk it is read in.
+            yield downcast_integers(chunk.dropna())
+
+
+def scan_sources(sources, chunksize):
+    """First pass: category vocabularies, column order and a keep mask for duplicate rows."""
+    vocab = {}
+    hashes = []
+    columns = None
+    for chunk in iter_chunks(sources, chunksize):
+        columns = columns or list(chunk.columns)
+        for col in chunk.columns:
+            if col in CATEGORY_COLUMNS or col == "subject":
+                vocab.setdefault(col, set()).update(chunk[col].unique())
+        hashes.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+    if columns is None:
+        raise ValueError("No complete rows found in the sources")
+
+    hashes = np.concatenate(hashes)
+    # Keep the first occurrence of every row, like DataFrame.drop_duplicates.
+    _, first = np.unique(hashes, return_index=True)
+    keep = np.zeros(hashes.size, dtype=bool)
+    keep[first] = True
+    return columns, {col: sorted(values) for col, values in vocab.items()}, keep
+
+
+def encoded_columns(columns, vocab):
+    """Column layout produced by ``pd.get_dummies(X, drop_first=True)``.
+
+    Returns (feature names, numeric source columns, categorical source columns).
+    """
+    features = [c for c in columns if c not in ("G1", "G2", "G3")]
+    numeric = [c for c in features if c not in vocab]
+    categorical = [c for c in features if c in vocab]
+    return numeric + [f"{c}_{v}" for c in categorical for v in vocab[c][1:]], numeric, categorical
+
+
+def _encode_chunk(chunk, numeric, categorical, vocab, out):
+    out[:, :len(numeric)] = chunk[numeric].to_numpy(dtype=np.float32)
+    offset = len(numeric)
+    for col in categorical:
+        values = vocab[col]
+        codes = pd.Categorical(chunk[col], categories=values).codes
+        block = out[:, offset:offset + len(values) - 1]
+        block[:] = 0
+        # Code 0 is the dropped first category.
+        rows = np.flatnonzero(codes > 0)
+        block[rows, codes[rows] - 1] = 1
+        offset += len(values) - 1
+
+
+def build_store(sources=None, store_dir=DEFAULT_STORE_DIR, task="classification", chunksize=50000):
+    """Encode ``sources`` into a memory-mapped store in ``store_dir`` and return it."""
+    sources = sources or DEFAULT_SOURCES
+    columns, vocab, keep = scan_sources(sources, chunksize)
+    feature_names, numeric, categorical = encoded_columns(columns, vocab)
+    n_rows = int(keep.sum())
+
+    tmp_dir = f"{store_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    X = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "X.npy"), mode="w+", dtype=np.float32, shape=(n_rows, len(feature_names))
+    )
+    y = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "y.npy"), mode="w+",
+        dtype="<U15" if task == "classification" else np.float32, shape=(n_rows,)
+    )
+
+    scaler = StandardScaler()
+    seen = written = 0
+    for chunk in iter_chunks(sources, chunksize):
+        chunk_keep = keep[seen:seen + len(chunk)]
+        seen += len(chunk)
+        chunk = chunk[chunk_keep]
+        if chunk.empty:
+            continue
+        end = written + len(chunk)
+        _encode_chunk(chunk, numeric, categorical, vocab, X[written:end])
+        if task == "classification":
+            y[written:end] = create_risk_label(chunk)["risk_level"].to_numpy()
+        else:
+            y[written:end] = chunk["G3"].to_numpy(dtype=np.float32)
+        scaler.partial_fit(X[written:end].astype(np.float64))
+        written = end
+    X.flush()
+    y.flush()
+    del X, y
+
+    joblib.dump(scaler, os.path.join(tmp_dir, "scaler.pkl"))
+    meta = {
+        "store_version": STORE_VERSION,
+        "task": task,
+        "n_rows": n_rows,
+        "columns": feature_names,
+        "categories": vocab,
+        "sources": [{"subject": s, "path": p, "sha256": file_sha256(p)} for s, p in sources],
+        "scaler": {"mean": scaler.mean_.tolist(), "var": scaler.var_.tolist(), "n_samples_seen": int(scaler.n_samples_seen_)},
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    return StreamStore(store_dir)
+
+
+class StreamStore:
+    """Read side of a store written by ``build_store``; arrays stay on disk."""
+
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("store_version") != STORE_VERSION:
+            raise ValueError(f"Unsupported stream store version {self.meta.get('store_version')}")
+        self.X = np.load(os.path.join(store_dir, "X.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(store_dir, "y.npy"), mmap_mode="r")
+        self.scaler = joblib.load(os.path.join(store_dir, "scaler.pkl"))
+        self.columns = self.meta["columns"]
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    def feature_frame(self):
+        """A small frame standing in for the cleaned data in ``build_feature_schema``.
+
+        It holds every category value of each text column and the mean of
+        each numeric column, which is all the schema reads from the data.
+        """
+        categories = self.meta["categories"]
+        n_numeric = len(self.columns) - sum(len(values) - 1 for values in categories.values())
+        n_rows = max([len(values) for values in categories.values()] + [1])
+        frame = {col: np.full(n_rows, int(round(mean))) for col, mean in
+                 zip(self.columns[:n_numeric], self.meta["scaler"]["mean"])}
+        for col, values in categories.items():
+            frame[col] = np.resize(np.asarray(values, dtype=object), n_rows)
+        return pd.DataFrame(frame)
+
+    def split(self, test_size=0.2, seed=42):
+        """Train/test row indices, stratified for classification stores."""
+        rows = np.arange(len(self))
+        stratify = np.asarray(self.y) if self.meta["task"] == "classification" else None
+        return train_test_split(rows, test_size=test_size, random_state=seed, stratify=stratify)
+
+    def iter_batches(self, batch_rows=10000, rows=None, scaled=True):
+        """Yield (X, y) batches in float64, scaled with the store's scaler by default."""
+        rows = np.arange(len(self)) if rows is None else np.sort(np.asarray(rows))
+        for start in range(0, rows.size, batch_rows):
+            index = rows[start:start + batch_rows]
+            X = self.X[index].astype(np.float64)
+            yield (self.scaler.transform(X) if scaled else X), np.asarray(self.y[index])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode student data into a memory-mapped store, chunk by chunk")
+    parser.add_argument("--source", action="append", metavar="SUBJECT=PATH",
+                        help="semicolon-separated file for a subject (default: the two UCI files)")
+    parser.add_argument("--out", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--task", choices=["classification", "regression"], default="classification")
+    parser.add_argument("--chunksize", type=int, default=50000, help="rows read per chunk")
+    args = parser.parse_args()
+
+    sources = [tuple(s.split("=", 1)) for s in args.source] if args.source else None
+    store = build_store(sources, store_dir=args.out, task=args.task, chunksize=args.chunksize)
+    print(f"Encoded {len(store)} unique rows x {len(store.columns)} features into {args.out}/")
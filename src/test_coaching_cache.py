@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import ai_coach
+from coaching_cache import CoachingCache, MemoryBackend, SharedBackend, SQLiteBackend
+
+
+class _FakeStore:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class _CountingGroq:
+    """Stands in for the Groq client and counts completions."""
+
+    def __init__(self, content):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._content = content
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self._content))])
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", "1", ttl=60)
+    backend.set("b", "2", ttl=60)
+    backend.get("a")
+    backend.set("c", "3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.evictions == 1
+
+    backend.set("d", "4", ttl=-1)
+    assert backend.get("d") is None
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    backend.set("a", "1", ttl=60)
+    time.sleep(0.01)
+    backend.set("b", "2", ttl=60)
+    time.sleep(0.01)
+    backend.get("a")
+    backend.set("c", "3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.size() == 2
+
+
+def test_sqlite_backend_reconnects_after_fork(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    backend.set("a", "1", ttl=60)
+    inherited = backend._conn
+    backend._pid = -1  # as seen from a forked gunicorn worker
+    assert backend.get("a") == "1"
+    assert backend._conn is not inherited
+
+
+def test_shared_backend_accepts_local_store():
+    cache = CoachingCache(SharedBackend(_FakeStore()), ttl_seconds=60)
+    assert cache.get("k") is None
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_generate_ai_coaching_reuses_cached_completion(monkeypatch):
+    content = json.dumps({
+        "learning_diagnosis": "Diagnosis",
+        "weekly_goals": [],
+        "quiz_questions": [],
+        "study_plan": {"overview": "Plan", "days": []},
+        "resources": [],
+        "next_steps": ["Review notes"],
+    })
+    fake = _CountingGroq(content)
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+
+    diagnosis = {"weaknesses": ["high absenteeism"], "strengths": []}
+    first = ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass the exam")
+    second = ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass the exam")
+
+    assert fake.calls == 1
+    assert first == second
+    assert first["ai_generated"] is True
+    assert ai_coach.get_cache_stats()["hits"] == 1
+
+
+def test_budget_exceeded_falls_back_and_late_answer_fills_cache(monkeypatch):
+    content = json.dumps({
+        "learning_diagnosis": "Late diagnosis",
+        "weekly_goals": [],
+        "quiz_questions": [],
+        "study_plan": {"overview": "Plan", "days": []},
+        "resources": [],
+        "next_steps": ["Review notes"],
+    })
+    fake = _CountingGroq(content)
+    original_create = fake.chat.completions.create
+
+    def slow_create(**kwargs):
+        time.sleep(0.3)
+        return original_create(**kwargs)
+
+    fake.chat.completions.create = slow_create
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+    exceeded_before = ai_coach.get_coaching_stats()["budget_exceeded"]
+
+    diagnosis = {"weaknesses": ["high absenteeism"], "strengths": []}
+    fast = ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass", timeout=0.05)
+    assert fast["ai_generated"] is False
+    assert ai_coach.get_coaching_stats()["budget_exceeded"] == exceeded_before + 1
+
+    deadline = time.monotonic() + 5
+    while ai_coach.COACHING_CACHE.backend.size() == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    cached = ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass", timeout=0.05)
+    assert cached["ai_generated"] is True
+    assert cached["learning_diagnosis"] == "Late diagnosis"
+    assert fake.calls == 1
+
+
+def test_budgeted_calls_are_shared_bounded_and_skipped_without_budget(monkeypatch):
+    release = threading.Event()
+    fake = _CountingGroq(json.dumps({
+        "learning_diagnosis": "Shared diagnosis",
+        "weekly_goals": [],
+        "quiz_questions": [],
+        "study_plan": {"overview": "Plan", "days": []},
+        "resources": [],
+        "next_steps": ["Review notes"],
+    }))
+    original_create = fake.chat.completions.create
+
+    def blocked_create(**kwargs):
+        release.wait(5)
+        return original_create(**kwargs)
+
+    fake.chat.completions.create = blocked_create
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+    monkeypatch.setattr(ai_coach, "_llm_slots", threading.BoundedSemaphore(1))
+    stats = dict(ai_coach.get_coaching_stats())
+    diagnosis = {"weaknesses": [], "strengths": []}
+
+    # No budget left: no call is made.
+    assert ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass", timeout=0)["ai_generated"] is False
+    assert ai_coach.get_coaching_stats()["llm_calls"] == stats["llm_calls"]
+
+    # Two identical requests that time out wait on the same call.
+    for _ in range(2):
+        ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass", timeout=0.02)
+    # The only slot is taken, so a different request falls back without calling.
+    ai_coach.generate_ai_coaching({"subject": "portuguese"}, diagnosis, "Average", 13.0, "Pass", timeout=0.02)
+    now = ai_coach.get_coaching_stats()
+    assert now["llm_calls"] == stats["llm_calls"] + 1
+    assert now["llm_shared"] == stats["llm_shared"] + 1
+    assert now["llm_rejected"] == stats["llm_rejected"] + 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while ai_coach.COACHING_CACHE.backend.size() == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert fake.calls == 1
+    assert ai_coach.COACHING_CACHE.backend.size() == 1
+    assert ai_coach.get_coaching_stats()["late_cached"] == stats["late_cached"] + 1
@@ -0,0 +1,83 @@
+import itertools
+
+import ai_coach
+import resource_registry
+import build_coaching_fallbacks
+from coaching_fallbacks import FallbackTable, write_fallback_table
+from diagnosis import get_student_diagnosis
+
+
+def test_table_round_trips_and_shares_sections(tmp_path):
+    path = str(tmp_path / "fallbacks.bin")
+    entries = {
+        "a": {"x": [1, 2], "y": {"k": "v"}},
+        "b": {"x": [1, 2], "y": {"k": "w"}},
+    }
+    stats = write_fallback_table(path, entries, ["x", "y"], "fp")
+    table = FallbackTable(path)
+
+    assert stats["keys"] == 2 and stats["blobs"] == 3
+    assert table.fingerprint == "fp"
+    assert table.get("a") == entries["a"] and table.get("b") == entries["b"]
+    assert table.get("a")["x"] is table.get("b")["x"]
+    assert table.get("missing") is None
+
+
+def test_precomputed_fallback_matches_live_rules(tmp_path, monkeypatch):
+    path = str(tmp_path / "coaching_fallbacks.bin")
+    build_coaching_fallbacks.build(path)
+    monkeypatch.setattr(ai_coach, "FALLBACK_TABLE_PATH", path)
+    table = ai_coach._load_fallback_table()
+    assert table is not None
+    monkeypatch.setattr(ai_coach, "_FALLBACK_TABLE_SOURCES", None)
+
+    # The last student leaves the subject out: resources default to math, the quiz to general topics.
+    students = [
+        {"failures": 2, "absences": 14, "studytime": 1, "goout": 5, "subject": "portuguese"},
+        {"studytime": 2, "failures": 0},
+    ]
+    for student, risk_level in itertools.product(students, ["At-risk", "Average", "High-performing"]):
+        diagnosis = get_student_diagnosis(student, risk_level)
+        for goal in ["Ace the final exam", "Become a stronger writer"]:
+            monkeypatch.setattr(ai_coach, "FALLBACK_TABLE", None)
+            live = ai_coach._generate_fallback(student, diagnosis, risk_level, 9.0, goal)
+            monkeypatch.setattr(ai_coach, "FALLBACK_TABLE", table)
+            before = ai_coach.get_coaching_stats()["fallback_precomputed"]
+            assert ai_coach._generate_fallback(student, diagnosis, risk_level, 9.0, goal) == live
+            assert ai_coach.get_coaching_stats()["fallback_precomputed"] == before + 1
+    assert {q["topic"] for q in live["quiz_questions"]} != {"math"}
+
+    # Both paths hand out copies, so editing a response cannot change the next one.
+    for fallback_table in (table, None):
+        monkeypatch.setattr(ai_coach, "FALLBACK_TABLE", fallback_table)
+        first = ai_coach._generate_fallback(student, diagnosis, risk_level, 9.0, goal)
+        first["quiz_questions"][0]["question"] = "changed"
+        first["resources"][0]["name"] = "changed"
+        first["next_steps"].append("changed")
+        assert ai_coach._generate_fallback(student, diagnosis, risk_level, 9.0, goal) == live
+
+
+def test_stale_table_is_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "coaching_fallbacks.bin")
+    write_fallback_table(path, {}, build_coaching_fallbacks.SECTIONS, "built-from-other-rules")
+    monkeypatch.setattr(ai_coach, "FALLBACK_TABLE_PATH", path)
+    assert ai_coach._load_fallback_table() is None
+
+
+def test_table_is_rechecked_when_the_registry_reloads(tmp_path, monkeypatch):
+    path = str(tmp_path / "coaching_fallbacks.bin")
+    build_coaching_fallbacks.build(path)
+    monkeypatch.setattr(ai_coach, "FALLBACK_TABLE_PATH", path)
+    monkeypatch.setattr(ai_coach, "FALLBACK_TABLE", ai_coach._NOT_LOADED)
+    monkeypatch.setattr(ai_coach, "_FALLBACK_TABLE_SOURCES", None)
+    registry = resource_registry.get_registry()
+    assert ai_coach._get_fallback_table() is not None
+
+    # A live edit of resources.json makes the table stale until it is rebuilt.
+    edited = dict(registry.table, categories=dict(registry.table["categories"], math=[]))
+    monkeypatch.setattr(resource_registry, "_REGISTRY", resource_registry.compile_registry(edited))
+    monkeypatch.setattr(resource_registry, "RESOURCES_CHECK_INTERVAL", float("inf"))
+    assert ai_coach._get_fallback_table() is None
+
+    monkeypatch.setattr(resource_registry, "_REGISTRY", resource_registry.compile_registry(registry.table))
+    assert ai_coach._get_fallback_table() is not None
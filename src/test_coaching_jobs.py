@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import ai_coach
+import api
+from coaching_cache import MemoryBackend, SQLiteBackend
+from coaching_jobs import DONE, FAILED, CoachingJobs, jobs_from_env
+
+
+class _SlowGroq:
+    def __init__(self, content, release):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._content = content
+        self._release = release
+
+    def _create(self, **kwargs):
+        self._release.wait(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self._content))])
+
+
+def _wait_for(jobs, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["state"] in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_jobs_are_bounded_and_report_results():
+    release = threading.Event()
+    jobs = CoachingJobs(max_workers=1, max_pending=1)
+    first = jobs.submit(lambda: release.wait(5) and {"ok": True})
+    assert jobs.submit(lambda: {"ok": True}) is None
+    assert jobs.stats()["rejected"] == 1
+
+    release.set()
+    assert _wait_for(jobs, first["id"])["result"] == {"ok": True}
+
+    failing = jobs.submit(lambda: 1 / 0)
+    assert _wait_for(jobs, failing["id"])["state"] == FAILED
+
+
+def test_async_predict_returns_placeholder_then_coaching(monkeypatch):
+    release = threading.Event()
+    content = json.dumps({
+        "learning_diagnosis": "LLM diagnosis",
+        "weekly_goals": [{"week_label": "Week 1"}],
+        "quiz_questions": [{"question": "Q"}],
+        "study_plan": {"overview": "Plan", "days": []},
+        "resources": [],
+        "next_steps": ["Review notes"],
+    })
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(ai_coach, "_client", _SlowGroq(content, release))
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", None)
+    monkeypatch.setattr(api, "COACHING_JOBS", CoachingJobs(max_workers=1, max_pending=4))
+
+    client = api.app.test_client()
+    response = client.post("/predict?coaching=async", json={"studytime": 2, "failures": 0})
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body["ai_coaching"]["ai_generated"] is False
+    job_id = body["coaching_job"]["id"]
+    assert client.get(f"/coaching/{job_id}").status_code == 202
+
+    release.set()
+    _wait_for(api.COACHING_JOBS, job_id)
+    done = client.get(f"/coaching/{job_id}").get_json()
+    assert done["ai_coaching"]["learning_diagnosis"] == "LLM diagnosis"
+    assert done["ai_coaching"]["ai_generated"] is True
+    assert client.get("/coaching/unknown").status_code == 404
+
+
+def test_several_workers_share_a_job_store(monkeypatch, tmp_path):
+    monkeypatch.delenv("COACHING_JOBS_BACKEND", raising=False)
+    monkeypatch.setenv("COACHING_JOBS_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert isinstance(jobs_from_env().store, MemoryBackend)
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert isinstance(jobs_from_env().store, SQLiteBackend)
+
+    # A shared store that cannot be opened stops startup instead of splitting jobs per worker.
+    monkeypatch.setenv("COACHING_JOBS_BACKEND", "redis")
+    monkeypatch.delenv("COACHING_JOBS_URL", raising=False)
+    with pytest.raises(RuntimeError):
+        jobs_from_env()
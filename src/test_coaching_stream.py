@@ -0,0 +1,108 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import ai_coach
+from coaching_cache import CoachingCache, MemoryBackend
+from coaching_stream import JsonSectionParser
+
+
+class _StreamingGroq:
+    """Stands in for the Groq client and streams ``content`` in small deltas."""
+
+    def __init__(self, content, fail_after=None):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._content = content
+        self._fail_after = fail_after
+
+    def _create(self, **kwargs):
+        assert kwargs.get("stream") is True
+        # Groq rejects JSON mode on streamed completions.
+        assert "response_format" not in kwargs
+        self.calls += 1
+        return self._chunks()
+
+    def _chunks(self):
+        for start in range(0, len(self._content), 7):
+            if self._fail_after is not None and start >= self._fail_after:
+                raise ConnectionError("stream dropped")
+            delta = SimpleNamespace(content=self._content[start:start + 7])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+COACHING = {
+    "learning_diagnosis": "Diagnosis with \"quotes\", commas and } braces",
+    "study_plan": {"overview": "Plan", "days": [{"day": "Mon", "tasks": ["a", "b"]}]},
+    "resources": [{"name": "Made up", "url": "https://example.invalid"}],
+    "next_steps": ["Review notes"],
+}
+
+
+def test_parser_emits_members_as_they_complete():
+    parser = JsonSectionParser()
+    text = json.dumps(COACHING)
+    seen = []
+    for i, char in enumerate(text):
+        for name, value in parser.feed(char):
+            seen.append((name, i))
+    assert [name for name, _ in seen] == list(COACHING)
+    # The first section is available long before the object closes.
+    assert seen[0][1] < len(text) // 2
+    assert parser.finished
+
+
+def test_parser_rejects_malformed_member():
+    parser = JsonSectionParser()
+    with pytest.raises(ValueError):
+        list(parser.feed('{"a": [1, 2,], "b": 1}'))
+
+
+def test_stream_repairs_sections_and_caches(monkeypatch):
+    fake = _StreamingGroq(json.dumps(COACHING))
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+
+    diagnosis = {"weaknesses": ["high absenteeism"], "strengths": []}
+    first = list(ai_coach.stream_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass"))
+    sections = dict(first)
+
+    assert [name for name, _ in first[:4]] == ["learning_diagnosis", "study_plan", "resources", "next_steps"]
+    assert first[-1] == ("ai_generated", True)
+    assert set(ai_coach.STREAM_SECTIONS) <= set(sections)
+    assert all(r["url"] != "https://example.invalid" for r in sections["resources"])
+    assert len(sections["next_steps"]) == 5
+
+    second = list(ai_coach.stream_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass"))
+    assert fake.calls == 1
+    assert second == first
+
+
+def test_stream_skips_text_around_the_object(monkeypatch):
+    fake = _StreamingGroq("Here is the plan:\n```json\n" + json.dumps(COACHING) + "\n```\n")
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+
+    diagnosis = {"weaknesses": ["high absenteeism"], "strengths": []}
+    sections = list(ai_coach.stream_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass"))
+    assert sections[0] == ("learning_diagnosis", COACHING["learning_diagnosis"])
+    assert sections[-1] == ("ai_generated", True)
+    # Only the object is cached, so the non-streaming path can parse it.
+    cached = ai_coach.generate_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass")
+    assert cached["learning_diagnosis"] == COACHING["learning_diagnosis"]
+    assert fake.calls == 1
+
+
+def test_stream_failure_fills_remaining_sections_from_rules(monkeypatch):
+    fake = _StreamingGroq(json.dumps(COACHING), fail_after=112)
+    monkeypatch.setattr(ai_coach, "_client", fake)
+    monkeypatch.setattr(ai_coach, "COACHING_CACHE", CoachingCache(MemoryBackend(), ttl_seconds=60))
+
+    diagnosis = {"weaknesses": ["high absenteeism"], "strengths": []}
+    sections = list(ai_coach.stream_ai_coaching({"subject": "math"}, diagnosis, "Average", 13.0, "Pass"))
+
+    assert sections[0] == ("learning_diagnosis", COACHING["learning_diagnosis"])
+    assert sections[-1] == ("ai_generated", False)
+    assert set(ai_coach.STREAM_SECTIONS) <= set(dict(sections))
+    assert ai_coach.COACHING_CACHE.backend.size() == 0
@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from diagnosis import diagnose_students, get_student_diagnosis
+
+RISK_LEVELS = ["At-risk", "Average", "High-performing"]
+
+# Each side of every threshold, with the field also left out (None).
+GRID = {
+    "failures": [0, 1, None],
+    "absences": [4, 5, 6, 11, None],
+    "studytime": [1, 2, 3, None],
+    "health": [2, 3, None],
+    "goout": [3, 4, None],
+    "higher": ["yes", "no", None],
+    "famsup": ["yes", None],
+}
+
+
+def _grid_students():
+    return [{field: value for field, value in zip(GRID, values) if value is not None}
+            for values in itertools.product(*GRID.values())]
+
+
+def test_batch_matches_per_student_diagnosis():
+    students = _grid_students()
+    risk_levels = [RISK_LEVELS[i % 3] for i in range(len(students))]
+    expected = [get_student_diagnosis(s, r) for s, r in zip(students, risk_levels)]
+
+    assert diagnose_students(students, risk_levels) == expected
+    assert diagnose_students(students, risk_levels, shared=True) == expected
+
+
+def test_batch_accepts_frames_and_arrays():
+    df = pd.read_csv("data/student-por.csv", sep=";")
+    risk_levels = np.array([RISK_LEVELS[i % 3] for i in range(len(df))])
+    expected = [get_student_diagnosis(s, r) for s, r in zip(df.to_dict("records"), risk_levels)]
+    assert diagnose_students(df, risk_levels) == expected
+
+    columns = ["failures", "absences", "studytime", "health", "goout"]
+    numeric = [get_student_diagnosis(s, r) for s, r in zip(df[columns].to_dict("records"), risk_levels)]
+    assert diagnose_students(df[columns].to_numpy(), risk_levels, columns=columns) == numeric
+
+
+def test_rows_own_their_lists_unless_shared():
+    students = [{"failures": 2, "absences": 20}] * 2
+    first, second = diagnose_students(students, ["At-risk"] * 2)
+    assert first == second and first["weaknesses"] is not second["weaknesses"]
+    assert first["weaknesses"] == ["past academic failures", "high absenteeism"]
+    first, second = diagnose_students(students, ["At-risk"] * 2, shared=True)
+    assert first is second
+
+
+def test_batch_rejects_non_numeric_fields():
+    with pytest.raises(TypeError):
+        diagnose_students([{"failures": "2"}], ["Average"])
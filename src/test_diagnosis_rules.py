@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+import diagnosis_rules
+from diagnosis import diagnose_students, get_student_diagnosis
+from diagnosis_rules import RuleError, compile_rules, load_rules
+
+
+def _table():
+    with open("data/diagnosis_rules.json") as f:
+        return json.load(f)
+
+
+def test_shared_conditions_compile_to_one_predicate():
+    rules = load_rules("data/diagnosis_rules.json")
+    conditions = [(f, op, v) for f, op, v in rules.predicates]
+    assert len(conditions) == len(set(conditions)) == 12
+    # "failures >= 1" drives a weakness, a recommendation, a profile and a pattern.
+    failed = conditions.index(("failures", ">=", 1))
+    assert rules.weaknesses[0][0] == failed and rules.recommendations[0][0] == failed
+    assert rules.profiles[0][0] == rules.patterns[0][0] == rules.clauses.index((0, 1))
+
+
+def test_scalar_and_vectorized_modes_agree_on_custom_rules():
+    table = _table()
+    table["patterns"].append({"when": ["failures >= 1", "goout >= 4", "famsup != yes"], "label": "Unsupported and distracted"})
+    table["weaknesses"][2]["weight"] = 20
+    rules = compile_rules(table)
+    students = [{"failures": f, "goout": g, "studytime": s, "famsup": fam}
+                for f in (0, 2) for g in (2, 5) for s in (1, 3) for fam in ("yes", "no")]
+    risk_levels = ["At-risk", "Average"] * (len(students) // 2)
+
+    expected = [get_student_diagnosis(s, r, rules=rules) for s, r in zip(students, risk_levels)]
+    assert diagnose_students(students, risk_levels, rules=rules) == expected
+    hits = rules.evaluate_columns({f: np.array([s.get(f, d) for s in students], dtype=object if f in rules.text_fields else None)
+                                   for f, d in rules.fields.items()})
+    assert [tuple(row) for row in hits.tolist()] == [rules.evaluate(s) for s in students]
+    distracted = students.index({"failures": 2, "goout": 5, "studytime": 1, "famsup": "no"})
+    assert expected[distracted]["weaknesses"][0] == "low weekly study engagement"
+    assert "Unsupported and distracted" in expected[distracted]["patterns"]
+    assert "Unsupported and distracted" not in expected[distracted - 1]["patterns"]
+
+
+@pytest.mark.parametrize("condition", ["absences >", "age > 3", "absences ~ 3", "higher > yes"])
+def test_bad_conditions_are_rejected(condition):
+    table = _table()
+    table["weaknesses"][0]["when"] = condition
+    with pytest.raises(RuleError):
+        compile_rules(table)
+
+
+def test_edited_thresholds_are_picked_up_without_a_restart(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    table = _table()
+    path.write_text(json.dumps(table))
+    monkeypatch.setattr(diagnosis_rules, "RULES_PATH", str(path))
+    monkeypatch.setattr(diagnosis_rules, "RULES_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(diagnosis_rules, "_RULES", None)
+    student = {"absences": 8}
+    assert "high absenteeism" not in get_student_diagnosis(student, "Average")["weaknesses"]
+
+    table["weaknesses"][1]["when"] = "absences > 7"
+    path.write_text(json.dumps(table, indent=1))
+    assert "high absenteeism" in get_student_diagnosis(student, "Average")["weaknesses"]
+
+    # A broken edit is ignored; the last good rules stay in use.
+    path.write_text('{"fields": ')
+    assert "high absenteeism" in get_student_diagnosis(student, "Average")["weaknesses"]
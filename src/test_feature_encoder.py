@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from api import FEATURE_ENCODER, preprocess_input
+
+
+def _dataset_rows():
+    df = pd.read_csv("data/student-por.csv", sep=";").drop(columns=["G1", "G2", "G3"])
+    df["subject"] = "portuguese"
+    return df.to_dict("records")
+
+
+def _reference(students):
+    return preprocess_input(pd.DataFrame(students)).to_numpy(dtype=np.float64)
+
+
+def test_encoder_matches_pandas_on_dataset():
+    for student in _dataset_rows()[:200]:
+        expected = _reference([student])
+        assert np.array_equal(FEATURE_ENCODER.transform_one(student), expected)
+
+
+def test_encoder_matches_pandas_on_partial_input():
+    students = [
+        {"studytime": 2, "failures": 0},
+        {"studytime": 1, "failures": 3, "absences": 20, "sex": "M", "subject": "portuguese"},
+        {"studytime": 4, "failures": 0, "Mjob": "unknown", "higher": "no", "age": "18"},
+        {"studytime": 3, "failures": 1, "higher": None, "school": "MS"},
+        # Values float32 cannot hold exactly.
+        {"studytime": 2, "failures": 0, "age": 17.3, "absences": 2.7, "G1": 11.1},
+    ]
+    for student in students:
+        assert np.array_equal(FEATURE_ENCODER.transform_one(student), _reference([student]))
+
+
+def test_encoder_block_matches_rows():
+    students = _dataset_rows()[:50]
+    block = FEATURE_ENCODER.transform(students)
+    assert block.dtype == np.float64
+    assert block.shape == (50, len(FEATURE_ENCODER.columns))
+    for i, student in enumerate(students):
+        assert np.array_equal(block[i], FEATURE_ENCODER.transform_one(student)[0])
+
+
+def test_encoder_rejects_non_numeric_values():
+    try:
+        FEATURE_ENCODER.transform_one({"studytime": 2, "failures": 0, "age": "old"})
+    except ValueError as e:
+        assert "age" in str(e)
+    else:
+        raise AssertionError("Expected ValueError for non-numeric age")
@@ -0,0 +1,78 @@
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from feature_encoder import FeatureEncoder
+from feature_schema import (
+    CATEGORICAL_DEFAULTS, EXPECTED_FEATURES, NUMERIC_DEFAULTS,
+    build_feature_schema, load_feature_schema, save_feature_schema, verify_artifacts
+)
+from model_bundle import ModelBundle
+from preprocessing import preprocess_pipeline
+
+
+def _train_artifacts(tmp_path):
+    X_train, _, y_train, _, scaler, feature_names, cleaned_df = preprocess_pipeline(
+        "data/student-mat.csv",
+        "data/student-por.csv",
+        task="classification",
+        return_cleaned=True
+    )
+    model = LogisticRegression(max_iter=200).fit(X_train, y_train)
+    model_path, scaler_path = tmp_path / "model.pkl", tmp_path / "scaler.pkl"
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    schema = build_feature_schema(
+        cleaned_df.drop(columns=["risk_level"]), feature_names, scaler, model, model_path, scaler_path
+    )
+    return schema, model, scaler, model_path, scaler_path
+
+
+def test_schema_round_trip_and_verification(tmp_path):
+    schema, model, scaler, model_path, scaler_path = _train_artifacts(tmp_path)
+    save_feature_schema(schema, tmp_path / "feature_schema.json")
+    loaded = load_feature_schema(tmp_path / "feature_schema.json")
+
+    assert loaded["columns"] == EXPECTED_FEATURES
+    assert loaded["categories"]["subject"] == ["math", "portuguese"]
+    assert verify_artifacts(loaded, model, scaler, model_path, scaler_path) == []
+
+    scaler.mean_ = scaler.mean_ + 1
+    joblib.dump(scaler, scaler_path)
+    assert verify_artifacts(loaded, model, scaler, model_path, scaler_path)
+
+
+def test_schema_encoder_matches_builtin_layout(tmp_path):
+    schema, *_ = _train_artifacts(tmp_path)
+    from_schema = FeatureEncoder.from_schema(schema)
+    builtin = FeatureEncoder(EXPECTED_FEATURES, CATEGORICAL_DEFAULTS, NUMERIC_DEFAULTS)
+    students = [
+        {"studytime": 2, "failures": 0},
+        {"studytime": 1, "failures": 2, "Mjob": "health", "subject": "portuguese", "absences": 12},
+    ]
+    assert np.array_equal(from_schema.transform(students), builtin.transform(students))
+
+
+def test_encoded_rows_predict_without_feature_name_warnings(tmp_path):
+    schema, model, scaler, *_ = _train_artifacts(tmp_path)
+    assert not hasattr(scaler, "feature_names_in_")
+    encoder = FeatureEncoder.from_schema(schema)
+    X = encoder.transform([{"studytime": 2, "failures": 0}])
+
+    # A scaler fitted on a DataFrame (older artifacts) is quietened only inside predict.
+    named = StandardScaler().fit(pd.DataFrame(np.zeros((2, len(schema["columns"]))), columns=schema["columns"]))
+    named.mean_, named.scale_ = scaler.mean_, scaler.scale_
+    filters = list(warnings.filters)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for bundle_scaler in (scaler, named):
+            ModelBundle(encoder, schema, model, bundle_scaler).predict(X)
+    assert warnings.filters == filters
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        named.transform(X)
+    assert any("valid feature names" in str(w.message) for w in caught)
@@ -0,0 +1,128 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from feature_schema import build_feature_schema, save_feature_schema
+from incremental import encode_records, load_graded_records, remap_forest, remap_linear, update_model
+from inference_kernel import KernelPredictor, export_inference_kernel
+from preprocessing import clean_and_encode, create_risk_label, load_and_merge
+
+
+def _train_base(models_dir, model):
+    """Train on the math file only, leaving the Portuguese rows as the delta."""
+    df = create_risk_label(load_and_merge("data/student-mat.csv", "data/student-por.csv"))
+    X, y, cleaned = clean_and_encode(df, target="risk_level", task="classification")
+    base = (cleaned["subject"] == "math").to_numpy()
+    scaler = StandardScaler().fit(X[base])
+    model.fit(scaler.transform(X[base]), y[base])
+
+    model_path, scaler_path = models_dir / "final_model.pkl", models_dir / "scaler.pkl"
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    schema = build_feature_schema(cleaned.drop(columns=["risk_level"]), X.columns, scaler, model, model_path, scaler_path)
+    save_feature_schema(schema, models_dir / "feature_schema.json")
+    export_inference_kernel(model, scaler, schema, models_dir / "inference_kernel.npz")
+    return schema, model, scaler
+
+
+def _shifted_scaler(scaler, X):
+    shifted = StandardScaler().fit(X)
+    shifted.mean_ = scaler.mean_ + 0.5
+    shifted.scale_ = scaler.scale_ * 1.5
+    return shifted
+
+
+def test_encoded_records_match_training_columns():
+    df = create_risk_label(load_and_merge("data/student-mat.csv", "data/student-por.csv"))
+    X_train, y_train, cleaned = clean_and_encode(df, target="risk_level", task="classification")
+    schema = {
+        "columns": list(X_train.columns),
+        "numeric_defaults": {c: 0 for c in cleaned.columns if cleaned[c].dtype.kind != "O" and c != "risk_level"},
+        "categorical_defaults": {c: "" for c in cleaned.columns if cleaned[c].dtype.kind == "O" and c != "risk_level"},
+        "categories": {c: sorted(cleaned[c].unique()) for c in cleaned.columns
+                       if cleaned[c].dtype.kind == "O" and c != "risk_level"},
+    }
+    X, y = encode_records(load_graded_records("data/student-por.csv", subject="portuguese"), schema)
+    expected = X_train[cleaned["subject"] == "portuguese"].astype(float)
+    np.testing.assert_array_equal(X, expected.to_numpy())
+    assert list(y) == list(y_train[cleaned["subject"] == "portuguese"])
+
+
+def test_remapping_keeps_decisions_under_a_new_scaler():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4)) * 3 + 1
+    y = np.where(X[:, 0] > 1, "a", np.where(X[:, 1] > 1, "b", "c"))
+    scaler = StandardScaler().fit(X)
+    shifted = _shifted_scaler(scaler, X)
+
+    linear = LogisticRegression().fit(scaler.transform(X), y)
+    coef, intercept = remap_linear(linear.coef_, linear.intercept_, scaler, shifted)
+    np.testing.assert_allclose(shifted.transform(X) @ coef.T + intercept, linear.decision_function(scaler.transform(X)))
+
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(scaler.transform(X), y)
+    before = forest.predict(scaler.transform(X))
+    remap_forest(forest, scaler, shifted)
+    assert np.array_equal(forest.predict(shifted.transform(X)), before)
+
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(max_iter=1000, class_weight="balanced"),
+    RandomForestClassifier(n_estimators=20, class_weight="balanced", random_state=0),
+])
+def test_update_writes_and_promotes_a_consistent_version(tmp_path, model):
+    schema, base_model, base_scaler = _train_base(tmp_path, model)
+
+    manifest = update_model("data/student-por.csv", subject="portuguese", models_dir=str(tmp_path))
+
+    new_schema = json.loads((tmp_path / "feature_schema.json").read_text())
+    assert manifest["records"]["rows"] == 649
+    assert manifest["n_samples_seen"] == base_scaler.n_samples_seen_ + 649
+    assert manifest["parent_model_sha256"] == schema["model"]["sha256"]
+    assert new_schema["columns"] == schema["columns"]
+    assert new_schema["model"]["sha256"] == manifest["artifacts"]["final_model.pkl"]
+    assert (tmp_path / "versions" / manifest["version"] / "manifest.json").exists()
+    assert not (tmp_path / ".promoting").exists()
+
+    updated = joblib.load(tmp_path / "final_model.pkl")
+    scaler = joblib.load(tmp_path / "scaler.pkl")
+    kernel = KernelPredictor.load(tmp_path / "inference_kernel.npz")
+    assert kernel.model_sha256 == new_schema["model"]["sha256"]
+    X, _ = encode_records(load_graded_records("data/student-mat.csv", subject="math"), new_schema)
+    assert np.array_equal(kernel.predict(X), updated.predict(scaler.transform(X)))
+    if isinstance(model, RandomForestClassifier):
+        assert len(updated.estimators_) > len(base_model.estimators_)
+
+    second = update_model("data/student-mat.csv", subject="math", models_dir=str(tmp_path))
+    assert second["parent"] == manifest["version"]
+
+
+def test_unseen_categories_need_a_full_retrain(tmp_path):
+    _train_base(tmp_path, LogisticRegression(max_iter=1000))
+    records = pd.read_csv("data/student-por.csv", sep=";").head(20)
+    records.loc[0, "Mjob"] = "astronaut"
+    path = tmp_path / "new.csv"
+    records.to_csv(path, sep=";", index=False)
+
+    with pytest.raises(ValueError, match="Mjob"):
+        update_model(str(path), subject="portuguese", models_dir=str(tmp_path))
+
+
+def test_rows_with_blank_grades_are_skipped(tmp_path):
+    por = pd.read_csv("data/student-por.csv", sep=";")
+    partial = por.copy()
+    partial.loc[:9, "G3"] = None
+    partial.loc[20, "G2"] = None
+    partial_path, complete_path = tmp_path / "partial.csv", tmp_path / "complete.csv"
+    partial.to_csv(partial_path, sep=";", index=False)
+    por.drop(index=list(range(10)) + [20]).to_csv(complete_path, sep=";", index=False)
+
+    records = load_graded_records(str(partial_path), subject="portuguese")
+    expected = load_graded_records(str(complete_path), subject="portuguese")
+    pd.testing.assert_frame_equal(records.reset_index(drop=True), expected.reset_index(drop=True))
+    assert records["studytime"].dtype == "int8"
@@ -0,0 +1,61 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from inference_kernel import KernelPredictor, export_inference_kernel
+from preprocessing import preprocess_pipeline
+
+SCHEMA = {"fingerprint": "test-fingerprint", "model": {"sha256": "test-sha"}}
+
+
+def _data():
+    X_train, X_test, y_train, y_test, scaler, _ = preprocess_pipeline(
+        "data/student-mat.csv",
+        "data/student-por.csv",
+        task="classification"
+    )
+    # The kernel takes unscaled rows and applies the scaler itself.
+    return scaler.inverse_transform(X_train), scaler.inverse_transform(X_test), y_train, scaler
+
+
+def _round_trip(model, scaler, tmp_path):
+    path = tmp_path / "kernel.npz"
+    export_inference_kernel(model, scaler, SCHEMA, path)
+    return KernelPredictor.load(path)
+
+
+def test_linear_kernel_matches_sklearn(tmp_path):
+    X_train, X_test, y_train, scaler = _data()
+    model = LogisticRegression(max_iter=1000, class_weight="balanced").fit(scaler.transform(X_train), y_train)
+    kernel = _round_trip(model, scaler, tmp_path)
+
+    assert kernel.kind == "linear"
+    assert np.array_equal(kernel.predict(X_test), model.predict(scaler.transform(X_test)))
+    np.testing.assert_allclose(
+        kernel.decision_scores(X_test), model.decision_function(scaler.transform(X_test)), rtol=1e-9, atol=1e-9
+    )
+
+
+def test_forest_kernel_matches_sklearn(tmp_path):
+    X_train, X_test, y_train, scaler = _data()
+    model = RandomForestClassifier(n_estimators=25, random_state=42).fit(scaler.transform(X_train), y_train)
+    kernel = _round_trip(model, scaler, tmp_path)
+
+    assert kernel.kind == "forest"
+    assert np.array_equal(kernel.predict(X_test), model.predict(scaler.transform(X_test)))
+    np.testing.assert_allclose(kernel.decision_scores(X_test), model.predict_proba(scaler.transform(X_test)))
+
+
+def test_kernel_arrays_are_mapped_from_the_file(tmp_path):
+    X_train, X_test, y_train, scaler = _data()
+    model = RandomForestClassifier(n_estimators=5, random_state=42).fit(scaler.transform(X_train), y_train)
+    path = tmp_path / "kernel.npz"
+    export_inference_kernel(model, scaler, SCHEMA, path)
+
+    mapped = KernelPredictor.load(path)
+    copied = KernelPredictor.load(path, memory_map=False)
+
+    assert not mapped._threshold.flags.owndata and not mapped._threshold.flags.writeable
+    assert mapped._threshold.ctypes.data % 64 == 0
+    assert copied._threshold.flags.writeable
+    np.testing.assert_array_equal(mapped.decision_scores(X_test), copied.decision_scores(X_test))
@@ -0,0 +1,88 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import ingestion
+from ingestion import load_students, read_student_csv
+from preprocessing import clean_and_encode, create_risk_label, load_and_merge
+
+SOURCES = [("math", "data/student-mat.csv"), ("portuguese", "data/student-por.csv")]
+
+
+def _plain_dataset():
+    frames = []
+    for subject, path in SOURCES:
+        df = pd.read_csv(path, sep=";")
+        df["subject"] = subject
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).dropna().drop_duplicates()
+
+
+def test_compact_dtypes():
+    df = read_student_csv("data/student-por.csv", subject="portuguese")
+    assert df["studytime"].dtype == "int8"
+    assert df["absences"].dtype == "int16"
+    assert list(df["Mjob"].cat.categories) == ["at_home", "health", "other", "services", "teacher"]
+    assert df["subject"].dtype == "category"
+
+
+def test_encoded_columns_match_plain_csv_parsing(tmp_path):
+    typed = load_students(SOURCES, cache_dir=str(tmp_path))
+    plain = _plain_dataset()
+
+    assert typed["higher"].dtype == "category"
+    assert typed.memory_usage(deep=True).sum() * 5 < plain.memory_usage(deep=True).sum()
+    typed_encoded = pd.get_dummies(typed, drop_first=True)
+    plain_encoded = pd.get_dummies(plain, drop_first=True)
+    assert list(typed_encoded.columns) == list(plain_encoded.columns)
+    assert (typed_encoded.to_numpy(dtype=float) == plain_encoded.to_numpy(dtype=float)).all()
+
+
+def test_cache_is_reused_until_a_source_changes(tmp_path, monkeypatch):
+    sources = []
+    for subject, path in SOURCES:
+        copy = tmp_path / path.split("/")[-1]
+        shutil.copyfile(path, copy)
+        sources.append((subject, str(copy)))
+    cache_dir = str(tmp_path / "cache")
+    first = load_students(sources, cache_dir=cache_dir)
+
+    def reparse(*args, **kwargs):
+        raise AssertionError("cached dataset was re-parsed")
+
+    monkeypatch.setattr(ingestion, "read_student_csv", reparse)
+    pd.testing.assert_frame_equal(load_students(sources, cache_dir=cache_dir), first)
+
+    with open(sources[0][1], "a") as f:
+        f.write('"GP";"F";16;"U";"GT3";"T";4;4;"health";"other";"home";"mother";1;1;0;"no";"yes";"no";"yes";"yes";"yes";"yes";"no";4;3;2;1;2;5;0;"15";"15";15\n')
+    with pytest.raises(AssertionError, match="re-parsed"):
+        load_students(sources, cache_dir=cache_dir)
+
+
+def _blank_cell(source, target, row, column):
+    lines = open(source).read().splitlines()
+    header = lines[0].split(";")
+    cells = lines[row].split(";")
+    cells[header.index(column)] = ""
+    lines[row] = ";".join(cells)
+    target.write_text("\n".join(lines) + "\n")
+    return str(target)
+
+
+def test_blank_numeric_cells_drop_the_row_instead_of_failing(tmp_path):
+    por = _blank_cell("data/student-por.csv", tmp_path / "por.csv", 3, "G2")
+    mat = _blank_cell("data/student-mat.csv", tmp_path / "mat.csv", 5, "G3")
+
+    raw = read_student_csv(por)
+    assert raw["G2"].dtype == "Int8" and raw["G2"].isna().sum() == 1
+    assert raw["G1"].dtype == "int8"
+
+    df = create_risk_label(load_and_merge(mat, por))
+    X, y, cleaned = clean_and_encode(df, target="risk_level", task="classification")
+    plain = pd.concat([pd.read_csv(mat, sep=";"), pd.read_csv(por, sep=";")]).dropna().drop_duplicates()
+    assert len(cleaned) == len(plain)
+    assert cleaned["studytime"].dtype == "int8" and cleaned["absences"].dtype == "int16"
+
+    typed = load_students([("math", mat), ("portuguese", por)], cache_dir=None)
+    assert len(typed) == len(plain) and typed["G2"].dtype == "int8"
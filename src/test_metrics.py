@@ -0,0 +1,44 @@
+from metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5.0, stage="a")
+    with hist.time(stage="b"):
+        pass
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{stage="a"} 5.55' in text
+    assert 'demo_seconds_count{stage="b"} 1' in text
+
+
+def test_counters_gauges_and_collectors():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("demo_requests_total", "Requests", ["status"])
+    requests_total.inc(status="200")
+    requests_total.inc(2, status="200")
+    registry.gauge("demo_up", "Up").set(1)
+    registry.collector(lambda: [("demo_cache_hits_total", "counter", "Hits", [({"backend": 'mem"ory'}, 4), ({}, None)])])
+
+    text = registry.render()
+    assert 'demo_requests_total{status="200"} 3' in text
+    assert "demo_up 1" in text
+    assert 'demo_cache_hits_total{backend="mem\\"ory"} 4' in text
+    assert text.count("demo_cache_hits_total") == 3
+
+
+def test_labels_must_match():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo", ["stage"])
+    try:
+        counter.inc(step="x")
+    except ValueError:
+        return
+    raise AssertionError("mismatched labels were accepted")
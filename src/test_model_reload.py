@@ -0,0 +1,131 @@
+import shutil
+import threading
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+import api
+from feature_schema import FeatureSchemaError, build_feature_schema, save_feature_schema
+from inference_kernel import export_inference_kernel
+from model_bundle import PROMOTING_FILE, BundleSlot, ModelBundle, ModelReloadError, default_encoder, smoke_test
+from preprocessing import clean_and_encode, create_risk_label, load_and_merge
+
+
+def _train(models_dir, C):
+    models_dir.mkdir(parents=True)
+    df = create_risk_label(load_and_merge("data/student-mat.csv", "data/student-por.csv"))
+    X, y, cleaned = clean_and_encode(df, target="risk_level", task="classification")
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression(C=C, max_iter=1000).fit(scaler.transform(X), y)
+
+    model_path, scaler_path = models_dir / "final_model.pkl", models_dir / "scaler.pkl"
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    schema = build_feature_schema(cleaned.drop(columns=["risk_level"]), X.columns, scaler, model, model_path, scaler_path)
+    save_feature_schema(schema, models_dir / "feature_schema.json")
+    export_inference_kernel(model, scaler, schema, models_dir / "inference_kernel.npz")
+    return models_dir
+
+
+@pytest.fixture(scope="module")
+def bundles(tmp_path_factory):
+    root = tmp_path_factory.mktemp("bundles")
+    return _train(root / "a", C=1.0), _train(root / "b", C=0.01)
+
+
+def _deploy(source, target):
+    for path in source.iterdir():
+        shutil.copyfile(path, target / path.name)
+
+
+def test_watcher_swaps_rolls_back_and_rejects_bad_bundles(bundles, tmp_path):
+    served = tmp_path / "models"
+    served.mkdir()
+    _deploy(bundles[0], served)
+    slot = BundleSlot(ModelBundle(default_encoder()), str(served))
+    first = slot.load()
+    assert first.is_loaded and slot.poll() is None
+
+    _deploy(bundles[1], served)
+    # Files that just changed are only loaded once they stay unchanged for a poll.
+    assert slot.poll() is None
+    second = slot.poll()
+    assert second is slot.current and slot.previous is first
+    assert second.version != first.version
+
+    assert slot.rollback() is first
+    assert slot.previous is second
+
+    # A kernel from another run fails the schema check; the served bundle stays.
+    _deploy(bundles[0], served)
+    shutil.copyfile(bundles[1] / "inference_kernel.npz", served / "inference_kernel.npz")
+    with pytest.raises(FeatureSchemaError):
+        slot.reload()
+    assert slot.current is first
+    assert slot.stats == {"reloaded": 1, "rejected": 1, "rolled_back": 1}
+
+
+def test_load_waits_for_a_promote_in_progress(bundles, tmp_path):
+    served = tmp_path / "models"
+    served.mkdir()
+    _deploy(bundles[0], served)
+    # A promote has swapped the model but not yet the schema, scaler and kernel.
+    (served / PROMOTING_FILE).write_text("b")
+    shutil.copyfile(bundles[1] / "final_model.pkl", served / "final_model.pkl")
+    slot = BundleSlot(ModelBundle(default_encoder()), str(served))
+    assert slot.poll() is None
+
+    def finish_promote():
+        _deploy(bundles[1], served)
+        (served / PROMOTING_FILE).unlink()
+
+    timer = threading.Timer(0.3, finish_promote)
+    timer.start()
+    bundle = slot.load()
+    timer.join()
+    assert bundle.schema["model"]["sha256"] == BundleSlot(None, str(bundles[1])).load().schema["model"]["sha256"]
+
+    # Without a promote in progress, a mismatch fails at once.
+    shutil.copyfile(bundles[0] / "final_model.pkl", served / "final_model.pkl")
+    with pytest.raises(FeatureSchemaError):
+        slot.load()
+
+
+def test_smoke_test_rejects_unknown_predictions():
+    class Broken:
+        def predict(self, X):
+            return ["Excellent"] * len(X)
+
+    slot = BundleSlot(ModelBundle(default_encoder()), "unused", loader=lambda _: ModelBundle(default_encoder(), model=Broken()))
+    assert smoke_test(slot.loader(None)) == ["unknown risk levels ['Excellent']"]
+    with pytest.raises(ModelReloadError):
+        slot.reload()
+    assert not slot.current.is_loaded
+
+
+def test_admin_reload_and_rollback(bundles, monkeypatch, tmp_path):
+    version_dir = tmp_path / "versions" / "next"
+    version_dir.mkdir(parents=True)
+    _deploy(bundles[1], version_dir)
+    slot = BundleSlot(ModelBundle(default_encoder()), str(bundles[0]))
+    slot.load()
+    monkeypatch.setattr(api, "MODELS", slot)
+    monkeypatch.setattr(api, "MODELS_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    client = api.app.test_client()
+    auth = {"Authorization": "Bearer secret"}
+
+    assert client.post("/admin/model/reload").status_code == 401
+    assert client.post("/admin/model/reload", json={"version": "../a"}, headers=auth).status_code == 404
+
+    response = client.post("/admin/model/reload", json={"version": "next"}, headers=auth)
+    assert response.status_code == 200
+    model = response.get_json()["model"]
+    assert model["current"]["source"] == str(version_dir)
+    assert client.get("/health").get_json()["model_version"] == model["current"]["version"]
+
+    response = client.post("/admin/model/rollback", headers=auth)
+    assert response.get_json()["model"]["current"]["source"] == str(bundles[0])
+    assert client.post("/predict", json={"studytime": 2, "failures": 0}).status_code == 200
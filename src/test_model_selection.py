@@ -0,0 +1,51 @@
+import numpy as np
+
+import model_selection
+from model_selection import confidence_interval, cross_validate_grid, expand_grid
+
+GRID = [
+    {
+        "name": "logistic_regression",
+        "model": "LogisticRegression",
+        "fixed": {"max_iter": 500},
+        "grid": {"C": [0.1, 1.0]},
+    },
+    {"name": "random_forest", "model": "RandomForestClassifier", "fixed": {"n_estimators": 10, "random_state": 0}},
+]
+
+
+def _dataset():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = np.where(X[:, 0] + 0.3 * rng.normal(size=120) < -0.4, "At-risk",
+                 np.where(X[:, 1] > 0.5, "High-performing", "Average"))
+    return X, y
+
+
+def test_expand_grid_makes_one_candidate_per_combination():
+    ids = [c["id"] for c in expand_grid(GRID)]
+    assert ids == ["logistic_regression[C=0.1]", "logistic_regression[C=1.0]", "random_forest"]
+
+
+def test_confidence_interval_brackets_the_mean():
+    low, high = confidence_interval([0.5, 0.6, 0.7])
+    assert low < 0.6 < high
+    assert confidence_interval([0.4]) == (0.4, 0.4)
+
+
+def test_cross_validation_ranks_candidates_and_reuses_cached_folds(tmp_path, monkeypatch):
+    X, y = _dataset()
+    first = cross_validate_grid(X, y, grid=GRID, n_splits=3, n_jobs=2, cache_dir=str(tmp_path))
+
+    assert [row["rank"] for row in first] == [1, 2, 3]
+    recalls = [row["recall"]["mean"] for row in first]
+    assert recalls == sorted(recalls, reverse=True)
+    for row in first:
+        assert len(row["accuracy"]["folds"]) == 3
+        assert row["accuracy"]["ci95"][0] <= row["accuracy"]["mean"] <= row["accuracy"]["ci95"][1]
+
+    def refit(*args, **kwargs):
+        raise AssertionError("cached fold was refit")
+
+    monkeypatch.setattr(model_selection, "_fit_fold", refit)
+    assert cross_validate_grid(X, y, grid=GRID, n_splits=3, n_jobs=2, cache_dir=str(tmp_path)) == first
@@ -0,0 +1,64 @@
+import pstats
+
+import api
+from profiling import RequestProfiler
+
+STUDENT = {
+    "student_data": {"studytime": 2, "failures": 1, "absences": 12, "health": 3, "goout": 4, "subject": "math"},
+    "goal": {"priority": "high", "target_grade": "Pass the exam"},
+}
+
+
+def test_ring_buffer_keeps_newest_profiles(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), max_profiles=2)
+    names = []
+    for n in range(3):
+        profile = profiler.start()
+        sum(range(1000))
+        names.append(profiler.finish(profile, f"00000000-0000-0000-0000-00000000000{n}", "predict", 200))
+
+    stored = [p["name"] for p in profiler.list()]
+    assert len(set(names)) == 3
+    assert set(stored) == set(names[1:])
+    assert profiler.path_for(names[0]) is None
+    assert profiler.path_for("../../etc/passwd") is None
+    pstats.Stats(profiler.path_for(names[2]))
+
+
+def test_listing_skips_profiles_trimmed_meanwhile(tmp_path, monkeypatch):
+    profiler = RequestProfiler(str(tmp_path))
+    kept = profiler.finish(profiler.start(), "00000000-0000-0000-0000-000000000001", "predict", 200)
+    gone = profiler.finish(profiler.start(), "00000000-0000-0000-0000-000000000002", "predict", 200)
+    names = profiler._names()
+    # Another worker trims the newest profile between the listing and the size lookup.
+    (tmp_path / gone).unlink()
+    monkeypatch.setattr(profiler, "_names", lambda: names)
+    assert [p["name"] for p in profiler.list()] == [kept]
+
+
+def test_only_one_capture_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    first = profiler.start()
+    assert profiler.start() is None
+    profiler.finish(first, "00000000-0000-0000-0000-000000000000", "predict", 200)
+    assert profiler.stats()["skipped_busy"] == 1
+
+
+def test_admin_can_profile_and_download(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(api, "PROFILER", RequestProfiler(str(tmp_path)))
+    client = api.app.test_client()
+
+    anonymous = client.post("/predict", json=STUDENT, headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in anonymous.headers
+
+    profiled = client.post("/predict", json=STUDENT, headers={"X-Profile": "1", "Authorization": "Bearer secret"})
+    name = profiled.headers["X-Profile-Id"]
+    assert name.endswith(f"_{profiled.get_json()['status']['request_id']}.prof")
+
+    assert client.get("/admin/profiles").status_code == 401
+    listing = client.get("/admin/profiles", headers={"X-Admin-Token": "secret"}).get_json()
+    assert [p["name"] for p in listing["profiles"]] == [name]
+
+    download = client.get(f"/admin/profiles/{name}", headers={"X-Admin-Token": "secret"})
+    assert download.status_code == 200 and len(download.data) > 0
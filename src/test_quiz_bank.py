@@ -0,0 +1,67 @@
+import pytest
+
+import ai_coach
+from quiz_bank import QuizBank, QuizBankError, load_quiz_bank
+
+
+def _bank(per_pool):
+    return QuizBank({
+        "difficulty": {"At-risk": "basic", "Average": "intermediate"},
+        "question_counts": {"At-risk": 3, "Average": 4},
+        "default_topic": "study habits",
+        "default_risk_level": "Average",
+        "topics": {
+            topic: {risk: [{"question": f"{topic} {risk} {i}", "answer": str(i)} for i in range(per_pool)]
+                    for risk in ("At-risk", "Average")}
+            for topic in ("math", "study habits")
+        }
+    })
+
+
+def test_questions_are_prestamped_and_copied():
+    bank = load_quiz_bank("data/quiz_bank.json")
+    quiz = bank.questions("math", "At-risk")
+    assert len(quiz) == 3
+    assert all(q["difficulty"] == "basic" and q["topic"] == "math" for q in quiz)
+    assert bank.index[("math", "At-risk", "basic")][:3] == tuple(quiz)
+    # Changing a returned question does not change the bank.
+    quiz[0]["question"] = "changed"
+    bank.sample("math", "At-risk", key="student-1")[0]["topic"] = "changed"
+    again = bank.questions("math", "At-risk")
+    assert again[0]["question"] != "changed"
+    assert {q["topic"] for q in bank.sample("math", "At-risk", key="student-1")} == {"math"}
+
+    # Unknown risk levels use the default; unknown topics use the default topic's questions.
+    assert bank.questions("math", "Unknown") == bank.questions("math", "Average")
+    history = bank.questions("history", "High-performing")
+    assert [q["question"] for q in history] == [q["question"] for q in bank.questions("study habits", "High-performing")]
+    assert {q["topic"] for q in history} == {"history"}
+    history[0]["topic"] = "changed"
+    assert bank.questions("history", "High-performing")[0]["topic"] == "history"
+
+
+def test_fallback_quiz_comes_from_the_bank():
+    quiz = ai_coach._build_quiz_generation({"subject": "portuguese"}, {"weaknesses": []}, "High-performing")
+    assert len(quiz) == 5 and {(q["topic"], q["difficulty"]) for q in quiz} == {("language", "advanced")}
+    sections = ai_coach._fallback_sections({"subject": "portuguese"}, {"weaknesses": [], "strengths": []}, "High-performing", "exam", [])
+    assert sections["quiz_questions"] == quiz
+
+
+def test_sampling_is_per_student_and_without_replacement():
+    bank = _bank(20000)
+    first = bank.sample("math", "Average", key="student-1", count=50)
+    assert len({q["question"] for q in first}) == 50
+    assert bank.sample("math", "Average", key="student-1", count=50) == first
+    assert bank.sample("math", "Average", key="student-2", count=50) != first
+    assert {q["topic"] for q in bank.sample("art", "At-risk", key="student-1")} == {"art"}
+    # A pool smaller than the count is returned whole, in random order.
+    small = _bank(2)
+    assert sorted(q["answer"] for q in small.sample("math", "Average", key="x")) == ["0", "1"]
+
+
+def test_malformed_bank_is_rejected():
+    with pytest.raises(QuizBankError):
+        QuizBank({"difficulty": {}, "question_counts": {"Average": 4}, "default_topic": "math",
+                  "default_risk_level": "Average", "topics": {"math": {"Average": [{"question": "?"}]}}})
+    with pytest.raises(QuizBankError):
+        QuizBank({"topics": {}})
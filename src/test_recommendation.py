@@ -0,0 +1,45 @@
+import random
+
+import pandas as pd
+
+from recommendation import (
+    ABSENCE_TIPS, HEALTH_TIP, RISK_POOLS, generate_recommendations, generate_recommendations_batch
+)
+
+STUDENT = {"student_id": "s-17", "studytime": 1, "absences": 14, "failures": 2, "health": 2,
+           "internet": "yes", "higher": "yes", "subject": "portuguese"}
+
+
+def test_same_inputs_give_the_same_recommendations():
+    first = generate_recommendations(STUDENT, "At-risk")
+    random.seed(1)
+    assert generate_recommendations(dict(STUDENT), "At-risk") == first
+    # Fields the rules do not read do not change the output.
+    assert generate_recommendations(dict(STUDENT, age=17), "At-risk") == first
+
+    assert len(first) == 3 + 7
+    assert sum(tip in RISK_POOLS["At-risk"] for tip in first) == 3
+    assert HEALTH_TIP in first
+    absence_tip = next(tip for tip in first if tip in [t.format(absences=14) for t in ABSENCE_TIPS])
+    assert "{" not in absence_tip
+
+    # The returned list is the caller's to modify.
+    first.clear()
+    assert generate_recommendations(STUDENT, "At-risk")
+
+
+def test_seed_and_student_id_change_the_selection():
+    outputs = {tuple(generate_recommendations(dict(STUDENT, student_id=i), "Average")) for i in range(20)}
+    assert len(outputs) > 1
+    seeded = {tuple(generate_recommendations(STUDENT, "Average", seed=s)) for s in range(20)}
+    assert len(seeded) > 1
+
+
+def test_batch_matches_per_student_calls():
+    df = pd.read_csv("data/student-por.csv", sep=";").head(60)
+    df["subject"] = "portuguese"
+    risks = ["At-risk", "Average", "High-performing"] * 20
+    expected = [generate_recommendations(row, risk) for row, risk in zip(df.to_dict("records"), risks)]
+
+    assert generate_recommendations_batch(df, risks) == expected
+    assert generate_recommendations_batch([STUDENT] * 3, "Average") == [generate_recommendations(STUDENT, "Average")] * 3
@@ -0,0 +1,84 @@
+import json
+import threading
+
+import resource_registry
+from resource_registry import compile_registry, get_registry, load_registry
+
+
+def _item(name, priority, url=None, **extra):
+    return dict(name=name, url=url or f"https://example.org/{name}", why=f"{name} help", priority=priority, **extra)
+
+
+def test_lookup_matches_a_scan_of_every_category():
+    registry = load_registry("data/resources.json")
+    categories = registry.table["categories"]
+
+    def scan(subject, weaknesses):
+        pool, found_any = [], False
+        for w in weaknesses:
+            for needle, tag in (("absent", "absences"), ("study", "studytime"), ("failure", "failures")):
+                if needle in w.lower():
+                    pool.extend(categories[tag])
+                    found_any = True
+        pool.extend(categories.get(subject.lower(), []))
+        if not found_any:
+            pool.extend(categories["advanced"])
+        unique = {}
+        for item in pool:
+            if item["url"] not in unique or item["priority"] > unique[item["url"]]["priority"]:
+                unique[item["url"]] = item
+        return sorted(unique.values(), key=lambda x: x["priority"], reverse=True)[:4]
+
+    for subject in ("math", "Portuguese", "history"):
+        for weaknesses in ([], ["high absenteeism"], ["low weekly study engagement", "high absenteeism"],
+                           ["past academic failures", "excessive social distractions"]):
+            assert registry.top(subject, weaknesses) == scan(subject, weaknesses)
+
+
+def test_tags_duplicates_and_cached_results():
+    registry = compile_registry({
+        "categories": {
+            "math": [_item("algebra", 5), _item("shared", 1)],
+            "absences": [_item("catch-up", 9, tags=["Math"]), _item("shared", 7)]
+        },
+        "weakness_tags": {"attendance": ["absences"]},
+        "default_tags": []
+    })
+    # A resource listed under a tag is found through it; a URL listed twice keeps its best priority.
+    assert [r["name"] for r in registry.top("math", [])] == ["catch-up", "algebra", "shared"]
+    assert registry.top("math", [])[2]["priority"] == 1
+    assert [r["priority"] for r in registry.top("math", ["poor attendance"], k=2)] == [9, 7]
+    # Different weakness text selecting the same tags shares one cached result.
+    assert registry.key("Math", ["poor attendance"]) == registry.key("math", ["Attendance issues"])
+    assert registry.top("math", ["Attendance issues"], k=2) == registry.top("math", ["poor attendance"], k=2)
+    assert len(registry._top_cache) == 2
+
+
+def test_reload_swaps_snapshots_and_keeps_the_last_good_one(tmp_path, monkeypatch):
+    path = tmp_path / "resources.json"
+    path.write_text(json.dumps({"categories": {"math": [_item("first", 1)]}}))
+    monkeypatch.setattr(resource_registry, "RESOURCES_PATH", str(path))
+    monkeypatch.setattr(resource_registry, "RESOURCES_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(resource_registry, "_REGISTRY", None)
+
+    first = get_registry()
+    assert [r["name"] for r in first.top("math", [])] == ["first"]
+    assert get_registry() is first
+
+    path.write_text(json.dumps({"categories": {"math": [_item("second", 1)]}}))
+    second = get_registry()
+    assert second is not first and [r["name"] for r in second.top("math", [])] == ["second"]
+    # The old snapshot is untouched for readers still holding it.
+    assert [r["name"] for r in first.top("math", [])] == ["first"]
+
+    path.write_text("{not json")
+    assert get_registry() is second
+
+    # A reader arriving while another thread is checking the file is not made to wait.
+    path.write_text(json.dumps({"categories": {}}))
+    with resource_registry._RELOAD_LOCK:
+        result = []
+        reader = threading.Thread(target=lambda: result.append(get_registry()))
+        reader.start()
+        reader.join(timeout=5)
+        assert result == [second]
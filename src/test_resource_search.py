@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+import api
+from resource_registry import compile_registry, load_registry
+from resource_search import SearchIndex, tokenize
+
+
+def test_scores_match_bm25_by_hand():
+    docs = [
+        ({"name": "Fractions", "why": "fractions practice drills", "url": "a", "priority": 1}, ["math"]),
+        ({"name": "Essay", "why": "writing practice", "url": "b", "priority": 9}, ["portuguese"]),
+        ({"name": "Timer", "why": "focus", "url": "c", "priority": 5}, ["studytime"]),
+    ]
+    index = SearchIndex(docs, k1=1.2, b=0.75)
+    terms = [tokenize(i["name"]) * 2 + tokenize(i["why"]) + tokenize(" ".join(t)) for i, t in docs]
+    avgdl = sum(map(len, terms)) / len(terms)
+
+    def bm25(term, doc):
+        df = sum(term in d for d in terms)
+        tf = terms[doc].count(term)
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        return idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(terms[doc]) / avgdl))
+
+    scores = index.scores("Fraction practice")
+    for doc in range(3):
+        assert scores[doc] == pytest.approx(bm25("fraction", doc) + bm25("practice", doc))
+    assert [item["url"] for item, _ in index.search("fraction practice")] == ["a", "b"]
+    # Equal scores go to the higher priority; a tag restricts the results.
+    assert [item["url"] for item, _ in index.search("practice")][0] == "b"
+    assert [item["url"] for item, _ in index.search("practice", tag="math")] == ["a"]
+    assert index.search("unrelated words") == []
+
+
+def test_registry_search_dedupes_urls_and_uses_weakness_tags():
+    registry = compile_registry({"categories": {
+        "math": [{"name": "Khan Academy", "url": "k", "why": "Video lessons", "priority": 10}],
+        "absences": [{"name": "Catch-up plan", "url": "c", "why": "Recover missed lessons", "priority": 15},
+                     {"name": "Khan Academy", "url": "k", "why": "Video lessons", "priority": 12}],
+    }})
+    # A URL listed twice is one document: its best entry, under both tags.
+    assert registry.search_index.tags == (("absences",), ("math", "absences"))
+    assert [(r["url"], r["priority"]) for r in registry.search("lessons")] == [("k", 12), ("c", 15)]
+    # "high absenteeism" shares no word with the resources, but selects the absences tag.
+    assert registry.search("high absenteeism") == []
+    # Khan Academy matches both the tag and the subject.
+    assert [r["url"] for r in registry.search_for_student("math", ["high absenteeism"])] == ["k", "c"]
+
+
+def test_search_endpoint():
+    client = api.app.test_client()
+    response = client.get("/resources/search?q=graphing+functions&k=2")
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0]["name"] == "Desmos Graphing" and results[0]["score"] > 0
+    assert load_registry("data/resources.json").search("graphing functions", 2) == results
+
+    response = client.get("/resources/search?subject=math&weaknesses=past+academic+failures,high+absenteeism")
+    assert response.get_json()["results"][0]["name"] == "Growth Mindset Principles"
+    assert client.get("/resources/search").status_code == 400
+    assert client.get("/resources/search?q=math&k=500").status_code == 400
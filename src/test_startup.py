@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import api
+
+
+def test_readiness_waits_for_warm_up(monkeypatch):
+    monkeypatch.setattr(api, "STARTUP", {"ready": False, "import_ms": 1.0, "warm_up_ms": None, "stages": {}})
+    client = api.app.test_client()
+
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "starting"
+
+    api.warm_up()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "ready"
+    assert {"registry", "fallback_table", "groq_client", "first_prediction"} <= set(body["startup"]["stages"])
+
+
+def test_importing_the_api_does_not_load_heavy_modules():
+    code = "import sys; sys.path.insert(0, 'src'); import api; print(sorted(m for m in ('pandas', 'joblib', 'sklearn') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
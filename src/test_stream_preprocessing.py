@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing import clean_and_encode, create_risk_label, load_and_merge, split_dataset
+from feature_schema import load_feature_schema
+from model_bundle import load_bundle, smoke_test
+from stream_preprocessing import build_store
+from train import train_from_store
+
+
+def test_store_matches_in_memory_encoding(tmp_path):
+    store = build_store(store_dir=str(tmp_path / "store"), chunksize=97)
+    X, y, _ = clean_and_encode(
+        create_risk_label(load_and_merge("data/student-mat.csv", "data/student-por.csv")),
+        target="risk_level",
+        task="classification"
+    )
+
+    assert store.columns == list(X.columns)
+    np.testing.assert_array_equal(np.asarray(store.X, dtype=np.float64), X.to_numpy(dtype=np.float64))
+    assert list(store.y) == list(y)
+    np.testing.assert_allclose(store.scaler.mean_, X.mean().to_numpy(), rtol=1e-12)
+
+    # Same stratified split as split_dataset, by row position.
+    train_rows, _ = store.split()
+    X_train, *_ = split_dataset("data/student-mat.csv", "data/student-por.csv", task="classification")
+    np.testing.assert_array_equal(np.asarray(store.X[train_rows], dtype=np.float64), X_train.to_numpy(dtype=np.float64))
+
+
+def test_duplicates_across_chunks_and_files_are_dropped(tmp_path):
+    por = pd.read_csv("data/student-por.csv", sep=";")
+    first = tmp_path / "a.csv"
+    second = tmp_path / "b.csv"
+    pd.concat([por.head(30), por.head(5)]).to_csv(first, sep=";", index=False)
+    pd.concat([por.head(10), por.iloc[30:40]]).to_csv(second, sep=";", index=False)
+
+    store = build_store([("portuguese", str(first)), ("portuguese", str(second))],
+                        store_dir=str(tmp_path / "store"), chunksize=4)
+
+    assert len(store) == 40
+    batches = list(store.iter_batches(batch_rows=16))
+    assert [len(y) for _, y in batches] == [16, 16, 8]
+    scaled = np.vstack([X for X, _ in batches])
+    np.testing.assert_allclose(scaled.mean(axis=0), 0, atol=1e-9)
+
+
+def test_blank_cells_drop_the_row(tmp_path):
+    por = pd.read_csv("data/student-por.csv", sep=";")
+    por.loc[3, "G2"] = None
+    por.loc[7, "absences"] = None
+    path = tmp_path / "por.csv"
+    por.to_csv(path, sep=";", index=False)
+
+    store = build_store([("portuguese", str(path))], store_dir=str(tmp_path / "store"), chunksize=50)
+    assert len(store) == len(por.dropna().drop_duplicates())
+
+
+def test_training_consumes_the_store(tmp_path):
+    store = build_store(store_dir=str(tmp_path / "store"), chunksize=200)
+    models_dir = tmp_path / "models"
+    model = train_from_store(str(tmp_path / "store"), models_dir=str(models_dir), batch_rows=128)
+
+    bundle = load_bundle(str(models_dir), "kernel", memory_map=False)
+    assert bundle.is_loaded and smoke_test(bundle) == []
+    schema = load_feature_schema(str(models_dir / "feature_schema.json"))
+    assert schema["columns"] == store.columns
+    assert schema["categories"]["Mjob"] == ["at_home", "health", "other", "services", "teacher"]
+    assert set(model.classes_) == {"At-risk", "Average", "High-performing"}
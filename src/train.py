@@ -1,87 +1,159 @@
-from preprocessing import preprocess_pipeline
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from preprocessing import split_dataset, scale_features
+from feature_schema import build_feature_schema, save_feature_schema
+from inference_kernel import export_inference_kernel
+from model_selection import (
+    DEFAULT_GRID, build_estimator, cross_validate_grid, load_grid, print_leaderboard, save_leaderboard
+)
+from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.preprocessing import StandardScaler
+import argparse
 import joblib
+import numpy as np
 import os
 
-def train_model():
-    # 1: Preprocess Data 
-    X_train, X_test, y_train, y_test, scaler, feature_names = preprocess_pipeline(
+CV_CACHE_DIR = os.path.join("data", "cache", "cv")
+
+def train_model(grid=None, n_splits=5, n_jobs=-1, use_cache=True):
+    # 1: Preprocess Data
+    X_train_raw, X_test_raw, y_train, y_test, feature_names, cleaned_df = split_dataset(
         "data/student-mat.csv",
         "data/student-por.csv",
         task="classification"
-    ) 
-    print("Logistic Regression")
-    # 2: Initialize Model 
-    lr_model = LogisticRegression(max_iter=1000,class_weight="balanced") 
-
-    # 3: Train Model 
-    lr_model.fit(X_train, y_train)  
-
-    # 4: Make Predictions 
-    y_pred_lr = lr_model.predict(X_test)
-
-    # 5: Evaluate Model 
-    lr_accuracy = accuracy_score(y_test, y_pred_lr)
-
-    lr_report = classification_report(y_test, y_pred_lr, output_dict=True)
-
-    print("MODEL EVALUATION") 
-    print("Accuracy:", round(lr_accuracy * 100, 2), "%")
-    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred_lr))
-    print("\nClassification Report:\n", classification_report(y_test, y_pred_lr))
-
-    print("\nRandom Forest")
-
-    rf_model = RandomForestClassifier(
-        n_estimators=300,
-        class_weight="balanced",
-        random_state=42
     )
-
-    rf_model.fit(X_train, y_train)
-
-    y_pred_rf = rf_model.predict(X_test)
-    rf_accuracy = accuracy_score(y_test, y_pred_rf)
-    rf_report = classification_report(y_test, y_pred_rf, output_dict=True)
-
-
-    print("MODEL EVALUATION") 
-    print("Accuracy:", round(rf_accuracy * 100, 2), "%")
-    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred_rf))
-    print("\nClassification Report:\n", classification_report(y_test, y_pred_rf))
-
-    # compare model based on At-risk Recall 
-    lr_recall = lr_report["At-risk"]["recall"]
-    rf_recall = rf_report["At-risk"]["recall"]
-    
-    print("\nModel Comparison")
-    print("Logistic Regression At-risk Recall:", round(lr_recall, 2))
-    print("Random Forest At-risk Recall:", round(rf_recall, 2))
-
-    # select the best model
-    if lr_recall >= rf_recall:
-        best_model = lr_model
-        best_model_name = "Balanced Logistic Regression"
-    else:
-        best_model = rf_model
-        best_model_name = "Balanced Random Forest"
-
-    print(f"\nSelected Best Model: {best_model_name}")
-
-
-    # 6: Save best Model and Scaler
+    X_train, X_test, scaler = scale_features(X_train_raw, X_test_raw)
+
+    # 2: Cross-validate every candidate on the training split, across all cores
+    leaderboard = cross_validate_grid(
+        X_train_raw,
+        y_train,
+        grid=grid or DEFAULT_GRID,
+        n_splits=n_splits,
+        n_jobs=n_jobs,
+        cache_dir=CV_CACHE_DIR if use_cache else None
+    )
+    print_leaderboard(leaderboard)
 
     os.makedirs("models", exist_ok=True)
+    save_leaderboard(leaderboard, "models/leaderboard.json", n_splits=n_splits, selection_metric="At-risk recall")
+
+    # 3: Refit the winner on the full training split
+    best = leaderboard[0]
+    print(f"\nSelected Best Model: {best['id']}")
+    best_model = build_estimator(best, n_jobs=n_jobs)
+    best_model.fit(X_train, y_train)
+    if best_model.get_params().get("n_jobs") is not None:
+        # Serve single rows without spinning up a worker pool per request.
+        best_model.set_params(n_jobs=None)
+
+    # 4: Evaluate on the held-out test split
+    y_pred = best_model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
+
+    print("MODEL EVALUATION")
+    print("Accuracy:", round(accuracy * 100, 2), "%")
+    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+
+    # 5: Save best Model and Scaler
     joblib.dump(best_model, "models/final_model.pkl")
     joblib.dump(scaler, "models/scaler.pkl")
 
+    # 6: Save the feature schema the API builds its encoder from
+    schema = build_feature_schema(
+        cleaned_df.drop(columns=["risk_level"]),
+        feature_names,
+        scaler,
+        best_model,
+        "models/final_model.pkl",
+        "models/scaler.pkl"
+    )
+    save_feature_schema(schema, "models/feature_schema.json")
+
+    # 7: Export the fused scaler + model kernel served by the API
+    export_inference_kernel(best_model, scaler, schema, "models/inference_kernel.npz")
+
     print("\nModel saved successfully in models/final_model.pkl")
     print("Scaler saved successfully in models/scaler.pkl")
+    print("Feature schema saved successfully in models/feature_schema.json")
+    print("Inference kernel saved successfully in models/inference_kernel.npz")
+    print("Leaderboard saved successfully in models/leaderboard.json")
 
     return best_model
-    
-if __name__ == "__main__":
-    train_model() 
 
+def train_from_store(store_dir, models_dir="models", epochs=5, batch_rows=10000, alpha=1e-3, seed=42):
+    """Train a log-loss SGD model from a stream_preprocessing store without loading it into memory.
+
+    Rows stay memory-mapped and are read batch by batch: one pass fits the
+    scaler on the training split, then each epoch visits the training rows
+    in a new random order. Writes the same artifacts as train_model.
+    """
+    from stream_preprocessing import StreamStore
+
+    # 1: Split the store by row index
+    store = StreamStore(store_dir)
+    if store.meta["task"] != "classification":
+        raise ValueError(f"{store_dir} holds a {store.meta['task']} store; the risk model needs classification")
+    train_rows, test_rows = store.split(seed=seed)
+
+    # 2: Scale with statistics from the training rows only, like scale_features
+    scaler = StandardScaler()
+    for X, _ in store.iter_batches(batch_rows, rows=train_rows, scaled=False):
+        scaler.partial_fit(X)
+
+    # 3: Fit batch by batch, weighting classes as class_weight="balanced" would
+    labels, counts = np.unique(np.asarray(store.y[train_rows]), return_counts=True)
+    class_weight = dict(zip(labels, len(train_rows) / (len(labels) * counts)))
+    # Averaged weights smooth out the step-to-step noise of small batches.
+    model = SGDClassifier(loss="log_loss", alpha=alpha, average=True, random_state=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(train_rows)
+        for start in range(0, order.size, batch_rows):
+            for X, y in store.iter_batches(batch_rows, rows=order[start:start + batch_rows], scaled=False):
+                weights = np.array([class_weight[label] for label in y])
+                model.partial_fit(scaler.transform(X), y, classes=labels, sample_weight=weights)
+
+    # 4: Evaluate on the held-out rows
+    y_test, y_pred = [], []
+    for X, y in store.iter_batches(batch_rows, rows=test_rows, scaled=False):
+        y_test.append(y)
+        y_pred.append(model.predict(scaler.transform(X)))
+    y_test, y_pred = np.concatenate(y_test), np.concatenate(y_pred)
+    print("MODEL EVALUATION")
+    print("Accuracy:", round(accuracy_score(y_test, y_pred) * 100, 2), "%")
+    print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred))
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+
+    # 5: Save the model, scaler, feature schema and inference kernel
+    os.makedirs(models_dir, exist_ok=True)
+    model_path, scaler_path = os.path.join(models_dir, "final_model.pkl"), os.path.join(models_dir, "scaler.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, scaler_path)
+    schema = build_feature_schema(store.feature_frame(), store.columns, scaler, model, model_path, scaler_path)
+    save_feature_schema(schema, os.path.join(models_dir, "feature_schema.json"))
+    export_inference_kernel(model, scaler, schema, os.path.join(models_dir, "inference_kernel.npz"))
+    print(f"\nModel, scaler, feature schema and inference kernel saved in {models_dir}/")
+
+    return model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and select the LearnScope.ai risk model")
+    parser.add_argument("--grid", help="JSON file with candidate models (defaults to model_selection.DEFAULT_GRID)")
+    parser.add_argument("--folds", type=int, default=5, help="stratified CV folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel workers (-1 = all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="refit every fold instead of reusing cached results")
+    parser.add_argument("--store", help="train from a stream_preprocessing.py store in this directory instead")
+    parser.add_argument("--epochs", type=int, default=5, help="passes over the store (with --store)")
+    parser.add_argument("--batch-rows", type=int, default=10000, help="rows per batch (with --store)")
+    args = parser.parse_args()
+
+    if args.store:
+        train_from_store(args.store, epochs=args.epochs, batch_rows=args.batch_rows)
+    else:
+        train_model(
+            grid=load_grid(args.grid) if args.grid else None,
+            n_splits=args.folds,
+            n_jobs=args.jobs,
+            use_cache=not args.no_cache
+        )
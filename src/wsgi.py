@@ -5,10 +5,10 @@ import os
 # Add the src directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.api import app, load_model
+from src.api import app, warm_up
 
-# Load model when wsgi starts
-load_model()
+# Load the model and warm up when wsgi starts
+warm_up()
 
 if __name__ == "__main__":
     app.run()
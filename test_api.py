@@ -320,6 +320,40 @@ def test_goal_variants():
         print(f"✗ Goal variants test failed: {e}")
         return False
 
+def test_batch_predict():
+    """Test batch scoring keeps input order and reports per-row errors"""
+    print("Testing batch prediction...")
+
+    students = [
+        {"studytime": 1, "failures": 2, "absences": 15, "health": 2, "goout": 4},
+        {"studytime": 4, "failures": 0, "absences": 2, "health": 5, "goout": 2},
+        {"studytime": 9, "failures": 0},
+    ]
+
+    try:
+        response = requests.post(f"{BASE_URL}/predict/batch", json=students, timeout=15)
+        if response.status_code != 200:
+            print(f"✗ Batch prediction test failed: Status {response.status_code}")
+            return False
+
+        result = response.json()
+        rows = result["results"]
+        assert len(rows) == len(students), "Batch should return one result per student"
+        assert [row["index"] for row in rows] == [0, 1, 2], "Batch results should keep input order"
+        assert rows[0]["status"]["code"] == "success", "Valid row should succeed"
+        assert "category" in rows[0]["risk_level"], "Missing risk_level.category"
+        assert rows[2]["status"]["code"] == "error", "Invalid row should report an error"
+        assert result["summary"] == {"total": 3, "succeeded": 2, "failed": 1}, "Unexpected batch summary"
+
+        print("✓ Batch prediction test passed")
+        return True
+    except requests.exceptions.ConnectionError:
+        print("✗ Cannot connect to backend. Is it running?")
+        return False
+    except Exception as e:
+        print(f"✗ Batch prediction test failed: {e}")
+        return False
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Flask API Test Suite")
@@ -334,6 +368,7 @@ if __name__ == "__main__":
     results.append(("High-performing student", test_high_performing_student()))
     results.append(("Goal variants", test_goal_variants()))
     results.append(("Validation", test_validation()))
+    results.append(("Batch prediction", test_batch_predict()))
     
     print()
     print("=" * 60)
@@ -5,11 +5,14 @@ import os
 # Add the project root to the path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from src.api import app, load_model
+from src.api import app, warm_up, FeatureSchemaError
 
-# Load model when wsgi starts (but don't fail if it doesn't exist)
+# Load the model and warm up before serving (but don't fail if there is no model)
 try:
-    load_model()
+    warm_up()
+except FeatureSchemaError:
+    # Never serve a model whose feature schema does not match it
+    raise
 except Exception as e:
     print(f"Warning: Could not load model at startup: {e}")
     print("App will use fallback predictions")